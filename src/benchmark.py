@@ -0,0 +1,299 @@
+"""
+Benchmarks de las partes más costosas del ETL.
+
+No requieren MongoDB ni SQL Server: trabajan sobre DataFrames sintéticos.
+Uso:
+    python benchmark.py conversion --filas 1000000
+    python benchmark.py fechas --filas 9600000
+    python benchmark.py reviewer --filas 1500000
+    python benchmark.py suite --escala 10m [--guardar-base]
+
+La suite genera las colecciones con generador.py, mide cada paso de la
+transformación y la conversión de filas de la carga, y compara contra la
+base guardada en benchmarks/base_<escala>.json (la primera ejecución de cada
+escala se guarda como base). Termina con código 1 si algún paso empeoró.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+import metricas
+from carga import _es_fecha, _escribir_staging, _preparar_filas, _to_python_value
+from generador import ESCALAS, generar_colecciones, leer_escala
+from tipos import normalizar_fechas, optimizar_tipos
+from logs import Logs
+from transformacion import _dimension_reviewer, transformacion_df
+
+# Directorio de los reportes de la suite: ultimo_<escala> y base_<escala> (.json y .csv)
+DIRECTORIO_BENCHMARKS = "benchmarks"
+
+# Diferencia mínima en segundos para marcar una regresión en la suite. Es menor
+# que la del ETL completo porque cada paso se mide como el mejor de varias repeticiones.
+SEGUNDOS_MINIMOS_SUITE = 0.05
+
+# Tablas que retorna transformacion_df, en su orden
+TABLAS_TRANSFORMADAS = ["listings", "reviews", "calendar", "host", "verification", "amenities_listings",
+    "amenities", "reviewer"]
+
+
+def _cronometrar(funcion, *args):
+    """Ejecuta la función y retorna (resultado, segundos)."""
+    inicio = time.perf_counter()
+    resultado = funcion(*args)
+    return resultado, time.perf_counter() - inicio
+
+
+def _df_conversion(filas: int, semilla: int = 42) -> pd.DataFrame:
+    """DataFrame sintético con los tipos de columna que llegan a la carga."""
+    rng = np.random.default_rng(semilla)
+    fechas = pd.date_range("2025-01-01", periods=365).strftime("%Y-%m-%d").to_numpy()
+    precios = rng.uniform(100, 5000, filas).round(2)
+    precios[rng.random(filas) < 0.1] = np.nan
+
+    return pd.DataFrame({
+        'listing_id': rng.integers(1, 10**18, filas, dtype=np.int64),
+        'date': fechas[rng.integers(0, len(fechas), filas)],
+        'available': rng.random(filas) < 0.5,
+        'price': precios,
+        'last_scraped': pd.to_datetime(fechas[rng.integers(0, len(fechas), filas)]),
+    })
+
+
+def _preparar_filas_legado(df: pd.DataFrame) -> list:
+    """Conversión celda por celda tal como la hacía _insertar_data originalmente."""
+    df = df.apply(lambda col: col.map(_to_python_value))
+    return [tuple(_to_python_value(x) for x in row) for row in df.to_numpy()]
+
+
+def benchmark_conversion(filas: int):
+    """Compara la conversión vectorizada por columna contra la conversión por celda."""
+    df = _df_conversion(filas)
+    print(f"Conversión de filas a parámetros SQL ({filas:,} filas, {df.shape[1]} columnas)")
+
+    legado, t_legado = _cronometrar(_preparar_filas_legado, df)
+    nuevo, t_nuevo = _cronometrar(_preparar_filas, df)
+
+    # Las columnas datetime sin hora ahora se enlazan como DATE (datetime.date);
+    # la conversión legada las entregaba como datetime a medianoche
+    fechas = {i for i, col in enumerate(df.columns)
+        if pd.api.types.is_datetime64_any_dtype(df[col]) and _es_fecha(df[col])}
+    legado = [tuple(v.date() if i in fechas and v is not None else v for i, v in enumerate(fila)) for fila in legado]
+
+    if legado != nuevo:
+        raise AssertionError("La conversión vectorizada no coincide con la conversión por celda")
+
+    print(f"  - Por celda (legado): {t_legado:.2f} s")
+    print(f"  - Por columna:        {t_nuevo:.2f} s")
+    print(f"  - Aceleración:        {t_legado / t_nuevo:.1f}x")
+
+
+def benchmark_fechas(filas: int):
+    """Compara pd.to_datetime sobre toda la columna contra normalizar_fechas (valores únicos)."""
+    rng = np.random.default_rng(42)
+    fechas = pd.date_range("2025-01-01", periods=365).strftime("%Y-%m-%d").to_numpy()
+    serie = pd.Series(fechas[rng.integers(0, len(fechas), filas)])
+    print(f"Conversión de fechas en texto ({filas:,} filas, {len(fechas)} fechas distintas)")
+
+    legado, t_legado = _cronometrar(pd.to_datetime, serie)
+    nuevo, t_nuevo = _cronometrar(normalizar_fechas, serie)
+
+    if not legado.equals(nuevo):
+        raise AssertionError("normalizar_fechas no coincide con pd.to_datetime")
+
+    print(f"  - pd.to_datetime:    {t_legado:.2f} s")
+    print(f"  - normalizar_fechas: {t_nuevo:.2f} s")
+    print(f"  - Aceleración:       {t_legado / t_nuevo:.1f}x")
+
+
+def _df_reviews(filas: int, semilla: int = 42) -> pd.DataFrame:
+    """Reviews sintéticos: la mayoría de reviewers con un solo review, algunos con varios nombres y nulos."""
+    rng = np.random.default_rng(semilla)
+    reviewers = max(filas * 55 // 100, 1)
+    ids = rng.integers(1, 10**9, reviewers, dtype=np.int64)[rng.integers(0, reviewers, filas)]
+    nombres = np.array(["Ana", "Luis", "María", "José", "Carlos", "Sofía", "Lucía", "Pedro"], dtype=object)
+    elegidos = nombres[(ids + (rng.random(filas) < 0.2) * rng.integers(1, 4, filas)) % len(nombres)]
+    elegidos[rng.random(filas) < 0.01] = None
+    return pd.DataFrame({'reviewer_id': ids, 'reviewer_name': elegidos})
+
+
+def _reviewer_legado(df: pd.DataFrame) -> pd.DataFrame:
+    """Implementación original: drop_duplicates antes de contar (todos los conteos valen 1)."""
+    df_reviewer = df[['reviewer_id', 'reviewer_name']].drop_duplicates()
+    name_counts = df_reviewer.groupby(['reviewer_id', 'reviewer_name']).size().reset_index(name='count')
+    most_common_names = (
+        name_counts.sort_values(['reviewer_id', 'count'], ascending=[True, False])
+        .drop_duplicates(subset=['reviewer_id'], keep='first')
+    )
+    return df_reviewer.drop(columns=['reviewer_name']).merge(
+        most_common_names[['reviewer_id', 'reviewer_name']], on='reviewer_id', how='left')
+
+
+def _reviewer_referencia(df: pd.DataFrame) -> pd.DataFrame:
+    """Resultado esperado calculado de forma directa (conteo, orden y merge)."""
+    conteos = df.groupby(['reviewer_id', 'reviewer_name']).size().reset_index(name='count')
+    modal = (
+        conteos.sort_values(['reviewer_id', 'count', 'reviewer_name'], ascending=[True, False, True])
+        .drop_duplicates(subset=['reviewer_id'])
+    )
+    ids = df[['reviewer_id']].drop_duplicates()
+    return ids.merge(modal[['reviewer_id', 'reviewer_name']], on='reviewer_id', how='left').reset_index(drop=True)
+
+
+def benchmark_reviewer(filas: int):
+    """Compara la dimensión reviewer original, la referencia correcta y _dimension_reviewer."""
+    df = _df_reviews(filas)
+    print(f"Dimensión reviewer ({filas:,} reviews, {df['reviewer_id'].nunique():,} reviewers)")
+
+    legado, t_legado = _cronometrar(_reviewer_legado, df)
+    referencia, t_referencia = _cronometrar(_reviewer_referencia, df)
+    nuevo, t_nuevo = _cronometrar(_dimension_reviewer, df['reviewer_id'], df['reviewer_name'])
+
+    esperado = referencia.astype(object).where(referencia.notna(), None).values.tolist()
+    obtenido = nuevo.astype(object).where(nuevo.notna(), None).values.tolist()
+    if esperado != obtenido:
+        raise AssertionError("_dimension_reviewer no coincide con la referencia")
+
+    print(f"  - Original (con IDs repetidos: {len(legado) - legado['reviewer_id'].nunique():,}): {t_legado:.2f} s")
+    print(f"  - Referencia (orden + merge): {t_referencia:.2f} s")
+    print(f"  - Agregación por hash:        {t_nuevo:.2f} s")
+    print(f"  - Aceleración vs original:    {t_legado / t_nuevo:.1f}x")
+
+
+def _ejecutar_suite(colecciones: dict, log: Logs) -> list:
+    """
+    Una pasada de la suite sobre copias de las colecciones: compactación de
+    tipos (como en la extracción), transformación y conversión de
+    cada tabla a parámetros de executemany y a archivo de staging.
+
+    Returns:
+        list: Las mediciones de la pasada
+    """
+    metricas.reiniciar()
+    extraidas = {}
+    for coleccion, df in colecciones.items():
+        df = df.copy()
+        with metricas.medir(f"extraccion.tipos.{coleccion}", len(df)):
+            extraidas[coleccion] = optimizar_tipos(df, coleccion, log, detalle=False)
+
+    # Los pasos 4.x se miden dentro de la transformación
+    tablas = transformacion_df(extraidas["Listings"], extraidas["Reviews"], extraidas["Calendar"], log)
+    del extraidas
+
+    directorio = tempfile.mkdtemp()
+    for nombre, df in zip(TABLAS_TRANSFORMADAS, tablas):
+        with metricas.medir(f"carga.{nombre}.conversion", len(df)) as paso:
+            paso.filas_salida = len(_preparar_filas(df))
+        ruta = os.path.join(directorio, f"{nombre}.dat")
+        with metricas.medir(f"carga.{nombre}.staging", len(df)) as paso:
+            paso.filas_salida = _escribir_staging(df, ruta)
+        os.remove(ruta)
+    os.rmdir(directorio)
+    return metricas.mediciones()
+
+
+def _mejores(pasadas: list) -> list:
+    """Por cada paso, la medición más rápida de las repeticiones (en el orden de la primera pasada)."""
+    mejores = {}
+    for registros in pasadas:
+        for registro in registros:
+            actual = mejores.get(registro["nombre"])
+            if actual is None or registro["segundos"] < actual["segundos"]:
+                mejores[registro["nombre"]] = registro
+    return list(mejores.values())
+
+
+def benchmark_suite(escala: str, repeticiones: int, guardar_base: bool, semilla: int = 42,
+    umbral: float = metricas.UMBRAL_REGRESION, segundos_minimos: float = SEGUNDOS_MINIMOS_SUITE) -> bool:
+    """
+    Mide cada paso de la transformación y la conversión de filas de la carga
+    sobre datos generados, y compara contra la base guardada de la escala.
+
+    Returns:
+        bool: False si algún paso tiene una regresión respecto de la base
+    """
+    filas = leer_escala(escala)
+    etiqueta = escala.lower() if escala.lower() in ESCALAS else str(filas)
+
+    inicio = time.perf_counter()
+    colecciones = generar_colecciones(filas, semilla)
+    tamanos = ", ".join(f"{nombre}: {len(df):,}" for nombre, df in colecciones.items())
+    print(f"Suite de benchmarks, escala {etiqueta} ({tamanos}; generado en {time.perf_counter() - inicio:.2f} s)")
+
+    log = Logs(log_dir=tempfile.mkdtemp(), script_name="benchmark", consola=False)
+    pasadas = []
+    for repeticion in range(repeticiones):
+        inicio = time.perf_counter()
+        pasadas.append(_ejecutar_suite(colecciones, log))
+        print(f"  - Repetición {repeticion + 1}/{repeticiones}: {time.perf_counter() - inicio:.2f} s")
+    log.close()
+    registros = _mejores(pasadas)
+
+    datos = {"escala": filas, "semilla": semilla, "repeticiones": repeticiones,
+        "rss_pico_mb": max((r["rss_pico_mb"] or 0) for r in registros),
+        "entorno": {"python": platform.python_version(), "pandas": pd.__version__, "numpy": np.__version__,
+            "plataforma": platform.platform(), "cpus": os.cpu_count()}}
+    os.makedirs(DIRECTORIO_BENCHMARKS, exist_ok=True)
+    ruta_ultimo, _ = metricas.guardar_reporte(os.path.join(DIRECTORIO_BENCHMARKS, f"ultimo_{etiqueta}"), datos, registros)
+
+    with pd.option_context("display.max_rows", None, "display.max_columns", None, "display.width", 200):
+        print(pd.DataFrame(registros).set_index("nombre")[["segundos", "filas_entrada", "filas_salida",
+            "filas_por_segundo"]])
+
+    ruta_base = os.path.join(DIRECTORIO_BENCHMARKS, f"base_{etiqueta}")
+    if guardar_base or not os.path.exists(f"{ruta_base}.json"):
+        metricas.guardar_reporte(ruta_base, datos, registros)
+        print(f"\nBase guardada en {ruta_base}.json")
+        return True
+
+    with open(f"{ruta_base}.json", encoding="utf-8") as f:
+        base = json.load(f)
+    if base.get("entorno") != datos["entorno"]:
+        print(f"\n⚠️  La base se midió en otro entorno: {base.get('entorno')}")
+
+    # El pico de RSS es del proceso y solo crece: se compara una vez para toda la suite, no por paso
+    comparacion = metricas.comparar_reportes(f"{ruta_base}.json", ruta_ultimo, umbral, segundos_minimos, memoria=False)
+    with pd.option_context("display.max_rows", None, "display.max_columns", None, "display.width", 200):
+        print(comparacion[["segundos_base", "segundos_nuevo", "variacion_tiempo", "regresion"]].round(3))
+    print(f"\nPico de memoria: {base.get('rss_pico_mb', 0):,.0f} MB en la base, {datos['rss_pico_mb']:,.0f} MB ahora")
+
+    # Con la misma escala y semilla los datos son idénticos: otras filas de salida = otro resultado
+    distintas = comparacion.index[comparacion["filas_salida_base"].notna() & comparacion["filas_salida_nuevo"].notna()
+        & (comparacion["filas_salida_base"] != comparacion["filas_salida_nuevo"])].tolist()
+    if distintas:
+        print(f"\n⚠️  Pasos con filas de salida distintas a la base: {', '.join(distintas)}")
+
+    regresiones = comparacion.index[comparacion["regresion"]].tolist()
+    if base.get("rss_pico_mb") and datos["rss_pico_mb"] > base["rss_pico_mb"] * (1 + umbral):
+        regresiones.append("pico de memoria")
+    if regresiones:
+        print(f"\n❌ {len(regresiones)} regresiones: {', '.join(regresiones)}")
+        return False
+    print("\n✅ Sin regresiones respecto de la base")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks del ETL Airbnb")
+    parser.add_argument("benchmark", choices=["conversion", "fechas", "reviewer", "suite"])
+    parser.add_argument("--filas", type=int, default=1_000_000)
+    parser.add_argument("--escala", default="1m", help=f"suite: filas de Calendar ({', '.join(ESCALAS)} o un número)")
+    parser.add_argument("--repeticiones", type=int, default=3, help="suite: se guarda el mejor tiempo de cada paso")
+    parser.add_argument("--guardar-base", action="store_true", help="suite: reemplazar la base de la escala")
+    parser.add_argument("--umbral", type=float, default=metricas.UMBRAL_REGRESION,
+        help="suite: aumento relativo que cuenta como regresión")
+    args = parser.parse_args()
+
+    if args.benchmark == "conversion":
+        benchmark_conversion(args.filas)
+    elif args.benchmark == "fechas":
+        benchmark_fechas(args.filas)
+    elif args.benchmark == "reviewer":
+        benchmark_reviewer(args.filas)
+    elif args.benchmark == "suite":
+        if not benchmark_suite(args.escala, args.repeticiones, args.guardar_base, umbral=args.umbral):
+            sys.exit(1)
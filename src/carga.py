@@ -1,22 +1,123 @@
+import json
+import os
+import queue
+import re
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 import pandas as pd
 import pyodbc
 import numpy as np
 from logs import Logs
+from metricas import medir
 
-__all__ = ['cargar_datos']
+__all__ = ['cargar_datos', 'cargar_por_chunks', 'listings_cargados', 'iniciar_carga_diferida',
+    'terminar_carga_diferida']
+
+# Tamaño de los lotes de inserción: se confirma (commit) cada lote por separado
+FILAS_POR_LOTE = 50_000
+BYTES_POR_LOTE = 64 * 1024**2
+
+# Largo máximo de NVARCHAR(n); por encima se enlaza como NVARCHAR(MAX)
+MAX_NVARCHAR = 4000
+
+# Tipos enteros de menor a mayor rango y dígitos que ocupan en un DECIMAL
+TIPOS_ENTEROS = ["BIT", "TINYINT", "SMALLINT", "INT", "BIGINT"]
+DIGITOS_ENTEROS = {"BIT": 1, "TINYINT": 3, "SMALLINT": 5, "INT": 10, "BIGINT": 19}
+
+# Datos de conexión a SQL Server (también los usa bcp)
+SERVIDOR = "DESKTOP-Q68QGU3\\JUSERVER"
+BASE_DATOS = "AirbnbMexico"
+USUARIO = "Universidad"
+CONTRASENA = "itm2025*"
+
+# Motor de carga por tabla: 'executemany' (defecto), 'bulk_insert' o 'bcp'
+MOTORES_CARGA = {
+    "calendar": "bulk_insert",
+    "calendar_ranges": "bulk_insert",
+    "reviews": "bulk_insert",
+}
+
+# Claves primarias naturales de las tablas (se declaran si los datos las respetan)
+CLAVES_PRIMARIAS = {
+    "host": ["host_id"],
+    "listings": ["id"],
+    "reviewer": ["reviewer_id"],
+    "amenities": ["amenities_id"],
+    "calendar_ranges": ["listing_id", "start_date"],
+}
+
+# Archivo opcional con ajustes manuales del esquema por tabla
+ARCHIVO_ESQUEMA = "esquema_tablas.json"
+
+# Eliminar y recrear las tablas existentes para aplicar el esquema inferido
+RECREAR_TABLAS = False
+
+# Claves con las que el modo incremental hace MERGE de cada tabla. Las tablas
+# que no están aquí (verification, amenities, amenities_listings) usan IDs que
+# se regeneran en cada transformación y solo se actualizan con una carga completa.
+CLAVES_MERGE = {
+    "host": ["host_id"],
+    "reviewer": ["reviewer_id"],
+    "listings": ["id"],
+    "reviews": ["id"],
+    "calendar": ["listing_id", "date"],
+}
+
+# Deshabilitar índices/FKs durante la carga y cargar con TABLOCK. BULK INSERT y
+# bcp con TABLOCK pueden registrarse de forma mínima (recuperación SIMPLE o
+# BULK_LOGGED); el INSERT parametrizado de executemany se registra completo igual.
+CARGA_DIFERIDA = True
+
+# FKs eliminadas e índices deshabilitados que falta restaurar. Se escribe antes
+# de tocar ningún objeto y se borra al terminar la fase 3; si una ejecución se
+# interrumpe, la siguiente lo restaura antes de su propia fase 1.
+ARCHIVO_CARGA_DIFERIDA = "carga_diferida_pendiente.json"
+
+# Tablas padre de cada tabla: una tabla solo se carga cuando todas sus padres
+# se cargaron con éxito
+DEPENDENCIAS = {
+    "host": [],
+    "verification": ["host"],
+    "amenities": [],
+    "reviewer": [],
+    "listings": ["host"],
+    "amenities_listings": ["listings", "amenities"],
+    "reviews": ["listings", "reviewer"],
+    "calendar": ["listings"],
+    "calendar_ranges": ["listings"],
+}
+
+# Vista que expande calendar_ranges a una fila por día (mismas columnas que calendar)
+VISTA_CALENDAR = "vw_calendar"
+
+# Conexiones simultáneas a SQL Server para cargar tablas independientes (1 = secuencial)
+CONEXIONES_CARGA = 3
+
+# Carpeta de los archivos de staging para BULK INSERT / bcp. Para BULK INSERT
+# la ruta debe ser visible desde el servidor; si no es la misma máquina, indicar
+# en DIRECTORIO_STAGING_SERVIDOR cómo ve el servidor esa carpeta (ej. un recurso UNC)
+DIRECTORIO_STAGING = "staging"
+DIRECTORIO_STAGING_SERVIDOR = None
+CONSERVAR_STAGING = False
+
+# Terminadores del archivo de staging (caracteres de control que no aparecen en los datos)
+SEPARADOR_CAMPO = "\x1f"
+SEPARADOR_FILA = "\x1e"
 
 def _conectar_sql(log: Logs):
     try:
         log.info("Intentando conectar a SQL Server...")
-        log.info("Servidor: DESKTOP-Q68QGU3\\JUSERVER")
-        log.info("Base de datos: AirbnbMexico")
+        log.info(f"Servidor: {SERVIDOR}")
+        log.info(f"Base de datos: {BASE_DATOS}")
         
         conexion = pyodbc.connect(
             "DRIVER={ODBC Driver 17 for SQL Server};"
-            "SERVER=DESKTOP-Q68QGU3\\JUSERVER;"
-            "DATABASE=AirbnbMexico;"
-            "UID=Universidad;"
-            "PWD=itm2025*;"
+            f"SERVER={SERVIDOR};"
+            f"DATABASE={BASE_DATOS};"
+            f"UID={USUARIO};"
+            f"PWD={CONTRASENA};"
         )
         
         log.info("✅ Conexión exitosa a SQL Server")
@@ -30,15 +131,23 @@ def _conectar_sql(log: Logs):
         raise Exception(f"❌ Error de conexión: {e}")
 
 
-def _cargar_data_frame(conexion, df: pd.DataFrame, table_name: str, log: Logs, i: int, totalTablas: int):
+def _cargar_data_frame(conexion, df: pd.DataFrame, table_name: str, log: Logs, i: int, totalTablas: int,
+    motor: str = "executemany", recrear: bool = False, tablock: bool = False, incremental: bool = False):
     """
     Carga un DataFrame en una tabla de SQL Server.
     
+    En modo incremental, si la tabla ya existe, las filas se combinan con
+    MERGE (ver _merge_data) en lugar de vaciar la tabla y volver a cargarla.
+    
     Args:
         conexion: Objeto de conexión a SQL Server
         df: DataFrame a cargar
         table_name: Nombre de la tabla destino
         log: Instancia de la clase Logs para registro
+        motor: 'executemany', 'bulk_insert' o 'bcp'
+        recrear: Eliminar y volver a crear la tabla si ya existe
+        tablock: Insertar con bloqueo de tabla (executemany)
+        incremental: Combinar con MERGE las filas de una tabla existente
     """
     try:
         log.separator()
@@ -46,9 +155,25 @@ def _cargar_data_frame(conexion, df: pd.DataFrame, table_name: str, log: Logs, i
         log.info(f"Iniciando carga de tabla: {table_name}")
         log.info(f"Registros a cargar: {len(df):,}")
         log.info(f"Columnas: {df.shape[1]}")
+        log.info(f"Motor de carga: {motor}")
+        
+        if incremental and _existe_tabla(conexion, table_name):
+            with medir(f"carga.{table_name}.merge", len(df)) as medicion:
+                _merge_data(conexion, df, table_name, log, motor)
+                medicion.filas_salida = len(df)
+            log.info(f"✅ Tabla {table_name} actualizada exitosamente")
+            return True
         
-        _crear_tabla(conexion, df, table_name, log)
-        _insertar_data(conexion, df, table_name, log)
+        with medir(f"carga.{table_name}.creacion"):
+            _crear_tabla(conexion, df, table_name, log, recrear)
+        with medir(f"carga.{table_name}.insercion", len(df)) as medicion:
+            if motor == "executemany":
+                _insertar_data(conexion, df, table_name, log, tablock=tablock)
+            elif motor in ("bulk_insert", "bcp"):
+                _insertar_bulk(conexion, df, table_name, log, motor)
+            else:
+                raise ValueError(f"Motor de carga desconocido: {motor}")
+            medicion.filas_salida = len(df)
         
         log.info(f"✅ Tabla {table_name} cargada exitosamente")
         return True
@@ -57,16 +182,23 @@ def _cargar_data_frame(conexion, df: pd.DataFrame, table_name: str, log: Logs, i
         return False
 
 
-def _crear_tabla(conexion, df: pd.DataFrame, table_name: str, log: Logs):
+def _crear_tabla(conexion, df: pd.DataFrame, table_name: str, log: Logs, recrear: bool = False,
+    esquema: tuple = None):
     """
     Crea una tabla en SQL Server basada en el DataFrame.
-    Si la tabla existe, la limpia.
+    Si la tabla existe, la limpia (o la elimina y la vuelve a crear si `recrear`).
+    Antes de reutilizar una tabla existente se verifica que los datos quepan
+    en su estructura (_motivo_recrear); si no caben, se recrea.
+    
+    Los tipos de las columnas y la clave primaria salen de _inferir_esquema.
     
     Args:
         conexion: Objeto de conexión a SQL Server
         df: DataFrame para definir estructura
         table_name: Nombre de la tabla
         log: Instancia de la clase Logs
+        recrear: Eliminar y volver a crear la tabla si ya existe
+        esquema: (columnas, clave_primaria) ya calculados (None = inferirlos de df)
     """
     try:
         cursor = conexion.cursor()
@@ -74,16 +206,20 @@ def _crear_tabla(conexion, df: pd.DataFrame, table_name: str, log: Logs):
         # Verificar si la tabla existe
         log.info(f"Verificando existencia de tabla [{table_name}]...")
         
-        check_query = f"""
-            IF EXISTS (SELECT 1 FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_NAME = '{table_name}')
-                SELECT 1 AS existe
-            ELSE
-                SELECT 0 AS existe
-        """
-        cursor.execute(check_query)
-        existe = cursor.fetchone()[0]
+        existe = _existe_tabla(conexion, table_name)
+        columnas, clave_primaria = esquema or _inferir_esquema(df, table_name, log)
+        
+        if existe and not recrear:
+            motivo = _motivo_recrear(conexion, df, table_name, columnas)
+            if motivo:
+                log.warning(f"Los datos no caben en la tabla [{table_name}] existente ({motivo}); se recrea")
+                recrear = True
         
-        if existe:
+        if existe and recrear:
+            log.info(f"Tabla [{table_name}] ya existe. Eliminándola para recrear su estructura...")
+            cursor.execute(f"DROP TABLE [{table_name}];")
+            conexion.commit()
+        elif existe:
             log.info(f"Tabla [{table_name}] ya existe. Limpiando datos...")
             cursor.execute(f"TRUNCATE TABLE [{table_name}];")
             conexion.commit()
@@ -93,24 +229,14 @@ def _crear_tabla(conexion, df: pd.DataFrame, table_name: str, log: Logs):
         # Crear la tabla si no existe
         log.info(f"Tabla [{table_name}] no existe. Creando estructura...")
         
-        dtype_map_sqlserver = {
-            'object': 'NVARCHAR(MAX)',
-            'string': 'NVARCHAR(MAX)',
-            'int64': 'BIGINT',
-            'int32': 'INT',
-            'float64': 'DECIMAL(20,7)',
-            'float32': 'DECIMAL(20,7)',
-            'bool': 'BIT',
-            'boolean': 'BIT',
-            'datetime64[ns]': 'DATETIME',
-            'datetime64': 'DATETIME'
-        }
-        
         columns = []
-        for col, dtype in df.dtypes.items():
-            sql_type = dtype_map_sqlserver.get(str(dtype), 'NVARCHAR(MAX)')
-            columns.append(f'[{col}] {sql_type}')
-            log.info(f"  - Columna [{col}]: {sql_type}")
+        for col, sql_type, nullable in columnas:
+            columns.append(f'[{col}] {sql_type} {"NULL" if nullable else "NOT NULL"}')
+            log.info(f"  - Columna [{col}]: {sql_type}{'' if nullable else ' NOT NULL'}")
+        
+        if clave_primaria:
+            columns.append(f'CONSTRAINT [PK_{table_name}] PRIMARY KEY ({", ".join(f"[{c}]" for c in clave_primaria)})')
+            log.info(f"  - Clave primaria: {', '.join(clave_primaria)}")
         
         columns_sql = ",\n  ".join(columns)
         query = f'CREATE TABLE [{table_name}] (\n  {columns_sql}\n);'
@@ -119,7 +245,7 @@ def _crear_tabla(conexion, df: pd.DataFrame, table_name: str, log: Logs):
         conexion.commit()
         
         log.info(f"✅ Tabla [{table_name}] creada correctamente en SQL Server")
-        log.info(f"✅ Total de columnas: {len(columns)}")
+        log.info(f"✅ Total de columnas: {len(columnas)}")
         
     except pyodbc.Error as e:
         log.error(f"Error de SQL al crear tabla [{table_name}]: {e}")
@@ -129,49 +255,783 @@ def _crear_tabla(conexion, df: pd.DataFrame, table_name: str, log: Logs):
         raise
 
 
-def _insertar_data(conexion, df: pd.DataFrame, table_name: str, log: Logs):
+def _existe_tabla(conexion, table_name: str) -> bool:
+    """Indica si la tabla existe en la base de datos."""
+    cursor = conexion.cursor()
+    check_query = f"""
+        IF EXISTS (SELECT 1 FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_NAME = '{table_name}')
+            SELECT 1 AS existe
+        ELSE
+            SELECT 0 AS existe
+    """
+    cursor.execute(check_query)
+    return bool(cursor.fetchone()[0])
+
+
+def _motivo_recrear(conexion, df: pd.DataFrame, table_name: str, columnas: list) -> str:
+    """
+    Compara el esquema requerido con el de la tabla existente
+    (INFORMATION_SCHEMA) para saber si se puede vaciar y reutilizar.
+    
+    Args:
+        conexion: Objeto de conexión a SQL Server
+        df: DataFrame a cargar
+        table_name: Nombre de la tabla existente
+        columnas: [(columna, tipo_sql, admite_nulos)] inferidas para df
+        
+    Returns:
+        str: Por qué los datos no caben en la tabla ('' si caben)
+    """
+    cursor = conexion.cursor()
+    existentes = _columnas_existentes(conexion, table_name)
+    
+    faltantes = [col for col, _, _ in columnas if col not in existentes]
+    if faltantes:
+        return f"faltan las columnas {', '.join(faltantes)}"
+    sobrantes = [col for col in existentes if col not in df.columns]
+    if sobrantes:
+        return f"sobran las columnas {', '.join(sobrantes)}"
+    
+    for col, sql_type, _ in columnas:
+        if not _tipo_admite(existentes[col], sql_type):
+            return f"[{col}] es {_describir_tipo(existentes[col])} y se necesita {sql_type}"
+        if existentes[col][5] == "NO" and df[col].isna().any():
+            return f"[{col}] no admite nulos"
+    
+    cursor.execute(
+        "SELECT k.COLUMN_NAME FROM INFORMATION_SCHEMA.TABLE_CONSTRAINTS t "
+        "JOIN INFORMATION_SCHEMA.KEY_COLUMN_USAGE k "
+        "ON k.CONSTRAINT_NAME = t.CONSTRAINT_NAME AND k.TABLE_NAME = t.TABLE_NAME "
+        "WHERE t.TABLE_NAME = ? AND t.CONSTRAINT_TYPE = 'PRIMARY KEY'",
+        table_name
+    )
+    clave_primaria = [fila[0] for fila in cursor.fetchall()]
+    if clave_primaria and (df[clave_primaria].isna().any().any() or df.duplicated(subset=clave_primaria).any()):
+        return f"nulos o duplicados en la clave primaria {', '.join(clave_primaria)}"
+    
+    return ""
+
+
+def _columnas_existentes(conexion, table_name: str) -> dict:
+    """
+    Columnas de una tabla existente según INFORMATION_SCHEMA.COLUMNS.
+    
+    Returns:
+        dict: {columna: (DATA_TYPE, CHARACTER_MAXIMUM_LENGTH, NUMERIC_PRECISION,
+            NUMERIC_SCALE, DATETIME_PRECISION, IS_NULLABLE)}
+    """
+    cursor = conexion.cursor()
+    cursor.execute(
+        "SELECT COLUMN_NAME, DATA_TYPE, CHARACTER_MAXIMUM_LENGTH, NUMERIC_PRECISION, NUMERIC_SCALE, "
+        "DATETIME_PRECISION, IS_NULLABLE FROM INFORMATION_SCHEMA.COLUMNS WHERE TABLE_NAME = ?",
+        table_name
+    )
+    return {fila[0]: tuple(fila[1:]) for fila in cursor.fetchall()}
+
+
+def _describir_tipo(existente: tuple) -> str:
+    """Tipo SQL de una columna existente (fila de _columnas_existentes), p. ej. 'NVARCHAR(64)'."""
+    tipo, largo, precision, escala, precision_fecha = existente[:5]
+    tipo = tipo.upper()
+    if largo:
+        return f"{tipo}({'MAX' if largo == -1 else largo})"
+    if tipo in ("DECIMAL", "NUMERIC"):
+        return f"{tipo}({precision},{escala})"
+    if tipo == "DATETIME2":
+        return f"{tipo}({precision_fecha})"
+    return tipo
+
+
+def _tipo_admite(existente: tuple, requerido: str) -> bool:
+    """
+    Indica si una columna existente puede guardar los valores para los que
+    se infirió el tipo `requerido`.
+    
+    Args:
+        existente: (DATA_TYPE, CHARACTER_MAXIMUM_LENGTH, NUMERIC_PRECISION,
+            NUMERIC_SCALE, DATETIME_PRECISION, ...) de INFORMATION_SCHEMA.COLUMNS
+        requerido: Tipo SQL inferido, p. ej. 'INT', 'DECIMAL(12,7)', 'NVARCHAR(64)'
+    """
+    tipo, largo, precision, escala, precision_fecha = existente[:5]
+    tipo = tipo.upper()
+    nombre, *argumentos = re.findall(r"\w+", requerido.upper())
+    
+    if nombre in TIPOS_ENTEROS:
+        if tipo in TIPOS_ENTEROS:
+            return TIPOS_ENTEROS.index(tipo) >= TIPOS_ENTEROS.index(nombre)
+        return tipo in ("DECIMAL", "NUMERIC") and precision - escala >= DIGITOS_ENTEROS[nombre]
+    
+    if nombre in ("DECIMAL", "NUMERIC"):
+        p, s = (int(argumentos[0]), int(argumentos[1]) if len(argumentos) > 1 else 0) if argumentos else (18, 0)
+        return tipo in ("DECIMAL", "NUMERIC") and escala >= s and precision - escala >= p - s
+    
+    if nombre in ("NVARCHAR", "NCHAR", "VARCHAR", "CHAR"):
+        # Un texto Unicode no cabe en VARCHAR/CHAR sin perder caracteres
+        if tipo not in ("NVARCHAR", "NCHAR") and not (nombre in ("VARCHAR", "CHAR") and tipo in ("VARCHAR", "CHAR")):
+            return False
+        n = argumentos[0] if argumentos else "1"
+        return largo == -1 or (n != "MAX" and largo >= int(n))
+    
+    if nombre == "DATE":
+        return tipo in ("DATE", "DATETIME2", "DATETIME")
+    
+    if nombre == "DATETIME2":
+        return tipo == "DATETIME2" and precision_fecha >= (int(argumentos[0]) if argumentos else 7)
+    
+    return tipo == nombre
+
+
+def _tipo_ampliado(existente: tuple, requerido: str) -> str:
+    """
+    Tipo que guarda tanto los valores de la columna existente como los del
+    tipo `requerido`: el entero mayor, el DECIMAL con más dígitos enteros y
+    más decimales, el texto más largo (Unicode si alguno lo es) o DATETIME2.
+    
+    Returns:
+        str: Tipo SQL ampliado, o None si los tipos no son compatibles
+    """
+    tipo, largo, precision, escala, precision_fecha = existente[:5]
+    tipo = tipo.upper()
+    nombre, *argumentos = re.findall(r"\w+", requerido.upper())
+    numericos = TIPOS_ENTEROS + ["DECIMAL", "NUMERIC"]
+    textos = ("NVARCHAR", "NCHAR", "VARCHAR", "CHAR")
+    fechas = ("DATE", "DATETIME2", "DATETIME")
+    
+    if tipo in numericos and nombre in numericos:
+        if tipo in TIPOS_ENTEROS and nombre in TIPOS_ENTEROS:
+            return max(tipo, nombre, key=TIPOS_ENTEROS.index)
+        enteros_e, escala_e = (DIGITOS_ENTEROS[tipo], 0) if tipo in TIPOS_ENTEROS else (precision - escala, escala)
+        if nombre in TIPOS_ENTEROS:
+            enteros_r, escala_r = DIGITOS_ENTEROS[nombre], 0
+        else:
+            p, s = (int(argumentos[0]), int(argumentos[1]) if len(argumentos) > 1 else 0) if argumentos else (18, 0)
+            enteros_r, escala_r = p - s, s
+        enteros, decimales = max(enteros_e, enteros_r), max(escala_e, escala_r)
+        return f"DECIMAL({enteros + decimales},{decimales})" if enteros + decimales <= 38 else None
+    
+    if tipo in textos and nombre in textos:
+        unicode = tipo.startswith("N") or nombre.startswith("N")
+        n = argumentos[0] if argumentos else "1"
+        nuevo = -1 if largo == -1 or n == "MAX" else max(largo, int(n))
+        maximo = MAX_NVARCHAR if unicode else 8000
+        return f"{'NVARCHAR' if unicode else 'VARCHAR'}({'MAX' if nuevo == -1 or nuevo > maximo else nuevo})"
+    
+    if tipo in fechas and nombre in fechas:
+        requerida = int(argumentos[0]) if nombre == "DATETIME2" and argumentos else (7 if nombre == "DATETIME2" else 0)
+        return f"DATETIME2({max(precision_fecha or 0, requerida)})"
+    
+    return None
+
+
+def _ampliar_tabla(conexion, df: pd.DataFrame, table_name: str, columnas: list, log: Logs):
+    """
+    Prepara una tabla existente para recibir las filas de `df` con MERGE.
+    
+    Los tipos de la tabla se ajustaron a los datos de una carga anterior;
+    las columnas donde los datos nuevos no caben (_tipo_admite) se amplían
+    con ALTER COLUMN (_tipo_ampliado), las que ahora traen nulos pasan a
+    admitirlos y las columnas nuevas se agregan.
+    
+    Args:
+        conexion: Objeto de conexión a SQL Server
+        df: Filas nuevas o modificadas
+        table_name: Nombre de la tabla destino
+        columnas: [(columna, tipo_sql, admite_nulos)] inferidas para df
+        log: Instancia de la clase Logs
+        
+    Raises:
+        Exception: Si un tipo no se puede ampliar (requiere una carga completa)
+    """
+    existentes = _columnas_existentes(conexion, table_name)
+    cambios = []
+    
+    for col, sql_type, _ in columnas:
+        nulos = bool(df[col].isna().any())
+        if col not in existentes:
+            cambios.append(f"ADD [{col}] {sql_type} NULL")
+            continue
+        
+        existente = existentes[col]
+        admite_nulos = existente[5] == "YES" or nulos
+        if _tipo_admite(existente, sql_type):
+            if admite_nulos == (existente[5] == "YES"):
+                continue
+            tipo = _describir_tipo(existente)
+        else:
+            tipo = _tipo_ampliado(existente, sql_type)
+            if tipo is None:
+                log.error(f"[{col}] de [{table_name}] es {_describir_tipo(existente)} y los datos nuevos "
+                    f"necesitan {sql_type}")
+                raise Exception(f"❌ La tabla '{table_name}' no admite los datos nuevos de '{col}': "
+                    "se requiere una carga completa (INCREMENTAL = False)")
+        cambios.append(f"ALTER COLUMN [{col}] {tipo} {'NULL' if admite_nulos else 'NOT NULL'}")
+    
+    if not cambios:
+        return
+    
+    cursor = conexion.cursor()
+    for cambio in cambios:
+        log.warning(f"Ampliando [{table_name}] para los datos nuevos: {cambio}")
+        cursor.execute(f"ALTER TABLE [{table_name}] {cambio};")
+    conexion.commit()
+
+
+def _merge_data(conexion, df: pd.DataFrame, table_name: str, log: Logs, motor: str = "executemany"):
+    """
+    Combina las filas del DataFrame con una tabla existente (upsert).
+    
+    Primero la tabla destino se amplía si los datos nuevos no caben en sus
+    tipos (_ampliar_tabla). Las filas se cargan en una tabla de staging
+    [stg_<tabla>] con el esquema inferido de `df` (no el de la destino, que
+    puede ser más angosto), usando el motor de carga de la tabla (una tabla
+    permanente, no #temporal, para que bcp también pueda verla). Luego un
+    único MERGE por CLAVES_MERGE actualiza las filas existentes e inserta las
+    nuevas; la staging se elimina al terminar.
+    
+    Args:
+        conexion: Objeto de conexión a SQL Server
+        df: Filas nuevas o modificadas
+        table_name: Nombre de la tabla destino
+        log: Instancia de la clase Logs
+        motor: Motor de carga para llenar la staging
+    """
+    claves = CLAVES_MERGE[table_name]
+    staging = f"stg_{table_name}"
+    cursor = conexion.cursor()
+    
+    if df.empty:
+        log.info(f"Sin filas nuevas o modificadas para [{table_name}]")
+        return
+    
+    filas = len(df)
+    df = df.drop_duplicates(subset=claves, keep="last")
+    if len(df) < filas:
+        log.warning(f"Se descartaron {filas - len(df):,} filas con clave repetida ({', '.join(claves)})")
+    
+    try:
+        columnas_df, _ = _inferir_esquema(df, table_name, log)
+        _ampliar_tabla(conexion, df, table_name, columnas_df, log)
+        
+        log.info(f"Modo incremental: cargando {len(df):,} filas en [{staging}] para MERGE en [{table_name}]")
+        _crear_tabla(conexion, df, staging, log, recrear=True,
+            esquema=([(col, sql_type, True) for col, sql_type, _ in columnas_df], []))
+        
+        if motor == "executemany":
+            _insertar_data(conexion, df, staging, log)
+        else:
+            _insertar_bulk(conexion, df, staging, log, motor)
+        
+        columnas = list(df.columns)
+        actualizar = [c for c in columnas if c not in claves]
+        sql = (
+            f"MERGE [{table_name}] WITH (HOLDLOCK) AS destino\n"
+            f"USING [{staging}] AS origen\n"
+            f"ON {' AND '.join(f'destino.[{c}] = origen.[{c}]' for c in claves)}\n"
+        )
+        if actualizar:
+            sql += f"WHEN MATCHED THEN UPDATE SET {', '.join(f'destino.[{c}] = origen.[{c}]' for c in actualizar)}\n"
+        sql += (
+            f"WHEN NOT MATCHED BY TARGET THEN INSERT ({', '.join(f'[{c}]' for c in columnas)})\n"
+            f"VALUES ({', '.join(f'origen.[{c}]' for c in columnas)});"
+        )
+        
+        inicio = time.perf_counter()
+        cursor.execute(sql)
+        afectadas = cursor.rowcount
+        conexion.commit()
+        log.info(f"✅ MERGE en [{table_name}]: {afectadas:,} filas insertadas o actualizadas")
+        log.info(f"   - Tiempo de MERGE: {time.perf_counter() - inicio:.2f} s")
+        
+    except pyodbc.Error as e:
+        conexion.rollback()
+        log.error(f"Error de SQL en MERGE de [{table_name}]: {e}")
+        raise
+    finally:
+        cursor.execute(f"IF OBJECT_ID('{staging}', 'U') IS NOT NULL DROP TABLE [{staging}];")
+        conexion.commit()
+
+
+def listings_cargados(log: Logs) -> pd.Series:
+    """
+    IDs de los listings que ya están en SQL Server.
+    
+    El modo incremental los usa para validar reviews y calendar nuevos de
+    listings que no cambiaron desde la última carga.
+    """
+    conexion = _conectar_sql(log)
+    try:
+        if not _existe_tabla(conexion, "listings"):
+            return pd.Series([], name="id", dtype="int64")
+        cursor = conexion.cursor()
+        cursor.execute("SELECT [id] FROM [listings];")
+        ids = pd.Series([fila[0] for fila in cursor.fetchall()], name="id", dtype="int64")
+        log.info(f"Listings ya cargados en SQL Server: {len(ids):,}")
+        return ids
+    finally:
+        conexion.close()
+
+
+def _leer_esquema_override() -> dict:
+    """
+    Lee el archivo de ajustes manuales de esquema, si existe.
+    
+    Formato: {"tabla": {"columnas": {"columna": "TIPO SQL"}, "clave_primaria": ["col"]}}
+    """
+    if not os.path.exists(ARCHIVO_ESQUEMA):
+        return {}
+    with open(ARCHIVO_ESQUEMA, encoding="utf-8") as archivo:
+        return json.load(archivo)
+
+
+def _largo_columna(largo: int, maximo: int) -> str:
+    """
+    Largo a declarar para un texto: la siguiente potencia de 2 del largo real,
+    para dejar margen a cargas futuras; MAX si supera el máximo del tipo.
+    """
+    if largo > maximo:
+        return "MAX"
+    return str(min(maximo, 1 << max(largo - 1, 0).bit_length()))
+
+
+def _tipo_entero(minimo, maximo) -> str:
+    """Tipo entero más pequeño que contiene el rango [minimo, maximo]."""
+    if -2**15 <= minimo and maximo < 2**15:
+        return "SMALLINT"
+    if -2**31 <= minimo and maximo < 2**31:
+        return "INT"
+    return "BIGINT"
+
+
+def _es_fecha(serie: pd.Series) -> bool:
+    """Indica si una columna datetime64 solo tiene fechas sin hora (se carga como DATE)."""
+    valores = serie.dropna()
+    return bool((valores == valores.dt.normalize()).all())
+
+
+def _inferir_tipo_sql(serie: pd.Series) -> str:
+    """
+    Calcula el tipo SQL Server ajustado a los valores reales de una columna.
+    
+    Enteros según su rango, decimales con la precisión que necesita su parte
+    entera, fechas sin hora como DATE (también los textos 'YYYY-MM-DD') y
+    textos como NVARCHAR con el largo medido en unidades UTF-16.
+    
+    Los float son siempre DECIMAL, aunque solo tengan valores enteros (el
+    staging los escribe con "%.7f", que no entra en una columna entera).
+    """
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        serie = serie.astype(serie.dtype.categories.dtype)
+    valores = serie.dropna()
+    dtype = serie.dtype
+    
+    if pd.api.types.is_bool_dtype(dtype):
+        return "BIT"
+    
+    if pd.api.types.is_integer_dtype(dtype):
+        if valores.empty:
+            return "INT"
+        return _tipo_entero(int(valores.min()), int(valores.max()))
+    
+    if pd.api.types.is_float_dtype(dtype):
+        if valores.empty:
+            return "DECIMAL(20,7)"
+        digitos = len(str(int(valores.abs().max())))
+        return f"DECIMAL({min(digitos + 7, 38)},7)"
+    
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return "DATE" if _es_fecha(valores) else "DATETIME2(0)"
+    
+    if pd.api.types.infer_dtype(valores, skipna=True) in ('string', 'empty'):
+        if valores.empty:
+            return "NVARCHAR(1)"
+        if valores.str.fullmatch(r"\d{4}-\d{2}-\d{2}").all():
+            return "DATE"
+        return f"NVARCHAR({_largo_columna(_largo_utf16(valores), MAX_NVARCHAR)})"
+    
+    return "NVARCHAR(MAX)"
+
+
+def _inferir_esquema(df: pd.DataFrame, table_name: str, log: Logs):
+    """
+    Infiere el esquema de la tabla midiendo los datos del DataFrame.
+    
+    Para cada columna calcula el tipo ajustado (_inferir_tipo_sql) y si admite
+    nulos. La clave primaria se toma de CLAVES_PRIMARIAS y solo se declara si
+    los datos son únicos y sin nulos. El archivo ARCHIVO_ESQUEMA puede
+    reemplazar el tipo de cualquier columna y la clave primaria de la tabla.
+    
+    Returns:
+        tuple: ([(columna, tipo_sql, admite_nulos)], [columnas de la clave primaria])
+    """
+    override = _leer_esquema_override().get(table_name, {})
+    tipos_override = override.get("columnas", {})
+    clave_primaria = override.get("clave_primaria", CLAVES_PRIMARIAS.get(table_name, []))
+    
+    if clave_primaria:
+        if not set(clave_primaria) <= set(df.columns):
+            log.warning(f"Clave primaria {clave_primaria} no existe en [{table_name}]; se omite")
+            clave_primaria = []
+        elif df[clave_primaria].isna().any().any() or df.duplicated(subset=clave_primaria).any():
+            log.warning(f"Clave primaria {clave_primaria} tiene nulos o duplicados en [{table_name}]; se omite")
+            clave_primaria = []
+    
+    columnas = []
+    for col in df.columns:
+        sql_type = tipos_override.get(col) or _inferir_tipo_sql(df[col])
+        nullable = col not in clave_primaria and bool(df[col].isna().any())
+        columnas.append((col, sql_type, nullable))
+    
+    return columnas, clave_primaria
+
+
+def _tamanos_parametros(df: pd.DataFrame) -> list:
+    """
+    Calcula el tipo y tamaño de cada parámetro para cursor.setinputsizes.
+    
+    Con fast_executemany pyodbc reserva un buffer por columna del tamaño
+    declarado; declarar el largo real de los textos evita que se enlacen
+    como NVARCHAR(MAX).
+    
+    Args:
+        df: DataFrame a insertar
+        
+    Returns:
+        list: Una tupla (tipo_sql, tamaño, decimales) por columna, o None si
+            el tipo se deja a criterio de pyodbc
+    """
+    tamanos = []
+    for col in df.columns:
+        serie = df[col]
+        dtype = serie.dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            serie = pd.Series(dtype.categories)
+            dtype = serie.dtype
+        
+        if pd.api.types.is_bool_dtype(dtype):
+            tamanos.append((pyodbc.SQL_BIT, 0, 0))
+        elif pd.api.types.is_integer_dtype(dtype):
+            tamanos.append((pyodbc.SQL_BIGINT, 0, 0))
+        elif pd.api.types.is_float_dtype(dtype):
+            tamanos.append((pyodbc.SQL_DOUBLE, 0, 0))
+        elif pd.api.types.is_datetime64_any_dtype(dtype) and _es_fecha(serie):
+            tamanos.append((pyodbc.SQL_TYPE_DATE, 10, 0))
+        elif pd.api.types.is_datetime64_any_dtype(dtype):
+            tamanos.append((pyodbc.SQL_TYPE_TIMESTAMP, 0, 0))
+        elif pd.api.types.infer_dtype(serie, skipna=True) in ('string', 'empty'):
+            largo = max(_largo_utf16(serie), 1)
+            tamanos.append((pyodbc.SQL_WVARCHAR, largo if largo <= MAX_NVARCHAR else 0, 0))
+        else:
+            tamanos.append(None)
+    return tamanos
+
+
+def _largo_utf16(serie: pd.Series) -> int:
+    """
+    Largo máximo de los textos de una columna en unidades UTF-16, que es lo
+    que cuentan NVARCHAR(n) y los buffers SQL_WVARCHAR: los caracteres fuera
+    del plano básico (emoji) ocupan dos. Equivale a
+    len(s.encode('utf-16-le')) // 2, sin codificar cada texto.
+    """
+    valores = serie.dropna()
+    if valores.empty:
+        return 0
+    return int((valores.str.len() + valores.str.count("[\U00010000-\U0010FFFF]")).max())
+
+
+def _filas_por_lote(tamanos: list, filas_por_lote: int, bytes_por_lote: int) -> int:
+    """
+    Ajusta la cantidad de filas por lote para no superar el presupuesto de bytes.
+    
+    El tamaño de fila se estima con los tamaños declarados de los parámetros
+    (2 bytes por carácter en NVARCHAR, 8 bytes para los demás tipos).
+    """
+    bytes_fila = 0
+    for tamano in tamanos:
+        if tamano is not None and tamano[0] == pyodbc.SQL_WVARCHAR:
+            bytes_fila += 2 * (tamano[1] or MAX_NVARCHAR)
+        else:
+            bytes_fila += 8
+    return max(1, min(filas_por_lote, bytes_por_lote // max(bytes_fila, 1)))
+
+
+def _insertar_data(conexion, df: pd.DataFrame, table_name: str, log: Logs,
+    filas_por_lote: int = FILAS_POR_LOTE, bytes_por_lote: int = BYTES_POR_LOTE,
+    fast_executemany: bool = True, tablock: bool = False):
     """
     Inserta los datos del DataFrame en la tabla de SQL Server.
     
+    Los datos se envían en lotes acotados por filas y por bytes, y cada lote
+    se confirma por separado, de modo que la memoria del cliente y el log de
+    transacciones no crecen con el tamaño de la tabla. Con fast_executemany
+    cada lote viaja como un arreglo de parámetros en un solo round-trip.
+    
     Args:
         conexion: Objeto de conexión a SQL Server
         df: DataFrame con los datos a insertar
         table_name: Nombre de la tabla destino
         log: Instancia de la clase Logs
+        filas_por_lote: Máximo de filas por lote
+        bytes_por_lote: Máximo aproximado de bytes de parámetros por lote
+        fast_executemany: Usar el envío en bloque de parámetros de pyodbc
+        tablock: Insertar con WITH (TABLOCK): un bloqueo de tabla en lugar de
+            uno por fila (un INSERT ... VALUES parametrizado no se registra
+            de forma mínima aunque lleve TABLOCK)
     """
+    insertadas = 0
+    
     try:
         cursor = conexion.cursor()
+        cursor.fast_executemany = fast_executemany
         
         log.info(f"Preparando datos para inserción en [{table_name}]...")
         
-        # Convertir valores de pandas/numpy a tipos nativos de Python
-        df = df.apply(lambda col: col.map(_to_python_value))
-        
         cols = ", ".join(f"[{c}]" for c in df.columns)
         placeholders = ", ".join("?" for _ in df.columns)
-        sql = f"INSERT INTO [{table_name}] ({cols}) VALUES ({placeholders})"
+        sugerencia = " WITH (TABLOCK)" if tablock else ""
+        sql = f"INSERT INTO [{table_name}]{sugerencia} ({cols}) VALUES ({placeholders})"
         
-        # Convertir DataFrame a lista de tuplas
-        log.info(f"Convirtiendo {len(df):,} filas a formato SQL...")
-        data = [tuple(_to_python_value(x) for x in row) for row in df.to_numpy()]
-        #data = [tuple(None if pd.isna(x) else x for x in row) for row in df.to_numpy()]
+        tamanos = _tamanos_parametros(df)
+        lote = _filas_por_lote(tamanos, filas_por_lote, bytes_por_lote)
+        total_lotes = -(-len(df) // lote)
         
-        log.info(f"Insertando datos en [{table_name}]...")
-        cursor.executemany(sql, data)
-        conexion.commit()
+        log.info(f"Insertando datos en [{table_name}] en {total_lotes:,} lotes de hasta {lote:,} filas"
+            f"{' (fast_executemany)' if fast_executemany else ''}...")
+        inicio = time.perf_counter()
         
-        log.info(f"✅ {len(df):,} filas insertadas en [{table_name}] correctamente")
+        for numero, desde in enumerate(range(0, len(df), lote), 1):
+            # Convertir solo el lote actual a tuplas con tipos nativos de Python
+            data = _preparar_filas(df.iloc[desde:desde + lote])
+            if fast_executemany:
+                cursor.setinputsizes(tamanos)
+            cursor.executemany(sql, data)
+            conexion.commit()
+            insertadas += len(data)
+            
+            if numero % 10 == 0 and numero < total_lotes:
+                log.info(f"  - Lote {numero:,}/{total_lotes:,}: {insertadas:,} filas confirmadas")
+        
+        segundos = time.perf_counter() - inicio
+        log.info(f"✅ {insertadas:,} filas insertadas en [{table_name}] correctamente")
+        log.info(f"   - Tiempo de inserción: {segundos:.2f} s ({insertadas / max(segundos, 1e-9):,.0f} filas/s)")
         
     except pyodbc.Error as e:
         log.error(f"Error de SQL al insertar datos en [{table_name}]: {e}")
         conexion.rollback()
-        log.warning(f"Se hizo rollback de la transacción")
+        log.warning(f"Se hizo rollback del lote en curso ({insertadas:,} filas ya confirmadas)")
         raise
     except Exception as e:
         log.error(f"Error inesperado al insertar datos en [{table_name}]: {e}")
         conexion.rollback()
-        log.warning(f"Se hizo rollback de la transacción")
+        log.warning(f"Se hizo rollback del lote en curso ({insertadas:,} filas ya confirmadas)")
+        raise
+
+
+def _textos_columna(serie: pd.Series) -> pd.Series:
+    """
+    Convierte una columna al texto que se escribe en el archivo de staging.
+    
+    Los nulos quedan como campo vacío, que BULK INSERT y bcp cargan como
+    NULL; los textos vacíos se escriben como un único carácter NUL, que es
+    como el formato de caracteres de bcp representa la cadena vacía, para que
+    ambos motores carguen '' igual que el INSERT parametrizado. Los booleanos
+    quedan como 1/0, los decimales sin notación científica y las fechas en
+    formato ISO. Los textos se limpian de NUL y de los caracteres usados como
+    terminadores.
+    """
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        serie = serie.astype(serie.dtype.categories.dtype)
+    nulos = serie.isna()
+    dtype = serie.dtype
+    
+    if pd.api.types.is_bool_dtype(dtype):
+        textos = serie.map({True: "1", False: "0"})
+    elif pd.api.types.is_integer_dtype(dtype):
+        textos = serie.astype(str)
+    elif pd.api.types.is_float_dtype(dtype):
+        textos = pd.Series(np.char.mod("%.7f", serie.to_numpy(dtype=float, na_value=np.nan)), index=serie.index)
+    elif pd.api.types.is_datetime64_any_dtype(dtype):
+        # Pocas fechas distintas: se formatea cada una una sola vez
+        codigos, unicos = pd.factorize(serie)
+        formato = "%Y-%m-%d" if _es_fecha(serie) else "%Y-%m-%d %H:%M:%S"
+        textos = pd.Series(np.append(unicos.strftime(formato).to_numpy(dtype=object), "")[codigos],
+            index=serie.index)
+    else:
+        textos = serie.astype(str).str.replace(f"[\x00{SEPARADOR_CAMPO}{SEPARADOR_FILA}]", " ", regex=True)
+        textos = textos.mask(textos == "", "\x00")
+    
+    return textos.mask(nulos, "")
+
+
+def _escribir_staging(df: pd.DataFrame, ruta: str, filas_por_bloque: int = FILAS_POR_LOTE) -> int:
+    """
+    Escribe el DataFrame en un archivo de staging para BULK INSERT / bcp.
+    
+    Formato: texto UTF-8 sin encabezado, campos separados por SEPARADOR_CAMPO
+    y filas terminadas por SEPARADOR_FILA, en el orden de columnas del
+    DataFrame. Se escribe por bloques para no duplicar la tabla en memoria.
+    
+    Args:
+        df: DataFrame a escribir
+        ruta: Ruta del archivo a generar
+        filas_por_bloque: Filas convertidas a texto por cada escritura
+        
+    Returns:
+        int: Número de filas escritas
+    """
+    with open(ruta, "w", encoding="utf-8", newline="") as archivo:
+        for desde in range(0, len(df), filas_por_bloque):
+            bloque = df.iloc[desde:desde + filas_por_bloque]
+            columnas = [_textos_columna(bloque.iloc[:, i]).tolist() for i in range(bloque.shape[1])]
+            archivo.write("".join(SEPARADOR_CAMPO.join(fila) + SEPARADOR_FILA for fila in zip(*columnas)))
+    return len(df)
+
+
+def _insertar_bulk(conexion, df: pd.DataFrame, table_name: str, log: Logs, motor: str = "bulk_insert",
+    filas_por_lote: int = FILAS_POR_LOTE):
+    """
+    Inserta el DataFrame con la ruta nativa de carga masiva de SQL Server.
+    
+    Escribe un archivo de staging y lo carga con BULK INSERT (lo lee el
+    servidor) o con la utilidad bcp (lo lee el cliente), ambos con TABLOCK y
+    confirmando cada `filas_por_lote` filas.
+    
+    Args:
+        conexion: Objeto de conexión a SQL Server
+        df: DataFrame con los datos a insertar
+        table_name: Nombre de la tabla destino
+        log: Instancia de la clase Logs
+        motor: 'bulk_insert' o 'bcp'
+        filas_por_lote: Filas por lote confirmado (BATCHSIZE / -b)
+    """
+    os.makedirs(DIRECTORIO_STAGING, exist_ok=True)
+    ruta = os.path.abspath(os.path.join(DIRECTORIO_STAGING, f"{table_name}.dat"))
+    
+    try:
+        cursor = conexion.cursor()
+        
+        # El archivo se lee por posición: respetar el orden de columnas de la tabla
+        cursor.execute(
+            "SELECT COLUMN_NAME FROM INFORMATION_SCHEMA.COLUMNS WHERE TABLE_NAME = ? ORDER BY ORDINAL_POSITION",
+            table_name
+        )
+        columnas_tabla = [fila[0] for fila in cursor.fetchall()]
+        if set(columnas_tabla) == set(df.columns):
+            df = df[columnas_tabla]
+        
+        log.info(f"Escribiendo archivo de staging: {ruta}")
+        inicio = time.perf_counter()
+        filas = _escribir_staging(df, ruta)
+        log.info(f"   - {filas:,} filas escritas en {time.perf_counter() - inicio:.2f} s "
+            f"({os.path.getsize(ruta) / 1024**2:.2f} MB)")
+        
+        log.info(f"Cargando [{table_name}] con {motor}...")
+        inicio = time.perf_counter()
+        
+        if motor == "bulk_insert":
+            ruta_servidor = ruta
+            if DIRECTORIO_STAGING_SERVIDOR:
+                ruta_servidor = os.path.join(DIRECTORIO_STAGING_SERVIDOR, os.path.basename(ruta))
+            cursor.execute(f"""
+                BULK INSERT [{table_name}] FROM '{ruta_servidor}'
+                WITH (
+                    CODEPAGE = '65001',
+                    FIELDTERMINATOR = '0x{ord(SEPARADOR_CAMPO):02x}',
+                    ROWTERMINATOR = '0x{ord(SEPARADOR_FILA):02x}',
+                    BATCHSIZE = {filas_por_lote},
+                    TABLOCK
+                );
+            """)
+            conexion.commit()
+        else:
+            comando = [
+                "bcp", f"[{BASE_DATOS}].[dbo].[{table_name}]", "in", ruta,
+                "-S", SERVIDOR, "-U", USUARIO, "-P", CONTRASENA,
+                "-c", "-C", "65001",
+                "-t", f"0x{ord(SEPARADOR_CAMPO):02x}", "-r", f"0x{ord(SEPARADOR_FILA):02x}",
+                "-b", str(filas_por_lote), "-h", "TABLOCK",
+            ]
+            resultado = subprocess.run(comando, capture_output=True, text=True)
+            if resultado.returncode != 0:
+                raise Exception(f"bcp terminó con código {resultado.returncode}: "
+                    f"{(resultado.stderr or resultado.stdout).strip()}")
+        
+        segundos = time.perf_counter() - inicio
+        log.info(f"✅ {filas:,} filas insertadas en [{table_name}] correctamente")
+        log.info(f"   - Tiempo de inserción: {segundos:.2f} s ({filas / max(segundos, 1e-9):,.0f} filas/s)")
+        
+    except pyodbc.Error as e:
+        log.error(f"Error de SQL al insertar datos en [{table_name}]: {e}")
+        conexion.rollback()
         raise
+    except Exception as e:
+        log.error(f"Error inesperado al insertar datos en [{table_name}]: {e}")
+        raise
+    finally:
+        if not CONSERVAR_STAGING and os.path.exists(ruta):
+            os.remove(ruta)
+
+
+def _valores_columna(serie: pd.Series) -> list:
+    """
+    Convierte una columna completa a una lista de valores nativos de Python.
+    
+    Trabaja por columna según el dtype: los nulos se calculan una sola vez
+    con una máscara y los valores se convierten en bloque con tolist().
+    Solo las columnas object con tipos mezclados pasan por _to_python_value
+    celda por celda.
+    
+    Args:
+        serie: Columna del DataFrame
+        
+    Returns:
+        list: Valores de la columna (None en lugar de los nulos)
+    """
+    dtype = serie.dtype
+    
+    if isinstance(dtype, pd.CategoricalDtype):
+        # Convertir solo las categorías y reconstruir por código
+        categorias = _valores_columna(pd.Series(dtype.categories))
+        return [categorias[c] if c >= 0 else None for c in serie.cat.codes.tolist()]
+    
+    nulos = serie.isna().to_numpy()
+    
+    if pd.api.types.is_datetime64_any_dtype(dtype) and _es_fecha(serie):
+        # datetime64[D].tolist() entrega datetime.date (None para NaT)
+        valores = serie.to_numpy().astype("datetime64[D]").tolist()
+    elif pd.api.types.is_datetime64_any_dtype(dtype):
+        valores = list(serie.dt.to_pydatetime())
+    elif isinstance(dtype, np.dtype) and dtype.kind in 'biuf':
+        # int, uint, bool y float de numpy: tolist() ya entrega tipos de Python
+        valores = serie.to_numpy().tolist()
+    elif isinstance(dtype, np.dtype):
+        valores = serie.tolist()
+        if pd.api.types.infer_dtype(serie, skipna=True) not in ('string', 'empty'):
+            valores = [_to_python_value(x) for x in valores]
+    else:
+        # dtypes de extensión (Int64, boolean, string, ...)
+        valores = serie.to_numpy(dtype=object, na_value=None).tolist()
+    
+    if nulos.any():
+        for i in np.flatnonzero(nulos).tolist():
+            valores[i] = None
+    return valores
+
+
+def _preparar_filas(df: pd.DataFrame) -> list:
+    """
+    Convierte el DataFrame a la lista de tuplas de parámetros para executemany.
+    
+    Cada columna se convierte una sola vez con _valores_columna y las filas se
+    arman en una única pasada con zip.
+    
+    Args:
+        df: DataFrame a convertir
+        
+    Returns:
+        list: Una tupla por fila con valores nativos de Python
+    """
+    columnas = [_valores_columna(df.iloc[:, i]) for i in range(df.shape[1])]
+    return list(zip(*columnas))
 
 
 def _to_python_value(x):
@@ -189,19 +1049,461 @@ def _to_python_value(x):
     return str(x) if not isinstance(x, (int, float, bool)) else x
 
 
-def cargar_datos(df_listings, df_reviews, df_calendar, df_host, df_verification, 
-    df_amenities_listings, df_amenities, df_reviewer, log: Logs):
+def _preparar_carga_diferida(conexion, nombres: list, log: Logs, pendiente: dict = None) -> dict:
+    """
+    Fase previa de la carga diferida: registra y desactiva índices y FKs.
+    
+    - Las llaves foráneas que tocan las tablas destino se registran y se
+      eliminan (TRUNCATE no se permite sobre tablas referenciadas, aunque la
+      FK esté deshabilitada).
+    - Los índices no agrupados activos de las tablas destino se deshabilitan,
+      así no se mantienen fila a fila durante la carga.
+    
+    Antes de eliminar o deshabilitar nada, el estado (junto con lo que quedó
+    `pendiente` de una ejecución anterior) se guarda en ARCHIVO_CARGA_DIFERIDA.
+    
+    Returns:
+        dict: {'fks': [...], 'indices': [(tabla, índice)]} para _finalizar_carga_diferida
+    """
+    cursor = conexion.cursor()
+    marcadores = ", ".join("?" for _ in nombres)
+    
+    cursor.execute("SELECT recovery_model_desc FROM sys.databases WHERE name = DB_NAME()")
+    modelo = cursor.fetchone()[0]
+    if modelo == "FULL":
+        log.warning("La base de datos usa recuperación FULL: BULK INSERT y bcp no se registrarán de forma "
+            "mínima (se requiere SIMPLE o BULK_LOGGED)")
+    
+    cursor.execute(f"""
+        SELECT fk.name, OBJECT_NAME(fk.parent_object_id), OBJECT_NAME(fk.referenced_object_id),
+            STRING_AGG(QUOTENAME(COL_NAME(fkc.parent_object_id, fkc.parent_column_id)), ', ')
+                WITHIN GROUP (ORDER BY fkc.constraint_column_id),
+            STRING_AGG(QUOTENAME(COL_NAME(fkc.referenced_object_id, fkc.referenced_column_id)), ', ')
+                WITHIN GROUP (ORDER BY fkc.constraint_column_id),
+            fk.delete_referential_action_desc, fk.update_referential_action_desc
+        FROM sys.foreign_keys fk
+        JOIN sys.foreign_key_columns fkc ON fkc.constraint_object_id = fk.object_id
+        WHERE OBJECT_NAME(fk.parent_object_id) IN ({marcadores})
+            OR OBJECT_NAME(fk.referenced_object_id) IN ({marcadores})
+        GROUP BY fk.name, fk.parent_object_id, fk.referenced_object_id,
+            fk.delete_referential_action_desc, fk.update_referential_action_desc
+    """, *nombres, *nombres)
+    fks = [tuple(fila) for fila in cursor.fetchall()]
+    
+    cursor.execute(f"""
+        SELECT OBJECT_NAME(i.object_id), i.name
+        FROM sys.indexes i
+        WHERE i.type_desc = 'NONCLUSTERED' AND i.is_disabled = 0 AND i.is_primary_key = 0
+            AND OBJECT_NAME(i.object_id) IN ({marcadores})
+    """, *nombres)
+    indices = [tuple(fila) for fila in cursor.fetchall()]
+    
+    pendiente = pendiente or {"fks": [], "indices": []}
+    estado = {
+        "fks": pendiente["fks"] + [fk for fk in fks if fk not in pendiente["fks"]],
+        "indices": pendiente["indices"] + [i for i in indices if i not in pendiente["indices"]],
+    }
+    _guardar_carga_pendiente(estado)
+    
+    for nombre, tabla, *_ in fks:
+        log.info(f"  - Eliminando FK [{nombre}] de [{tabla}] (se recreará al final)")
+        cursor.execute(f"ALTER TABLE [{tabla}] DROP CONSTRAINT [{nombre}];")
+    
+    for tabla, indice in indices:
+        log.info(f"  - Deshabilitando índice [{indice}] de [{tabla}]")
+        cursor.execute(f"ALTER INDEX [{indice}] ON [{tabla}] DISABLE;")
+    
+    conexion.commit()
+    log.info(f"✅ {len(fks)} FKs eliminadas y {len(indices)} índices deshabilitados")
+    return estado
+
+
+def _finalizar_carga_diferida(conexion, estado: dict, log: Logs) -> dict:
+    """
+    Fase final de la carga diferida: reconstruye los índices y recrea las FKs.
+    
+    Las FKs se recrean WITH CHECK, de modo que SQL Server vuelve a validar
+    todos los datos cargados y la restricción queda confiable. Un fallo en un
+    objeto se registra y no impide procesar los demás. Las FKs que ya existen
+    (una ejecución interrumpida antes de eliminarlas) se omiten.
+    
+    Returns:
+        dict: {'fks': [...], 'indices': [...]} con los objetos que no se
+            pudieron restaurar
+    """
+    cursor = conexion.cursor()
+    fallidos = {"fks": [], "indices": []}
+    
+    for tabla, indice in estado["indices"]:
+        try:
+            cursor.execute("SELECT 1 FROM sys.indexes WHERE object_id = OBJECT_ID(?) AND name = ?", tabla, indice)
+            if cursor.fetchone() is None:
+                log.warning(f"  - Índice [{indice}] de [{tabla}] ya no existe (la tabla se recreó)")
+                continue
+            log.info(f"  - Reconstruyendo índice [{indice}] de [{tabla}]")
+            cursor.execute(f"ALTER INDEX [{indice}] ON [{tabla}] REBUILD;")
+            conexion.commit()
+        except pyodbc.Error as e:
+            fallidos["indices"].append((tabla, indice))
+            log.error(f"Error al reconstruir índice [{indice}] de [{tabla}]: {e}")
+            conexion.rollback()
+    
+    for fk in estado["fks"]:
+        nombre, tabla, referenciada, columnas, columnas_ref, on_delete, on_update = fk
+        try:
+            cursor.execute("SELECT 1 FROM sys.foreign_keys WHERE name = ? AND parent_object_id = OBJECT_ID(?)",
+                nombre, tabla)
+            if cursor.fetchone() is not None:
+                log.info(f"  - FK [{nombre}] de [{tabla}] ya existe")
+                continue
+            log.info(f"  - Recreando y validando FK [{nombre}] de [{tabla}]")
+            cursor.execute(
+                f"ALTER TABLE [{tabla}] WITH CHECK ADD CONSTRAINT [{nombre}] "
+                f"FOREIGN KEY ({columnas}) REFERENCES [{referenciada}] ({columnas_ref}) "
+                f"ON DELETE {on_delete.replace('_', ' ')} ON UPDATE {on_update.replace('_', ' ')};"
+            )
+            conexion.commit()
+        except pyodbc.Error as e:
+            fallidos["fks"].append(tuple(fk))
+            log.error(f"Error al recrear FK [{nombre}] de [{tabla}]: {e}")
+            conexion.rollback()
+    
+    errores = len(fallidos["fks"]) + len(fallidos["indices"])
+    if errores:
+        log.warning(f"Carga diferida finalizada con {errores} errores (quedan pendientes en {ARCHIVO_CARGA_DIFERIDA})")
+    else:
+        log.info(f"✅ {len(estado['indices'])} índices reconstruidos y {len(estado['fks'])} FKs validadas")
+    return fallidos
+
+
+def _leer_carga_pendiente() -> dict:
+    """Estado de una carga diferida que no terminó su fase 3 (None si no hay)."""
+    if not os.path.exists(ARCHIVO_CARGA_DIFERIDA):
+        return None
+    with open(ARCHIVO_CARGA_DIFERIDA, encoding="utf-8") as archivo:
+        estado = json.load(archivo)
+    return {"fks": [tuple(fk) for fk in estado["fks"]], "indices": [tuple(i) for i in estado["indices"]]}
 
-    conexion = None
+
+def _guardar_carga_pendiente(estado: dict):
+    """Guarda en disco los objetos que falta restaurar; si no queda ninguno, borra el archivo."""
+    if not estado["fks"] and not estado["indices"]:
+        if os.path.exists(ARCHIVO_CARGA_DIFERIDA):
+            os.remove(ARCHIVO_CARGA_DIFERIDA)
+        return
+    temporal = f"{ARCHIVO_CARGA_DIFERIDA}.tmp"
+    with open(temporal, "w", encoding="utf-8") as archivo:
+        json.dump(estado, archivo, ensure_ascii=False, indent=2)
+    os.replace(temporal, ARCHIVO_CARGA_DIFERIDA)
+
+
+def iniciar_carga_diferida(nombres: list, log: Logs) -> dict:
+    """
+    Fase 1 de la carga diferida sobre las tablas `nombres`.
+    
+    Si una ejecución anterior se interrumpió sin completar su fase 3, primero
+    restaura lo que quedó en ARCHIVO_CARGA_DIFERIDA; lo que no se pueda
+    restaurar se conserva para reintentarlo en la fase 3 de esta ejecución.
+    
+    Returns:
+        dict: Estado para terminar_carga_diferida
+    """
+    log.separator()
+    log.info("Carga diferida - fase 1: desactivando índices y llaves foráneas...")
+    inicio = time.perf_counter()
+    conexion = _conectar_sql(log)
+    try:
+        pendiente = _leer_carga_pendiente()
+        if pendiente is not None:
+            log.warning(f"Una carga anterior no restauró sus índices/FKs ({ARCHIVO_CARGA_DIFERIDA}); restaurándolos...")
+            pendiente = _finalizar_carga_diferida(conexion, pendiente, log)
+            _guardar_carga_pendiente(pendiente)
+        estado = _preparar_carga_diferida(conexion, nombres, log, pendiente)
+    finally:
+        conexion.close()
+    log.info(f"   - Tiempo fase 1: {time.perf_counter() - inicio:.2f} s")
+    return estado
+
+
+def terminar_carga_diferida(estado: dict, log: Logs):
+    """
+    Fase 3 de la carga diferida: restaura los índices y FKs de `estado`.
+    
+    Los objetos que no se pudieron restaurar quedan en ARCHIVO_CARGA_DIFERIDA
+    para la próxima ejecución; si se restauraron todos, el archivo se borra.
+    """
+    log.separator()
+    log.info("Carga diferida - fase 3: reconstruyendo índices y validando llaves foráneas...")
+    inicio = time.perf_counter()
+    conexion = _conectar_sql(log)
+    try:
+        _guardar_carga_pendiente(_finalizar_carga_diferida(conexion, estado, log))
+    finally:
+        conexion.close()
+    log.info(f"   - Tiempo fase 3: {time.perf_counter() - inicio:.2f} s")
+
+
+def _crear_vista_calendar(conexion, log: Logs):
+    """
+    Crea (o actualiza) la vista VISTA_CALENDAR, que expande calendar_ranges
+    a una fila por día con las columnas de calendar (listing_id, date,
+    available). Los días de cada rango salen de una tabla de números de
+    0 a 9999 armada con VALUES, sin depender de tablas del sistema.
+    """
+    digitos = "(VALUES (0),(1),(2),(3),(4),(5),(6),(7),(8),(9))"
+    try:
+        cursor = conexion.cursor()
+        cursor.execute(f"""
+            CREATE OR ALTER VIEW [{VISTA_CALENDAR}] AS
+            WITH numeros AS (
+                SELECT a.d + 10 * b.d + 100 * c.d + 1000 * m.d AS n
+                FROM {digitos} a(d) CROSS JOIN {digitos} b(d) CROSS JOIN {digitos} c(d) CROSS JOIN {digitos} m(d)
+            )
+            SELECT r.[listing_id], DATEADD(DAY, numeros.n, r.[start_date]) AS [date], r.[available]
+            FROM [calendar_ranges] r
+            JOIN numeros ON numeros.n <= DATEDIFF(DAY, r.[start_date], r.[end_date]);
+        """)
+        conexion.commit()
+        log.info(f"✅ Vista [{VISTA_CALENDAR}] creada: expande calendar_ranges a filas diarias")
+    except pyodbc.Error as e:
+        log.error(f"Error al crear la vista [{VISTA_CALENDAR}]: {e}")
+
+
+def _esquema_streaming(df: pd.DataFrame, table_name: str) -> tuple:
+    """
+    Esquema de una tabla que se carga por chunks, a partir del primero.
+    
+    Como el resto de los datos aún no se conoce, los tipos medidos se
+    amplían (enteros a BIGINT, decimales a DECIMAL(38,7), textos a
+    NVARCHAR(MAX)) y todas las columnas admiten nulos. La clave primaria se
+    declara al terminar la carga (ver _agregar_clave_primaria). Los tipos de
+    ARCHIVO_ESQUEMA se respetan tal cual.
+    
+    Returns:
+        tuple: ([(columna, tipo_sql, admite_nulos)], [columnas de la clave primaria])
+    """
+    override = _leer_esquema_override().get(table_name, {})
+    tipos_override = override.get("columnas", {})
+    clave_primaria = override.get("clave_primaria", CLAVES_PRIMARIAS.get(table_name, []))
+    
+    columnas = []
+    for col in df.columns:
+        sql_type = tipos_override.get(col)
+        if sql_type is None:
+            sql_type = _inferir_tipo_sql(df[col])
+            if sql_type in ("SMALLINT", "INT"):
+                sql_type = "BIGINT"
+            elif sql_type.startswith("DECIMAL"):
+                sql_type = "DECIMAL(38,7)"
+            elif "CHAR(" in sql_type:
+                sql_type = "NVARCHAR(MAX)"
+        columnas.append((col, sql_type, True))
+    
+    return columnas, [c for c in clave_primaria if c in df.columns]
+
+
+def _agregar_clave_primaria(conexion, table_name: str, clave_primaria: list, columnas: list, log: Logs):
+    """
+    Declara la clave primaria de una tabla cargada por chunks, si aún no la
+    tiene. Si los datos tienen nulos o duplicados en la clave se omite, igual
+    que en _inferir_esquema.
+    """
+    cursor = conexion.cursor()
+    cursor.execute(f"SELECT OBJECTPROPERTY(OBJECT_ID('[{table_name}]'), 'TableHasPrimaryKey')")
+    if not clave_primaria or cursor.fetchone()[0]:
+        return
+    
+    tipos = {col: sql_type for col, sql_type, _ in columnas}
+    try:
+        for col in clave_primaria:
+            cursor.execute(f"ALTER TABLE [{table_name}] ALTER COLUMN [{col}] {tipos[col]} NOT NULL;")
+        cursor.execute(f"ALTER TABLE [{table_name}] ADD CONSTRAINT [PK_{table_name}] "
+            f"PRIMARY KEY ({', '.join(f'[{c}]' for c in clave_primaria)});")
+        conexion.commit()
+        log.info(f"  - Clave primaria: {', '.join(clave_primaria)}")
+    except pyodbc.Error as e:
+        conexion.rollback()
+        log.warning(f"Clave primaria {clave_primaria} tiene nulos o duplicados en [{table_name}]; se omite ({e})")
+
+
+def cargar_por_chunks(chunks, table_name: str, log: Logs, motor: str = None, recrear: bool = RECREAR_TABLAS) -> int:
+    """
+    Carga una tabla a partir de un iterable de DataFrames sin reunirlos.
+    
+    La tabla se crea (o se vacía) con el esquema del primer chunk ampliado
+    por _esquema_streaming y cada chunk se inserta con el motor de la tabla
+    apenas llega, así que en memoria solo hay un chunk a la vez. Lo usa el
+    modo streaming de calendar (pipeline.py).
+    
+    Args:
+        chunks: Iterable de DataFrames con las mismas columnas
+        table_name: Nombre de la tabla destino
+        log: Instancia de la clase Logs para registro
+        motor: 'executemany', 'bulk_insert' o 'bcp' (None = MOTORES_CARGA)
+        recrear: Eliminar y volver a crear la tabla si ya existe
+        
+    Returns:
+        int: Filas cargadas
+        
+    Raises:
+        Exception: Si falla la creación de la tabla o la inserción de un chunk
+    """
+    motor = motor or MOTORES_CARGA.get(table_name, "executemany")
+    conexion = _conectar_sql(log)
+    filas = 0
+    esquema = None
+    medicion = medir(f"carga.{table_name}.insercion_chunks")
+    
+    try:
+        log.info(f"Cargando [{table_name}] por chunks (motor: {motor})")
+        
+        for numero, chunk in enumerate(chunks, 1):
+            if esquema is None:
+                esquema = _esquema_streaming(chunk, table_name)
+                _crear_tabla(conexion, chunk, table_name, log, recrear, esquema=(esquema[0], []))
+            
+            if motor == "executemany":
+                _insertar_data(conexion, chunk, table_name, log, tablock=True)
+            elif motor in ("bulk_insert", "bcp"):
+                _insertar_bulk(conexion, chunk, table_name, log, motor)
+            else:
+                raise ValueError(f"Motor de carga desconocido: {motor}")
+            
+            filas += len(chunk)
+            log.info(f"  - Chunk {numero:,} de [{table_name}]: {filas:,} filas cargadas")
+        
+        if esquema is None:
+            log.warning(f"No llegaron filas para [{table_name}]; la tabla no se modificó")
+            return 0
+        
+        _agregar_clave_primaria(conexion, table_name, esquema[1], esquema[0], log)
+        medicion.terminar(filas)
+        log.info(f"✅ Tabla {table_name} cargada exitosamente ({filas:,} filas)")
+        return filas
+    
+    except Exception as e:
+        log.error(f"Error al cargar [{table_name}] por chunks ({filas:,} filas ya cargadas): {e}")
+        raise Exception(f"❌ Error en la carga por chunks de '{table_name}': {e}")
+    finally:
+        conexion.close()
+
+
+def _cargar_tablas(tablas: list, log: Logs, motores: dict, conexiones: int = CONEXIONES_CARGA,
+    recrear: bool = False, tablock: bool = False, incremental: bool = False) -> dict:
+    """
+    Carga las tablas respetando DEPENDENCIAS, en paralelo cuando es posible.
+    
+    Las tablas forman un grafo (DAG) padre -> hija. Cada tabla se lanza en
+    cuanto todas sus padres terminaron con éxito, usando un pool de
+    `conexiones` conexiones a SQL Server; si una padre falla, sus hijas se
+    omiten y cuentan como fallidas. Entre tablas listas se respeta el orden
+    de la lista recibida.
+    
+    Args:
+        tablas: Lista [(df, nombre)] en orden de prioridad
+        log: Instancia de la clase Logs
+        motores: {tabla: motor de carga}
+        conexiones: Tamaño del pool de conexiones
+        recrear: Eliminar y volver a crear las tablas existentes
+        tablock: Insertar con bloqueo de tabla
+        incremental: Combinar con MERGE en lugar de recargar las tablas
+        
+    Returns:
+        dict: {tabla: True si se cargó, False si falló o se omitió}
+    """
+    nombres = [nombre for _, nombre in tablas]
+    dfs = {nombre: df for df, nombre in tablas}
+    conexiones = max(1, min(conexiones, len(tablas)))
+    
+    pool_conexiones = queue.Queue()
+    for _ in range(conexiones):
+        pool_conexiones.put(_conectar_sql(log))
+    
+    contador = iter(range(1, len(tablas) + 1))
+    contador_lock = threading.Lock()
+    
+    def _tarea(nombre):
+        with contador_lock:
+            i = next(contador)
+        conexion = pool_conexiones.get()
+        try:
+            return _cargar_data_frame(conexion, dfs[nombre], nombre, log, i, len(tablas),
+                motores.get(nombre, "executemany"), recrear, tablock, incremental)
+        finally:
+            pool_conexiones.put(conexion)
+    
+    resultados = {}
+    pendientes = list(nombres)
+    en_curso = {}
+    
+    try:
+        if conexiones > 1:
+            log.info(f"Cargando tablas independientes en paralelo ({conexiones} conexiones)")
+        
+        with ThreadPoolExecutor(max_workers=conexiones, thread_name_prefix="carga") as executor:
+            while pendientes or en_curso:
+                for nombre in list(pendientes):
+                    padres = [p for p in DEPENDENCIAS.get(nombre, []) if p in dfs]
+                    if any(resultados.get(p) is False for p in padres):
+                        log.warning(f"Tabla {nombre} omitida: falló la carga de "
+                            f"{', '.join(p for p in padres if resultados.get(p) is False)}")
+                        resultados[nombre] = False
+                        pendientes.remove(nombre)
+                    elif all(resultados.get(p) is True for p in padres):
+                        en_curso[executor.submit(_tarea, nombre)] = nombre
+                        pendientes.remove(nombre)
+                
+                if not en_curso:
+                    continue
+                
+                terminados, _ = wait(en_curso, return_when=FIRST_COMPLETED)
+                for futuro in terminados:
+                    resultados[en_curso.pop(futuro)] = futuro.result()
+    finally:
+        while not pool_conexiones.empty():
+            pool_conexiones.get().close()
+    
+    return {nombre: resultados[nombre] for nombre in nombres}
+
+
+def cargar_datos(df_listings, df_reviews, df_calendar, df_host, df_verification, 
+    df_amenities_listings, df_amenities, df_reviewer, log: Logs, motores: dict = None,
+    conexiones: int = CONEXIONES_CARGA, recrear_tablas: bool = RECREAR_TABLAS,
+    carga_diferida: bool = CARGA_DIFERIDA, incremental: bool = False, solo_tablas: list = None,
+    df_calendar_ranges: pd.DataFrame = None, tablock: bool = None):
+    """
+    Carga las tablas transformadas en SQL Server, tablas padre primero.
+    
+    Args:
+        motores: {tabla: motor} con 'executemany', 'bulk_insert' o 'bcp'
+            (None = MOTORES_CARGA; las tablas no listadas usan executemany)
+        conexiones: Conexiones simultáneas para cargar tablas independientes
+        recrear_tablas: Eliminar y recrear las tablas existentes para aplicar
+            el esquema inferido (por defecto solo se vacían con TRUNCATE si los
+            datos caben en su estructura)
+        carga_diferida: Desactivar índices/FKs antes de cargar, cargar con
+            TABLOCK y reconstruirlos/validarlos al final
+        incremental: Combinar las filas con MERGE en las tablas de CLAVES_MERGE
+            (las demás no se tocan) en lugar de vaciar y recargar todo
+        solo_tablas: Cargar solo estas tablas, p. ej. las que fallaron en un
+            intento anterior (None = todas). Sus padres se asumen ya cargadas.
+        df_calendar_ranges: Calendar comprimido en rangos (ver calendar_rangos).
+            Si se indica, se carga la tabla calendar_ranges y la vista
+            VISTA_CALENDAR en lugar de la tabla diaria calendar.
+        tablock: Cargar con TABLOCK (None = según carga_diferida). Permite
+            usarlo cuando las fases 1 y 3 de la carga diferida las hace quien
+            llama (iniciar_carga_diferida / terminar_carga_diferida).
+        
+    Returns:
+        dict: {tabla: True/False} según si la tabla se cargó con éxito
+    """
+    motores = MOTORES_CARGA if motores is None else motores
     
     try:
         log.info("=" * 50)
         log.info("INICIO DEL PROCESO DE CARGA")
         log.info("=" * 50)
         
-        # Conectar a SQL Server
-        conexion = _conectar_sql(log)
-        
         # Definir orden de carga (tablas padre primero)
         tablas = [
             (df_host, "host"),
@@ -214,34 +1516,74 @@ def cargar_datos(df_listings, df_reviews, df_calendar, df_host, df_verification,
             (df_calendar, "calendar")
         ]
         
+        if df_calendar_ranges is not None:
+            tablas[-1] = (df_calendar_ranges, "calendar_ranges")
+            log.info(f"Calendar en rangos: {len(df_calendar_ranges):,} rangos en lugar de {len(df_calendar):,} filas diarias")
+        
+        if solo_tablas is not None:
+            tablas = [(df, nombre) for df, nombre in tablas if nombre in solo_tablas]
+            log.info(f"Cargando solo las tablas: {', '.join(n for _, n in tablas)}")
+        
+        if incremental:
+            omitidas = [nombre for _, nombre in tablas if nombre not in CLAVES_MERGE]
+            tablas = [(df, nombre) for df, nombre in tablas if nombre in CLAVES_MERGE]
+            log.info("Modo incremental: MERGE por clave en " + ", ".join(n for _, n in tablas))
+            if omitidas:
+                log.warning(f"Modo incremental: {', '.join(omitidas)} no se actualizan "
+                    "(sus IDs se regeneran en cada ejecución; requieren una carga completa)")
+            if carga_diferida:
+                log.info("Modo incremental: la carga diferida no se aplica a un MERGE")
+                carga_diferida = False
+        
         log.separator()
         log.info("Resumen de tablas a cargar:")
         for df, nombre in tablas:
             log.info(f"  - {nombre}: {len(df):,} registros, {df.shape[1]} columnas")
         
-        # Cargar cada tabla
-        total_registros = 0
-        for i, (df, nombre) in enumerate(tablas, 1):
-            exitoso = _cargar_data_frame(conexion, df, nombre, log, i, len(tablas))
-            if exitoso:
-                total_registros += len(df)
+        tablock = carga_diferida if tablock is None else tablock
+        estado_diferido = None
+        if carga_diferida:
+            estado_diferido = iniciar_carga_diferida([n for _, n in tablas], log)
+        
+        try:
+            # Cargar las tablas según sus dependencias
+            inicio = time.perf_counter()
+            resultados = _cargar_tablas(tablas, log, motores, conexiones, recrear_tablas, tablock, incremental)
+            if carga_diferida:
+                log.separator()
+                log.info(f"Carga diferida - fase 2 (carga con TABLOCK): {time.perf_counter() - inicio:.2f} s")
+        finally:
+            # Los índices y FKs se restauran aunque la carga falle
+            if estado_diferido is not None:
+                terminar_carga_diferida(estado_diferido, log)
+        
+        if resultados.get("calendar_ranges"):
+            conexion = _conectar_sql(log)
+            try:
+                _crear_vista_calendar(conexion, log)
+            finally:
+                conexion.close()
+        
+        total_registros = sum(len(df) for df, nombre in tablas if resultados[nombre])
+        fallidas = [nombre for nombre, exitoso in resultados.items() if not exitoso]
         
         # Resumen final
         log.separator()
         log.info("RESUMEN DE CARGA:")
-        log.info(f"  - Tablas cargadas: {len(tablas)}")
+        log.info(f"  - Tablas cargadas: {len(tablas) - len(fallidas)}/{len(tablas)}")
         log.info(f"  - Total de registros: {total_registros:,}")
-        log.info(f"  - Base de datos: AirbnbMexico")
+        log.info(f"  - Base de datos: {BASE_DATOS}")
+        if fallidas:
+            log.warning(f"  - Tablas con error: {', '.join(fallidas)}")
+        
+        return resultados
         
     except Exception as e:
         log.error(f"Error crítico en cargar_datos: {str(e)}")
         raise
     
     finally:
-        if conexion is not None:
-            conexion.close()
-            log.info("Conexión a SQL Server cerrada")
-    
+        log.info("Conexiones a SQL Server cerradas")
         log.info("=" * 50)
         log.info("PROCESO DE CARGA COMPLETADO EXITOSAMENTE")
         log.info("=" * 50)
\ No newline at end of file
@@ -0,0 +1,186 @@
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime
+import pandas as pd
+from logs import Logs
+
+__all__ = ['Checkpoints', 'ETAPAS']
+
+# Etapas del ETL en orden de ejecución
+ETAPAS = ["extraccion", "transformacion", "carga"]
+
+# Directorio donde se guarda una carpeta de checkpoints por ejecución
+DIRECTORIO_CHECKPOINTS = "checkpoints"
+
+# Ejecuciones que se conservan; las más antiguas se eliminan al crear una nueva
+MAX_EJECUCIONES = 3
+
+# Módulos que producen las salidas guardadas. carga.py no está: corregir la
+# carga no invalida los checkpoints, justamente para reintentarla con ellos.
+MODULOS_VERSIONADOS = ["extraccion.py", "transformacion.py", "tipos.py", "main.py"]
+
+
+def version_codigo() -> str:
+    """
+    Huella del código que produce los checkpoints: hash de MODULOS_VERSIONADOS.
+
+    Un checkpoint solo se reutiliza con la misma versión del código, para no
+    mezclar salidas de una transformación vieja con una carga nueva.
+    """
+    huella = hashlib.sha1()
+    directorio = os.path.dirname(os.path.abspath(__file__))
+    for modulo in MODULOS_VERSIONADOS:
+        huella.update(modulo.encode("utf-8"))
+        with open(os.path.join(directorio, modulo), "rb") as f:
+            huella.update(f.read())
+    return huella.hexdigest()[:12]
+
+
+class Checkpoints:
+    """
+    Guarda las salidas de cada etapa del ETL para poder reanudar una ejecución.
+
+    Cada ejecución tiene su carpeta checkpoints/<run_id>/ con un archivo
+    pickle por objeto guardado y un manifiesto JSON con la versión del
+    código, las etapas completadas y el resultado de la carga por tabla.
+    """
+
+    def __init__(self, log: Logs, run_id: str = None, directorio: str = DIRECTORIO_CHECKPOINTS):
+        """
+        Crea una ejecución nueva o abre una existente.
+
+        Args:
+            log: Instancia de la clase Logs para registro
+            run_id: ID de la ejecución a reanudar ('ultimo' = la más reciente;
+                None = crear una ejecución nueva)
+            directorio: Directorio raíz de los checkpoints
+
+        Raises:
+            Exception: Si la ejecución no existe o es de otra versión del código
+        """
+        self.log = log
+        self.directorio = directorio
+        self.version = version_codigo()
+
+        if run_id is None:
+            self.run_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+            self.ruta = os.path.join(directorio, self.run_id)
+            os.makedirs(self.ruta, exist_ok=True)
+            self.manifiesto = {"run_id": self.run_id, "version_codigo": self.version, "etapas": {}}
+            self._guardar_manifiesto()
+            self._podar()
+            log.info(f"Checkpoints de la ejecución en: {self.ruta} (código {self.version})")
+            return
+
+        if run_id == "ultimo":
+            run_id = self._ultima_ejecucion()
+        self.run_id = run_id
+        self.ruta = os.path.join(directorio, run_id)
+
+        archivo = os.path.join(self.ruta, "manifiesto.json")
+        if not os.path.exists(archivo):
+            log.error(f"No existe la ejecución '{run_id}' en {directorio}")
+            raise Exception(f"❌ No hay checkpoints para la ejecución '{run_id}'")
+
+        with open(archivo, encoding="utf-8") as f:
+            self.manifiesto = json.load(f)
+
+        if self.manifiesto["version_codigo"] != self.version:
+            log.error(f"Los checkpoints de '{run_id}' son del código {self.manifiesto['version_codigo']}, "
+                f"el actual es {self.version}")
+            raise Exception(f"❌ Checkpoints de '{run_id}' obsoletos: el código cambió desde esa ejecución")
+
+        log.info(f"Reanudando ejecución {run_id} (etapas completadas: "
+            f"{', '.join(self.manifiesto['etapas']) or 'ninguna'})")
+
+    def _ultima_ejecucion(self) -> str:
+        """ID de la ejecución más reciente."""
+        ejecuciones = sorted(os.listdir(self.directorio)) if os.path.isdir(self.directorio) else []
+        if not ejecuciones:
+            raise Exception(f"❌ No hay ejecuciones en '{self.directorio}' para reanudar")
+        return ejecuciones[-1]
+
+    def _podar(self):
+        """Elimina las ejecuciones más antiguas por encima de MAX_EJECUCIONES."""
+        ejecuciones = sorted(os.listdir(self.directorio))
+        for run_id in ejecuciones[:-MAX_EJECUCIONES]:
+            shutil.rmtree(os.path.join(self.directorio, run_id), ignore_errors=True)
+            self.log.info(f"Checkpoints de la ejecución {run_id} eliminados")
+
+    def _guardar_manifiesto(self):
+        """Escribe el manifiesto de forma atómica."""
+        temporal = os.path.join(self.ruta, "manifiesto.json.tmp")
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump(self.manifiesto, f, indent=2)
+        os.replace(temporal, os.path.join(self.ruta, "manifiesto.json"))
+
+    def guardar(self, etapa: str, datos: dict):
+        """
+        Guarda las salidas de una etapa y la marca como completada. Las
+        etapas posteriores dejan de contar como completadas, porque dependían
+        de las salidas anteriores.
+
+        Args:
+            etapa: Nombre de la etapa (ver ETAPAS)
+            datos: {nombre: objeto} a guardar; cada objeto va en su propio pickle
+        """
+        for nombre, objeto in datos.items():
+            pd.to_pickle(objeto, os.path.join(self.ruta, f"{etapa}_{nombre}.pkl"))
+
+        for posterior in ETAPAS[ETAPAS.index(etapa) + 1:]:
+            self.manifiesto["etapas"].pop(posterior, None)
+        self.manifiesto["etapas"][etapa] = {
+            "fecha": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "objetos": list(datos),
+        }
+        self._guardar_manifiesto()
+        self.log.info(f"✅ Checkpoint de {etapa} guardado ({len(datos)} objetos)")
+
+    def cargar(self, etapa: str, nombres: list = None) -> dict:
+        """
+        Lee las salidas guardadas de una etapa.
+
+        Args:
+            etapa: Nombre de la etapa
+            nombres: Objetos a leer (None = todos)
+
+        Returns:
+            dict: {nombre: objeto}
+        """
+        if etapa not in self.manifiesto["etapas"]:
+            raise Exception(f"❌ La etapa '{etapa}' no tiene checkpoint en la ejecución {self.run_id}")
+
+        nombres = nombres or self.manifiesto["etapas"][etapa]["objetos"]
+        self.log.info(f"Leyendo checkpoint de {etapa}: {', '.join(nombres)}")
+        return {nombre: pd.read_pickle(os.path.join(self.ruta, f"{etapa}_{nombre}.pkl")) for nombre in nombres}
+
+    def registrar_carga(self, resultados: dict):
+        """
+        Registra el resultado de la carga por tabla, conservando las tablas
+        cargadas en intentos anteriores. La etapa queda completada cuando
+        todas las tablas se cargaron.
+        """
+        anteriores = self.manifiesto["etapas"].get("carga", {}).get("tablas", {})
+        tablas = {**anteriores, **resultados}
+        self.manifiesto["etapas"]["carga"] = {
+            "fecha": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "tablas": tablas,
+            "completada": all(tablas.values()),
+        }
+        self._guardar_manifiesto()
+
+    def tablas_fallidas(self) -> list:
+        """Tablas cuya carga falló en el último intento (vacía si aún no se cargó)."""
+        tablas = self.manifiesto["etapas"].get("carga", {}).get("tablas", {})
+        return [nombre for nombre, exitoso in tablas.items() if not exitoso]
+
+    def etapa_pendiente(self) -> str:
+        """Primera etapa sin completar (None si la ejecución terminó)."""
+        etapas = self.manifiesto["etapas"]
+        for etapa in ETAPAS:
+            if etapa == "carga":
+                return None if etapas.get("carga", {}).get("completada") else "carga"
+            if etapa not in etapas:
+                return etapa
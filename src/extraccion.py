@@ -1,8 +1,71 @@
+import hashlib
+import json
+import os
+import threading
+import time
 import pymongo
 import pandas as pd
+from pandas.api.types import union_categoricals
+from datetime import datetime
+from bson import ObjectId
+from concurrent.futures import ThreadPoolExecutor
 from logs import Logs
+from tipos import optimizar_tipos
+from metricas import medir
 
-__all__ = ['extraer_datos']
+try:
+    import pyarrow.feather as feather
+except ImportError:
+    feather = None
+
+__all__ = ['extraer_datos', 'consultar_por_chunks', 'leer_marcas', 'guardar_marcas']
+
+# Cantidad de documentos que se piden al cursor del servidor en cada lote
+BATCH_SIZE_DEFECTO = 50_000
+
+# Cantidad de IDs de listings por cada filtro $in del semi-join
+IDS_POR_FILTRO = 10_000
+
+# Hilos para consultar colecciones en paralelo (1 = secuencial)
+WORKERS_DEFECTO = 3
+
+# Particiones por rangos de 'listing_id' para las colecciones grandes
+PARTICIONES_DEFECTO = {"Calendar": 4}
+
+# Documentos muestreados por partición para calcular los límites de los rangos
+MUESTRA_POR_PARTICION = 200
+
+# Crear el índice de 'listing_id' en Reviews/Calendar si falta. Sin él, cada
+# filtro semi-join y cada rango de partición recorre la colección completa
+# (mongoimport solo crea el índice de _id). En False solo se advierte y las
+# particiones se hacen por rangos de _id.
+CREAR_INDICE_LISTING_ID = True
+
+# Campo que hace de marca de agua (high-water mark) de cada colección en el modo incremental
+MARCAS_AGUA = {"Listings": "last_scraped", "Reviews": "date", "Calendar": "_id"}
+
+# Archivo donde se guardan las marcas de agua de la última carga exitosa
+ARCHIVO_MARCAS = "marcas_agua.json"
+
+# Directorio de la cache local de colecciones extraídas en formato Feather
+# (requiere pyarrow). Es opcional, para iterar sobre la transformación sin
+# volver a leer MongoDB: extraer_datos solo la usa si se le pasa `cache`.
+DIRECTORIO_CACHE = "cache"
+
+# Campo cuyo máximo entra en la huella de la cache de cada colección, para
+# detectar re-scrapes que modifican documentos sin agregar nuevos
+CAMPOS_MODIFICACION = {"Listings": "last_scraped", "Reviews": "date", "Calendar": "date"}
+
+# Tamaño máximo del directorio de cache; se eliminan primero las entradas menos usadas
+CACHE_MAX_BYTES = 4 * 1024**3
+
+# Compresión de los archivos de cache ('lz4' descomprime más rápido que 'zstd')
+COMPRESION_CACHE = "lz4"
+
+_cache_lock = threading.Lock()
+
+# Compactar los dtypes de cada colección apenas se extrae (ver tipos.py)
+OPTIMIZAR_TIPOS = True
 
 def _conectar_mongo(log: Logs):
     """
@@ -38,17 +101,388 @@ def _conectar_mongo(log: Logs):
         raise Exception(f"❌ Error de conexión: {e}")
 
 
-def _consulta_mongo(conexion, coleccion: str, log: Logs):
+def _proyeccion(columnas: list = None):
+    """
+    Construye la proyección de MongoDB a partir de una lista de columnas.
+    
+    El campo _id siempre se excluye en el servidor; si no se indican columnas
+    se traen todos los demás campos.
+    """
+    proyeccion = {"_id": 0}
+    if columnas:
+        proyeccion.update({campo: 1 for campo in columnas})
+    return proyeccion
+
+
+def _filtros_semi_join(listing_ids, ids_por_filtro: int = IDS_POR_FILTRO):
+    """
+    Divide los IDs de listings válidos en filtros $in sobre 'listing_id'.
+    
+    Args:
+        listing_ids: IDs de listings que sobrevivieron la transformación
+        ids_por_filtro: Máximo de IDs por filtro
+        
+    Returns:
+        list: Filtros de MongoDB, uno por cada bloque de IDs
+    """
+    # tolist() convierte a int de Python, que es lo que BSON sabe codificar
+    ids = pd.unique(pd.Series(listing_ids).dropna()).tolist()
+    return [
+        {"listing_id": {"$in": ids[i:i + ids_por_filtro]}}
+        for i in range(0, len(ids), ids_por_filtro)
+    ]
+
+
+def _indice_listing_id(collection, coleccion: str, log: Logs) -> bool:
+    """
+    Verifica que la colección tenga un índice que empiece por 'listing_id' y,
+    si falta y CREAR_INDICE_LISTING_ID lo permite, lo crea.
+    
+    Returns:
+        bool: True si las consultas por 'listing_id' quedan respaldadas por un índice
+    """
+    for indice in collection.index_information().values():
+        if indice["key"][0][0] == "listing_id":
+            return True
+    
+    if not CREAR_INDICE_LISTING_ID:
+        log.warning(f"{coleccion} no tiene índice en 'listing_id': cada filtro por listing recorre la colección "
+            "completa (COLLSCAN)")
+        return False
+    
+    log.info(f"Creando índice en {coleccion}.listing_id (una sola vez)...")
+    inicio = time.perf_counter()
+    collection.create_index([("listing_id", pymongo.ASCENDING)])
+    log.info(f"✅ Índice creado en {time.perf_counter() - inicio:.2f} s")
+    return True
+
+
+def _rangos_particion(collection, campo: str, particiones: int):
+    """
+    Divide el espacio de valores de `campo` en rangos de tamaño similar.
+    
+    Los límites salen de los cuantiles de una muestra ($sample), por lo que se
+    adaptan a IDs con distribución muy sesgada. El primer rango se define como
+    "no mayor o igual al primer límite" para que también incluya documentos
+    sin el campo o con valores de otro tipo; así los rangos cubren toda la
+    colección sin solaparse. Con `campo` '_id' los límites son ObjectId.
+    
+    Args:
+        collection: Colección de MongoDB
+        campo: Campo por el cual particionar
+        particiones: Número de particiones deseado
+        
+    Returns:
+        list: Filtros de MongoDB, uno por rango (puede haber menos que `particiones`)
+    """
+    muestra = collection.aggregate([
+        {"$sample": {"size": particiones * MUESTRA_POR_PARTICION}},
+        {"$project": {"_id": 0, campo: 1}},
+    ])
+    tipos = (ObjectId,) if campo == "_id" else (int, float)
+    valores = sorted({doc[campo] for doc in muestra if isinstance(doc.get(campo), tipos)})
+    if not valores:
+        return [None]
+    
+    limites = sorted({valores[len(valores) * i // particiones] for i in range(1, particiones)})
+    if not limites:
+        return [None]
+    
+    rangos = [{"$nor": [{campo: {"$gte": limites[0]}}]}]
+    for inferior, superior in zip(limites, limites[1:]):
+        rangos.append({campo: {"$gte": inferior, "$lt": superior}})
+    rangos.append({campo: {"$gte": limites[-1]}})
+    return rangos
+
+
+def _codificar_marca(valor):
+    """Convierte una marca de agua a un valor serializable en JSON."""
+    if isinstance(valor, ObjectId):
+        return {"tipo": "objectid", "valor": str(valor)}
+    if isinstance(valor, datetime):
+        return {"tipo": "fecha", "valor": valor.isoformat()}
+    return {"tipo": "valor", "valor": valor}
+
+
+def _decodificar_marca(dato):
+    """Inverso de _codificar_marca."""
+    if dato["tipo"] == "objectid":
+        return ObjectId(dato["valor"])
+    if dato["tipo"] == "fecha":
+        return datetime.fromisoformat(dato["valor"])
+    return dato["valor"]
+
+
+def leer_marcas(ruta: str = ARCHIVO_MARCAS) -> dict:
+    """
+    Lee las marcas de agua de la última carga exitosa.
+    
+    Returns:
+        dict: {colección: valor}; vacío si aún no hay marcas (primera ejecución)
+    """
+    if not os.path.exists(ruta):
+        return {}
+    with open(ruta, encoding="utf-8") as f:
+        return {coleccion: _decodificar_marca(dato) for coleccion, dato in json.load(f).items()}
+
+
+def guardar_marcas(marcas: dict, ruta: str = ARCHIVO_MARCAS):
+    """
+    Guarda las marcas de agua. Debe llamarse solo después de una carga
+    exitosa, para que un fallo no haga saltar documentos en la siguiente
+    ejecución. El archivo se reemplaza de forma atómica.
+    """
+    temporal = f"{ruta}.tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump({coleccion: _codificar_marca(valor) for coleccion, valor in marcas.items()
+            if valor is not None}, f, indent=2)
+    os.replace(temporal, ruta)
+
+
+def _filtro_marca(campo: str, valor):
+    """
+    Filtro de MongoDB con los documentos nuevos o modificados desde la marca.
+    
+    Para '_id' la marca es exclusiva ($gt). Para fechas es inclusiva ($gte):
+    el día de la marca puede tener documentos que llegaron después de la
+    última extracción, y volver a cargarlos no duplica nada gracias al MERGE.
+    """
+    if valor is None:
+        return None
+    return {campo: {"$gt" if campo == "_id" else "$gte": valor}}
+
+
+def _valor_maximo(collection, campo: str):
+    """Valor máximo de `campo` en la colección (None si ningún documento lo tiene)."""
+    documento = collection.find_one({campo: {"$exists": True, "$ne": None}}, {campo: 1},
+        sort=[(campo, pymongo.DESCENDING)])
+    return None if documento is None else documento[campo]
+
+
+def _ruta_cache(directorio: str, coleccion: str, collection, proyeccion: dict, consultas: list) -> str:
+    """
+    Ruta de la entrada de cache para una consulta.
+    
+    La huella combina el conteo estimado de documentos, el _id máximo y el
+    máximo del campo de CAMPOS_MODIFICACION de la colección (last_scraped o
+    date) con la proyección y los filtros: insertar documentos, un re-scrape
+    que los modifica en sitio o cambiar la consulta invalidan la entrada. Las
+    modificaciones que no mueven ninguno de esos valores no se detectan;
+    para eso está --refresh.
+    """
+    ultimo = collection.find_one({}, {"_id": 1}, sort=[("_id", pymongo.DESCENDING)])
+    campo = CAMPOS_MODIFICACION.get(coleccion)
+    modificado = None
+    if campo is not None:
+        modificado = collection.find_one({campo: {"$ne": None}}, {"_id": 0, campo: 1}, sort=[(campo, pymongo.DESCENDING)])
+    huella = json.dumps([
+        collection.estimated_document_count(),
+        None if ultimo is None else ultimo["_id"],
+        None if modificado is None else modificado.get(campo),
+        proyeccion,
+        consultas,
+    ], default=str, sort_keys=True)
+    clave = hashlib.sha1(huella.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(directorio, f"{coleccion}_{clave}.feather")
+
+
+def _leer_cache(ruta: str) -> pd.DataFrame:
+    """Lee una entrada de cache con memory-map y la marca como usada recientemente."""
+    df = feather.read_table(ruta, memory_map=True).to_pandas()
+    os.utime(ruta)
+    return df
+
+
+def _escribir_cache(df: pd.DataFrame, ruta: str, log: Logs):
+    """
+    Guarda el DataFrame en la cache. Si alguna columna no se puede convertir
+    a Arrow (tipos mezclados) solo se registra una advertencia.
+    """
+    temporal = f"{ruta}.tmp"
+    try:
+        os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+        feather.write_feather(df, temporal, compression=COMPRESION_CACHE)
+        os.replace(temporal, ruta)
+        log.info(f"Guardado en cache: {ruta} ({os.path.getsize(ruta) / 1024**2:.2f} MB)")
+    except Exception as e:
+        log.warning(f"No se pudo guardar en cache {ruta}: {e}")
+        if os.path.exists(temporal):
+            os.remove(temporal)
+
+
+def _podar_cache(directorio: str, max_bytes: int, log: Logs):
+    """Elimina las entradas menos usadas hasta que la cache quepa en `max_bytes`."""
+    with _cache_lock:
+        entradas = [
+            os.path.join(directorio, nombre)
+            for nombre in os.listdir(directorio) if nombre.endswith(".feather")
+        ]
+        entradas.sort(key=os.path.getmtime)
+        total = sum(os.path.getsize(ruta) for ruta in entradas)
+        
+        for ruta in entradas:
+            if total <= max_bytes:
+                break
+            tamano = os.path.getsize(ruta)
+            os.remove(ruta)
+            total -= tamano
+            log.info(f"Cache: eliminada {os.path.basename(ruta)} ({tamano / 1024**2:.2f} MB)")
+
+
+def _combinar_filtros(*filtros):
+    """Combina filtros de MongoDB con $and, ignorando los vacíos."""
+    filtros = [f for f in filtros if f]
+    if not filtros:
+        return None
+    return filtros[0] if len(filtros) == 1 else {"$and": filtros}
+
+
+def _iterar_chunks(collection, batch_size: int, proyeccion: dict = None, filtro: dict = None):
+    """
+    Recorre el cursor del servidor por lotes y convierte cada lote en un DataFrame.
+    
+    Solo se mantiene en memoria un lote de documentos a la vez, de modo que
+    los dicts de Python se liberan en cuanto su lote pasa a formato columnar.
+    
+    Args:
+        collection: Colección de MongoDB a recorrer
+        batch_size: Número de documentos por lote
+        proyeccion: Proyección de MongoDB a aplicar en el servidor
+        filtro: Filtro de MongoDB a aplicar en el servidor
+        
+    Yields:
+        pd.DataFrame: Un chunk por cada lote de documentos
+    """
+    cursor = collection.find(filtro or {}, proyeccion, batch_size=batch_size)
+    try:
+        lote = []
+        for documento in cursor:
+            lote.append(documento)
+            if len(lote) >= batch_size:
+                yield pd.DataFrame(lote)
+                lote = []
+        if lote:
+            yield pd.DataFrame(lote)
+    finally:
+        cursor.close()
+
+
+def consultar_por_chunks(conexion, coleccion: str, log: Logs, batch_size: int = BATCH_SIZE_DEFECTO,
+    columnas: list = None):
+    """
+    Consulta una colección de MongoDB y retorna sus datos como chunks de DataFrame.
+    
+    Args:
+        conexion: Objeto de conexión a MongoDB
+        coleccion: Nombre de la colección a consultar
+        log: Instancia de la clase Logs para registro
+        batch_size: Número de documentos por chunk
+        columnas: Campos a traer de MongoDB (None = todos)
+        
+    Yields:
+        pd.DataFrame: Chunks de la colección (sin el campo _id)
+        
+    Raises:
+        Exception: Si hay error en la consulta
+    """
+    try:
+        db = conexion["AirbnMexico"]
+        
+        if coleccion not in db.list_collection_names():
+            log.warning(f"La colección '{coleccion}' no existe en la base de datos")
+            return
+        
+        yield from _iterar_chunks(db[coleccion], batch_size, _proyeccion(columnas))
+            
+    except pymongo.errors.PyMongoError as e:
+        log.error(f"Error de MongoDB al consultar '{coleccion}': {e}")
+        raise Exception(f"❌ Error de consulta en '{coleccion}': {e}")
+
+
+def _leer_consultas(collection, batch_size: int, proyeccion: dict, filtros: list, compactar=None):
+    """
+    Ejecuta los filtros uno tras otro y retorna todos los chunks leídos.
+    Cada chunk pasa por `compactar` apenas llega, así los dicts y textos sin
+    compactar de un lote se liberan antes de leer el siguiente.
+    """
+    return [
+        compactar(chunk) if compactar is not None else chunk
+        for filtro in filtros
+        for chunk in _iterar_chunks(collection, batch_size, proyeccion, filtro)
+    ]
+
+
+def _unir_chunks(chunks: list) -> pd.DataFrame:
+    """
+    Concatena los chunks de una colección en un solo DataFrame.
+    
+    Las columnas category se unen con union_categoricals: pd.concat las
+    convertiría a object cuando las categorías difieren entre chunks, y la
+    memoria ahorrada al compactar cada chunk se perdería en la unión.
+    """
+    if len(chunks) == 1:
+        return chunks[0]
+    
+    columnas = list(dict.fromkeys(col for chunk in chunks for col in chunk.columns))
+    categoricas = {
+        col: union_categoricals(_igualar_categorias([chunk[col] for chunk in chunks]), ignore_order=True)
+        for col in columnas
+        if all(col in chunk.columns and isinstance(chunk[col].dtype, pd.CategoricalDtype) for chunk in chunks)
+    }
+    df = pd.concat([chunk.drop(columns=list(categoricas)) for chunk in chunks], ignore_index=True)
+    for col, valores in categoricas.items():
+        df[col] = valores
+    return df[columnas]
+
+
+def _igualar_categorias(series: list) -> list:
+    """
+    Lleva las categorías de todas las series al mismo dtype, que
+    union_categoricals exige. Un chunk con la columna entera nula queda con
+    categorías object vacías mientras los demás tienen categorías str; si
+    aun así difieren, se usa object.
+    """
+    dtypes = {serie.cat.categories.dtype for serie in series if len(serie.cat.categories)}
+    destino = dtypes.pop() if len(dtypes) == 1 else object
+    return [
+        serie if serie.cat.categories.dtype == destino
+        else serie.cat.set_categories(serie.cat.categories.astype(destino))
+        for serie in series
+    ]
+
+
+def _consulta_mongo(conexion, coleccion: str, log: Logs, batch_size: int = BATCH_SIZE_DEFECTO,
+    columnas: list = None, filtros: list = None, particiones: int = 1, filtro_marca: dict = None,
+    cache: str = None, refrescar: bool = False):
     """
     Realiza consulta a una colección de MongoDB y retorna un DataFrame.
     
+    Los documentos se leen en lotes de `batch_size` y el DataFrame final se
+    arma concatenando los chunks, sin materializar la colección como lista.
+    Si se indican columnas, solo esos campos viajan desde el servidor; si se
+    indican filtros, se ejecuta una consulta por filtro y se unen los resultados.
+    
+    Con `particiones` > 1 la colección se divide en rangos de 'listing_id' que
+    se leen al mismo tiempo, cada uno con su propio cursor, y los chunks se
+    concatenan en el orden de los rangos. Los filtros y los rangos por
+    'listing_id' necesitan su índice (_indice_listing_id); si no lo hay, las
+    particiones se hacen por rangos de _id, que siempre está indexado.
+    
     Args:
         conexion: Objeto de conexión a MongoDB
         coleccion: Nombre de la colección a consultar
         log: Instancia de la clase Logs para registro
+        batch_size: Número de documentos por lote del cursor
+        columnas: Campos a traer de MongoDB (None = todos)
+        filtros: Lista de filtros de MongoDB (None = toda la colección)
+        particiones: Número de rangos ('listing_id' o _id) a leer en paralelo
+        filtro_marca: Filtro incremental que se combina con cada consulta
+        cache: Directorio de la cache local (None = sin cache)
+        refrescar: Ignorar la entrada de cache existente y volver a consultar
         
     Returns:
-        pd.DataFrame: Datos de la colección
+        pd.DataFrame: Datos de la colección (vacío con las columnas pedidas
+            si ningún documento coincide)
         
     Raises:
         Exception: Si hay error en la consulta
@@ -65,28 +499,86 @@ def _consulta_mongo(conexion, coleccion: str, log: Logs):
             log.warning(f"La colección '{coleccion}' no existe en la base de datos")
             return pd.DataFrame()
         
-        # Realizar consulta
-        log.info(f"Ejecutando consulta en {coleccion}...")
-        datos = collection.find()
-        df = pd.DataFrame(list(datos))
+        inicio = time.perf_counter()
+        medicion = medir(f"extraccion.{coleccion}")
+        proyeccion = _proyeccion(columnas)
+        consultas = [
+            _combinar_filtros(filtro_marca, filtro)
+            for filtro in (filtros if filtros is not None else [None])
+        ]
         
-        if df.empty:
-            log.warning(f"La colección '{coleccion}' está vacía")
-            return df
+        df = None
+        ruta_cache = None
+        if cache is not None:
+            ruta_cache = _ruta_cache(cache, coleccion, collection, proyeccion, consultas)
+            if refrescar:
+                log.info(f"Cache de {coleccion} ignorada (--refresh)")
+            elif os.path.exists(ruta_cache):
+                log.info(f"✅ Cache vigente para {coleccion}: {ruta_cache}")
+                df = _leer_cache(ruta_cache)
         
-        # Eliminar campo _id de MongoDB
-        if "_id" in df.columns:
-            df = df.drop(columns=["_id"])
-            log.info("Campo '_id' eliminado del DataFrame")
+        if df is None:
+            # Realizar consulta por lotes
+            log.info(f"Ejecutando consulta en {coleccion} (lotes de {batch_size:,} documentos)...")
+            if columnas:
+                log.info(f"Proyección en el servidor: {len(columnas)} campos")
+            log.info("Campo '_id' excluido en el servidor")
+            if filtros is not None:
+                log.info(f"Filtro semi-join en el servidor: {len(filtros):,} consultas $in")
+            if filtro_marca is not None:
+                log.info(f"Filtro incremental en el servidor: {filtro_marca}")
+            
+            # Los tipos se compactan por chunk para que la unión no duplique la colección sin compactar
+            compactar = None
+            if OPTIMIZAR_TIPOS:
+                compactar = lambda chunk: optimizar_tipos(chunk, coleccion, log, detalle=False)
+            
+            indexado = True
+            if filtros is not None or particiones > 1:
+                indexado = _indice_listing_id(collection, coleccion, log)
+            
+            if particiones > 1:
+                campo = "listing_id" if indexado else "_id"
+                rangos = _rangos_particion(collection, campo, particiones)
+                log.info(f"Lectura particionada por '{campo}': {len(rangos)} rangos en paralelo")
+                with ThreadPoolExecutor(max_workers=len(rangos), thread_name_prefix=f"particion_{coleccion}") as pool:
+                    futuros = [
+                        pool.submit(_leer_consultas, collection, batch_size, proyeccion,
+                            [_combinar_filtros(rango, filtro) for filtro in consultas], compactar)
+                        for rango in rangos
+                    ]
+                    chunks = [chunk for futuro in futuros for chunk in futuro.result()]
+            else:
+                chunks = _leer_consultas(collection, batch_size, proyeccion, consultas, compactar)
+            
+            if not chunks:
+                log.warning(f"La colección '{coleccion}' está vacía o ningún documento coincide con el filtro")
+                return pd.DataFrame(columns=columnas)
+            
+            log.info(f"Uniendo {len(chunks):,} chunks de {coleccion}...")
+            df = _unir_chunks(chunks)
+            del chunks
+            
+            if ruta_cache is not None:
+                _escribir_cache(df, ruta_cache, log)
+                _podar_cache(cache, CACHE_MAX_BYTES, log)
+        
+        if OPTIMIZAR_TIPOS:
+            # Ajusta los enteros que la unión de chunks ensanchó y compacta lo leído de la cache
+            df = optimizar_tipos(df, coleccion, log)
         
         # Información del DataFrame
         memoria_mb = df.memory_usage(deep=True).sum() / 1024**2
+        segundos = time.perf_counter() - inicio
+        medicion.terminar(df.shape[0])
         
-        log.info(f"✅ Consulta exitosa de {coleccion}")
-        log.info(f"   - Filas: {df.shape[0]:,}")
-        log.info(f"   - Columnas: {df.shape[1]}")
-        log.info(f"   - Memoria utilizada: {memoria_mb:.2f} MB")
-        log.info(f"   - Columnas: {list(df.columns)}")
+        with log.bloque():
+            log.info(f"✅ Consulta exitosa de {coleccion}")
+            log.info(f"   - Filas: {df.shape[0]:,}")
+            log.info(f"   - Columnas: {df.shape[1]}")
+            log.info(f"   - Memoria utilizada: {memoria_mb:.2f} MB")
+            log.info(f"   - Tiempo de consulta: {segundos:.2f} s")
+            log.info(f"   - Columnas: {list(df.columns)}")
         
         return df
         
@@ -98,15 +590,88 @@ def _consulta_mongo(conexion, coleccion: str, log: Logs):
         raise Exception(f"❌ Error de consulta en '{coleccion}': {e}")
 
 
-def extraer_datos(log: Logs):
+def _consultar_colecciones(conexion, colecciones: list, log: Logs, batch_size: int,
+    columnas: dict, filtros: list = None, workers: int = 1, particiones: dict = None,
+    filtros_marca: dict = None, cache: str = None, refrescar: bool = False):
+    """
+    Consulta varias colecciones, en paralelo con un pool de hilos si workers > 1.
+    
+    MongoClient es thread-safe y libera el GIL mientras espera al servidor,
+    así que las consultas se solapan sobre la misma conexión.
+    
+    Returns:
+        dict: {colección: DataFrame}
+    """
+    particiones = particiones or {}
+    filtros_marca = filtros_marca or {}
+    
+    if workers <= 1 or len(colecciones) == 1:
+        return {
+            coleccion: _consulta_mongo(conexion, coleccion, log, batch_size, columnas.get(coleccion),
+                filtros, particiones.get(coleccion, 1), filtros_marca.get(coleccion), cache, refrescar)
+            for coleccion in colecciones
+        }
+    
+    log.info(f"Consultando {', '.join(colecciones)} en paralelo ({min(workers, len(colecciones))} hilos)")
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="extraccion") as pool:
+        futuros = {
+            coleccion: pool.submit(_consulta_mongo, conexion, coleccion, log, batch_size,
+                columnas.get(coleccion), filtros, particiones.get(coleccion, 1), filtros_marca.get(coleccion),
+                cache, refrescar)
+            for coleccion in colecciones
+        }
+        return {coleccion: futuro.result() for coleccion, futuro in futuros.items()}
+
+
+def extraer_datos(log: Logs, batch_size: int = BATCH_SIZE_DEFECTO, columnas: dict = None,
+    transformar_listings=None, workers: int = WORKERS_DEFECTO, particiones: dict = None,
+    marcas: dict = None, cache: str = None, refrescar: bool = False, calendar: bool = True,
+    al_transformar_listings=None):
     """
     Función principal para extraer datos de MongoDB.
     Extrae las colecciones: listings, reviews y calendar.
     
+    Modo semi-join: si se indica `transformar_listings`, la transformación de
+    listings se ejecuta apenas se extrae Listings y los IDs que sobreviven se
+    envían como filtros $in a Reviews y Calendar, de modo que las filas
+    rechazadas nunca salen de MongoDB.
+    
+    Args:
+        log: Instancia de la clase Logs para registro
+        batch_size: Número de documentos por lote del cursor
+        columnas: Manifiesto {colección: [campos]} para la proyección (None = todos)
+        transformar_listings: Función (df_listings, log) -> tupla de tablas de
+            listings transformadas, cuyo primer elemento es df_listings limpio
+        workers: Hilos para consultar las colecciones en paralelo (1 = secuencial)
+        particiones: {colección: N} rangos de 'listing_id' a leer en paralelo
+            (None = PARTICIONES_DEFECTO)
+        marcas: Modo incremental. Marcas de agua {colección: valor} de la
+            última carga (ver leer_marcas); solo se extraen los documentos
+            nuevos o modificados desde ellas. Un dict vacío extrae todo y
+            calcula las marcas iniciales. No se combina con el semi-join.
+        cache: Directorio de la cache local de colecciones, p. ej.
+            DIRECTORIO_CACHE (None = sin cache, lo normal en producción)
+        refrescar: Volver a consultar MongoDB aunque haya cache vigente
+        calendar: Extraer Calendar. En False df_calendar sale vacío (con sus
+            columnas); lo usa el modo streaming, que lee Calendar por chunks
+        al_transformar_listings: Función (tablas_listings) que se llama en modo
+            semi-join apenas se transforma listings, antes de extraer Reviews y
+            Calendar (p. ej. para empezar a cargarlas mientras sigue la extracción)
+    
     Returns:
-        tuple: (df_listings, df_reviews, df_calendar)
+        tuple: (df_listings, df_reviews, df_calendar). En modo semi-join el
+            primer elemento es la tupla retornada por `transformar_listings`.
+            En modo incremental se agrega un cuarto elemento con las marcas
+            nuevas, que se guardan con guardar_marcas tras una carga exitosa.
     """
     conexion = None
+    columnas = columnas or {}
+    particiones = PARTICIONES_DEFECTO if particiones is None else particiones
+    incremental = marcas is not None
+    
+    if incremental and transformar_listings is not None:
+        raise ValueError("El modo incremental no admite semi-join: los reviews y calendar nuevos "
+            "pueden pertenecer a listings que no cambiaron")
     
     try:
         log.info("=" * 50)
@@ -116,25 +681,68 @@ def extraer_datos(log: Logs):
         # Conectar a MongoDB
         conexion = _conectar_mongo(log)
         
+        if cache is not None and feather is None:
+            log.warning("pyarrow no está instalado: la cache local de colecciones queda desactivada")
+            cache = None
+        
         # Extraer colecciones
         log.info("Extrayendo colecciones de la base de datos AirbnMexico...")
         
-        df_listings = _consulta_mongo(conexion, "Listings", log)
-        df_reviews = _consulta_mongo(conexion, "Reviews", log)
-        df_calendar = _consulta_mongo(conexion, "Calendar", log)
+        inicio = time.perf_counter()
         
-        # Validar que se extrajeron datos
-        log.separator()
-        log.info("Validando datos extraídos...")
+        filtros_marca = None
+        if incremental:
+            # Las marcas nuevas se toman antes de leer: lo que llegue durante la
+            # extracción se vuelve a leer en la siguiente ejecución
+            db = conexion["AirbnMexico"]
+            nuevas_marcas = {coleccion: _valor_maximo(db[coleccion], campo) for coleccion, campo in MARCAS_AGUA.items()}
+            filtros_marca = {coleccion: _filtro_marca(campo, marcas.get(coleccion)) for coleccion, campo in MARCAS_AGUA.items()}
+            log.info("Modo incremental (marcas de agua):")
+            for coleccion, campo in MARCAS_AGUA.items():
+                log.info(f"  - {coleccion}.{campo}: {marcas.get(coleccion, 'sin marca (extracción completa)')} -> {nuevas_marcas[coleccion]}")
+        
+        secundarias = ["Reviews", "Calendar"] if calendar else ["Reviews"]
+        if not calendar:
+            log.info("Calendar no se extrae aquí: se procesa por chunks en modo streaming")
         
-        if df_listings.empty:
+        if transformar_listings is None:
+            resultados = _consultar_colecciones(conexion, ["Listings"] + secundarias, log,
+                batch_size, columnas, workers=workers, particiones=particiones, filtros_marca=filtros_marca,
+                cache=cache, refrescar=refrescar)
+            df_listings = resultados["Listings"]
+        else:
+            df_listings = _consulta_mongo(conexion, "Listings", log, batch_size, columnas.get("Listings"),
+                cache=cache, refrescar=refrescar)
+        
+        if df_listings.empty and incremental:
+            log.warning("No hay listings nuevos o modificados desde la última carga")
+        elif df_listings.empty:
             log.error("La tabla 'listings' está vacía")
             raise Exception("No se pueden procesar datos sin listings")
         
+        filtros = None
+        if transformar_listings is not None:
+            log.separator()
+            log.info("Modo semi-join: transformando listings antes de extraer Reviews y Calendar")
+            tablas_listings = transformar_listings(df_listings, log)
+            if al_transformar_listings is not None:
+                al_transformar_listings(tablas_listings)
+            filtros = _filtros_semi_join(tablas_listings[0]['id'])
+            log.info(f"IDs de listings válidos a enviar a MongoDB: {tablas_listings[0]['id'].nunique():,}")
+            resultados = _consultar_colecciones(conexion, secundarias, log,
+                batch_size, columnas, filtros, workers, particiones, cache=cache, refrescar=refrescar)
+        
+        df_reviews = resultados["Reviews"]
+        df_calendar = resultados.get("Calendar", pd.DataFrame(columns=columnas.get("Calendar")))
+        
+        # Validar que se extrajeron datos
+        log.separator()
+        log.info("Validando datos extraídos...")
+        
         if df_reviews.empty:
             log.warning("La tabla 'reviews' está vacía")
         
-        if df_calendar.empty:
+        if df_calendar.empty and calendar:
             log.warning("La tabla 'calendar' está vacía")
         
         # Resumen final
@@ -151,7 +759,12 @@ def extraer_datos(log: Logs):
         ) / 1024**2
         
         log.info(f"  - Memoria total: {total_memoria:.2f} MB")
+        log.info(f"  - Tiempo total de extracción: {time.perf_counter() - inicio:.2f} s")
         
+        if transformar_listings is not None:
+            return tablas_listings, df_reviews, df_calendar
+        if incremental:
+            return df_listings, df_reviews, df_calendar, nuevas_marcas
         return df_listings, df_reviews, df_calendar
         
     except Exception as e:
@@ -0,0 +1,522 @@
+"""
+Generador de datos sintéticos de Airbnb con el esquema de Inside Airbnb.
+
+Produce las colecciones Listings, Reviews y Calendar tal como llegan de
+MongoDB (las 79 columnas de Listings del log de extracción, listas de
+amenities y host_verifications en texto, precios '$1,234.00', banderas
+'t'/'f' y campos vacíos como ''), con proporciones parecidas al dump de
+Ciudad de México: 365 días de calendar por listing, ~2.2 listings por host
+y ~52 reviews por listing. Los datos dependen solo de la escala y la semilla.
+
+La escala es el número de filas de Calendar (de 1k a 10M+); el resto de
+las colecciones se dimensiona a partir de ella.
+
+Uso:
+    python generador.py --escala 1m                 # resumen de lo que se generaría
+    python generador.py --escala 10m --mongo        # carga las colecciones en MongoDB local
+"""
+import argparse
+import json
+import math
+import time
+import numpy as np
+import pandas as pd
+from logs import Logs
+
+__all__ = ['generar_colecciones', 'generar_listings', 'generar_reviews', 'generar_calendar',
+    'calendar_por_chunks', 'listings_para_escala', 'leer_escala', 'cargar_mongo', 'COLUMNAS_LISTINGS', 'ESCALAS']
+
+# Columnas de Listings en el orden del dump de Inside Airbnb
+COLUMNAS_LISTINGS = ['id', 'listing_url', 'scrape_id', 'last_scraped', 'source', 'name', 'description',
+    'neighborhood_overview', 'picture_url', 'host_id', 'host_url', 'host_name', 'host_since', 'host_location',
+    'host_about', 'host_response_time', 'host_response_rate', 'host_acceptance_rate', 'host_is_superhost',
+    'host_thumbnail_url', 'host_picture_url', 'host_neighbourhood', 'host_listings_count',
+    'host_total_listings_count', 'host_verifications', 'host_has_profile_pic', 'host_identity_verified',
+    'neighbourhood', 'neighbourhood_cleansed', 'neighbourhood_group_cleansed', 'latitude', 'longitude',
+    'property_type', 'room_type', 'accommodates', 'bathrooms', 'bathrooms_text', 'bedrooms', 'beds', 'amenities',
+    'price', 'minimum_nights', 'maximum_nights', 'minimum_minimum_nights', 'maximum_minimum_nights',
+    'minimum_maximum_nights', 'maximum_maximum_nights', 'minimum_nights_avg_ntm', 'maximum_nights_avg_ntm',
+    'calendar_updated', 'has_availability', 'availability_30', 'availability_60', 'availability_90',
+    'availability_365', 'calendar_last_scraped', 'number_of_reviews', 'number_of_reviews_ltm',
+    'number_of_reviews_l30d', 'availability_eoy', 'number_of_reviews_ly', 'estimated_occupancy_l365d',
+    'estimated_revenue_l365d', 'first_review', 'last_review', 'review_scores_rating', 'review_scores_accuracy',
+    'review_scores_cleanliness', 'review_scores_checkin', 'review_scores_communication', 'review_scores_location',
+    'review_scores_value', 'license', 'instant_bookable', 'calculated_host_listings_count',
+    'calculated_host_listings_count_entire_homes', 'calculated_host_listings_count_private_rooms',
+    'calculated_host_listings_count_shared_rooms', 'reviews_per_month']
+
+COLUMNAS_REVIEWS = ['listing_id', 'id', 'date', 'reviewer_id', 'reviewer_name', 'comments']
+
+COLUMNAS_CALENDAR = ['listing_id', 'date', 'available', 'price', 'adjusted_price', 'minimum_nights', 'maximum_nights']
+
+# Escalas con nombre (filas de Calendar)
+ESCALAS = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000, "10m": 10_000_000, "100m": 100_000_000}
+
+# Días de calendar por listing y fecha del scrape (primer día del calendar)
+DIAS_CALENDAR = 365
+FECHA_SCRAPE = "2025-06-28"
+
+# Proporciones del dump de Ciudad de México (26,401 listings, 11,897 hosts, 1.39M reviews)
+LISTINGS_POR_HOST = 2.2
+REVIEWS_POR_LISTING = 52
+LISTINGS_SIN_REVIEWS = 0.18
+
+# Amenities distintos del catálogo y promedio por listing
+AMENITIES_DISTINTOS = 5_400
+AMENITIES_POR_LISTING = 36
+
+# Listings por chunk de Calendar. Es fijo para que el resultado no dependa de cómo se consuma.
+LISTINGS_POR_CHUNK = 2_000
+
+# Documentos por insert_many al cargar en MongoDB
+DOCUMENTOS_POR_LOTE = 50_000
+
+_ALCALDIAS = ["Cuauhtémoc", "Miguel Hidalgo", "Benito Juárez", "Coyoacán", "Álvaro Obregón", "Tlalpan",
+    "Iztapalapa", "Gustavo A. Madero", "Venustiano Carranza", "Azcapotzalco", "Iztacalco", "Cuajimalpa de Morelos",
+    "Xochimilco", "La Magdalena Contreras", "Tláhuac", "Milpa Alta"]
+_TIPOS_PROPIEDAD = ["Entire rental unit", "Private room in home", "Entire condo", "Entire home",
+    "Private room in rental unit", "Entire loft", "Entire serviced apartment", "Private room in casa particular",
+    "Room in hotel", "Shared room in hostel", "Entire guesthouse", "Tiny home"]
+_TIPOS_CUARTO = ["Entire home/apt", "Private room", "Hotel room", "Shared room"]
+_BANOS = ["1 bath", "1.5 baths", "2 baths", "2.5 baths", "3 baths", "1 private bath", "1 shared bath",
+    "Half-bath", "Shared half-bath", "0 baths", ""]
+_VERIFICACIONES = ["['email', 'phone']", "['phone']", "['email', 'phone', 'work_email']", "['phone', 'work_email']",
+    "['email']", "None", "[]"]
+_NOMBRES = ["Ana", "Luis", "María", "José", "Carlos", "Sofía", "Lucía", "Pedro", "Fernanda", "Diego", "Valeria",
+    "Jorge", "Daniela", "Alejandro", "Gabriela", "Ricardo", "Mariana", "Javier", "Paola", "Miguel", "Andrea",
+    "Eduardo", "Camila", "Roberto", "Ximena", "David", "Laura", "Fernando", "Isabel", "Arturo"]
+_TIEMPOS_RESPUESTA = ["within an hour", "within a few hours", "within a day", "a few days or more", "N/A"]
+_COMENTARIOS = ["Excelente lugar, muy limpio y bien ubicado.", "Great place, would stay again!",
+    "Muy buena comunicación con el anfitrión.<br/>El departamento es tal cual las fotos.",
+    "Everything was perfect.", "Buena ubicación, algo de ruido por la noche.", "Lugar cómodo y seguro.",
+    "The host was very responsive and helpful.", "Todo excelente, 100% recomendado.",
+    "Nice apartment in a great neighborhood.<br/><br/>Check-in was easy.", "Muy limpio.", ""]
+
+# Amenities frecuentes (con las variantes de mayúsculas y espacios del dump) y plantillas de la cola larga
+_AMENITIES_COMUNES = ["Wifi", "Kitchen", "Essentials", "Hot water", "Hangers", "Hair dryer", "Dishes and silverware",
+    "Bed linens", "Iron", "Microwave", "Refrigerator", "Cooking basics", "Smoke alarm", "Shampoo", "TV",
+    "Dedicated workspace", "Long term stays allowed", "Coffee maker", "First aid kit", "Self check-in",
+    "Fire extinguisher", "Elevator", "Washer", "Hot water kettle", "Dining table", "Carbon monoxide alarm",
+    "Free street parking", "Private entrance", "Room-darkening shades", "Lockbox", "Wine glasses", "Oven",
+    "Stove", "Cleaning products", "Body soap", "Shower gel", "Extra pillows and blankets", "Security cameras on property",
+    "Free parking on premises", "Luggage dropoff allowed", "Paid parking off premises", "Books and reading material",
+    "Ceiling fan", "Portable fans", "Heating", "Air conditioning", "Pets allowed", "Patio or balcony", "Gym",
+    "wifi", "Wifi ", "kitchen", "TV ", "Cocina", "Agua caliente"]
+_MARCAS = ["Samsung", "LG", "Whirlpool", "Mabe", "Nespresso", "Dolce Gusto", "Sony", "Philips", "Bosch", "Oster",
+    "Hamilton Beach", "Pantene", "Dove", "Palmolive", "Herbal Essences", "L'Oréal", "Bose", "JBL", "Xiaomi", "Haier"]
+_OBJETOS = ["refrigerator", "stainless steel oven", "gas stove", "induction stove", "coffee maker", "shampoo",
+    "conditioner", "body soap", "sound system with Bluetooth and aux", "washer", "dryer", "microwave",
+    "electric stove", "hair dryer", "blender", "toaster", "TV", "air conditioning"]
+_SERVICIOS = ["Netflix", "Amazon Prime Video", "Disney+", "HBO Max", "Roku", "Chromecast", "standard cable",
+    "Apple TV", "Fire TV"]
+
+
+def leer_escala(texto: str) -> int:
+    """Convierte '1m', '10m', '250k' o '500000' en filas de Calendar."""
+    texto = str(texto).strip().lower().replace("_", "")
+    if texto in ESCALAS:
+        return ESCALAS[texto]
+    multiplicadores = {"k": 1_000, "m": 1_000_000}
+    if texto and texto[-1] in multiplicadores:
+        return int(float(texto[:-1]) * multiplicadores[texto[-1]])
+    return int(texto)
+
+
+def listings_para_escala(filas_calendar: int, dias: int = DIAS_CALENDAR) -> int:
+    """Listings necesarios para que Calendar tenga (al menos) `filas_calendar` filas."""
+    return max(math.ceil(filas_calendar / dias), 1)
+
+
+def _rng(semilla: int, coleccion: int, chunk: int = 0) -> np.random.Generator:
+    """Generador independiente por colección y chunk, para que cada parte sea reproducible por sí sola."""
+    return np.random.default_rng([semilla, coleccion, chunk])
+
+
+def _elegir(rng: np.random.Generator, valores: list, n: int, p: list = None) -> np.ndarray:
+    """Elige n valores (arreglo object) con probabilidades opcionales."""
+    return np.array(valores, dtype=object)[rng.choice(len(valores), n, p=p)]
+
+
+def _vaciar(rng: np.random.Generator, valores: np.ndarray, fraccion: float) -> np.ndarray:
+    """
+    Reemplaza una fracción de los valores por ''. mongoimport guarda así los
+    campos vacíos del CSV, también en columnas numéricas (que quedan mixtas).
+    """
+    return _solo_si(rng.random(len(valores)) >= fraccion, valores)
+
+
+def _solo_si(condicion: np.ndarray, valores: np.ndarray) -> np.ndarray:
+    """Deja los valores donde se cumple la condición y '' en el resto (arreglo object)."""
+    valores = valores.astype(object)
+    valores[~condicion] = ""
+    return valores
+
+
+def _fechas(dias: np.ndarray) -> np.ndarray:
+    """Días desde 1970-01-01 -> textos 'YYYY-MM-DD' (arreglo object)."""
+    return np.datetime_as_string(dias.astype("datetime64[D]")).astype(object)
+
+
+def _precios(valores: np.ndarray) -> np.ndarray:
+    """Montos -> textos '$1,234.00' como en el dump."""
+    return np.array([f"${v:,.2f}" for v in valores], dtype=object)
+
+
+def _banderas(rng: np.random.Generator, n: int, p_verdadero: float, vacios: float = 0.0) -> np.ndarray:
+    """Banderas 't'/'f' con una fracción de vacíos ''."""
+    return _vaciar(rng, np.where(rng.random(n) < p_verdadero, "t", "f").astype(object), vacios)
+
+
+def _catalogo_amenities(rng: np.random.Generator) -> tuple:
+    """
+    Catálogo de amenities y sus probabilidades: los frecuentes primero y una
+    cola larga de variantes con marca ('Samsung refrigerator', '55 inch HDTV
+    with Netflix') que casi no se repiten entre listings.
+    """
+    cola = {f"{marca} {objeto}" for marca in _MARCAS for objeto in _OBJETOS}
+    cola |= {f"{objeto} – {marca}" for marca in _MARCAS for objeto in _OBJETOS}
+    cola |= {f"{pulgadas} inch {tv} with {servicio}" for pulgadas in range(24, 86) for tv in ["HDTV", "TV"]
+        for servicio in _SERVICIOS}
+    cola |= {f"{a}, {b}, {c}" for a in _SERVICIOS for b in _SERVICIOS for c in _SERVICIOS if len({a, b, c}) == 3}
+    cola |= {f"Fast wifi – {mbps} Mbps" for mbps in range(1, 2_500)}
+    cola = sorted(cola)
+    rng.shuffle(cola)
+    catalogo = _AMENITIES_COMUNES + cola[:max(AMENITIES_DISTINTOS - len(_AMENITIES_COMUNES), 0)]
+    # 85 % de las elecciones entre los frecuentes; el resto con probabilidad decreciente en la cola
+    cola = 1 / np.arange(1, len(catalogo) - len(_AMENITIES_COMUNES) + 1)
+    pesos = np.concatenate([np.full(len(_AMENITIES_COMUNES), 0.85 / len(_AMENITIES_COMUNES)), 0.15 * cola / cola.sum()])
+    return np.array(catalogo, dtype=object), pesos / pesos.sum()
+
+
+def _listas_amenities(rng: np.random.Generator, n: int) -> np.ndarray:
+    """Listas de amenities en texto JSON ('["Wifi", "Kitchen"]'), una por listing."""
+    catalogo, pesos = _catalogo_amenities(rng)
+    # Se eligen de más porque los repetidos se descartan
+    largos = np.clip(rng.normal(AMENITIES_POR_LISTING * 1.5, 15, n), 0, 120).astype(int)
+    elegidos = rng.choice(len(catalogo), int(largos.sum()), p=pesos)
+    # Los repetidos dentro de una lista se descartan conservando el orden
+    return np.array([json.dumps(catalogo[list(dict.fromkeys(parte))].tolist(), ensure_ascii=False)
+        for parte in np.split(elegidos, np.cumsum(largos)[:-1])], dtype=object)
+
+
+def generar_listings(listings: int, semilla: int = 42) -> pd.DataFrame:
+    """
+    Genera la colección Listings con las 79 columnas del dump.
+
+    Los datos del host se repiten igual en todos sus listings. Hay hosts sin
+    nombre, sin ubicación o con verificaciones 'None', listings sin reviews,
+    con reviews de más de un año y sin precio, para que las limpiezas de la
+    transformación eliminen filas como con los datos reales.
+
+    Args:
+        listings: Número de listings
+        semilla: Semilla de los datos aleatorios
+
+    Returns:
+        pd.DataFrame: Listings con los tipos que produce la extracción
+    """
+    rng = _rng(semilla, 1)
+    n = listings
+    scrape = np.datetime64(FECHA_SCRAPE, "D").astype(np.int64)
+
+    # IDs: los listings antiguos tienen IDs cortos y los recientes de 18 dígitos
+    recientes = rng.random(n) < 0.4
+    ids = np.where(recientes, 10**18 + rng.choice(10**17, n, replace=False),
+        10_000 + rng.choice(60 * n, n, replace=False)).astype(np.int64)
+
+    # Hosts: cada uno con sus atributos, repartidos entre sus listings
+    hosts = max(round(n / LISTINGS_POR_HOST), 1)
+    host_ids = (1_000 + rng.choice(300 * hosts, hosts, replace=False)).astype(np.int64)
+    # Cada host tiene al menos un listing; los demás se reparten con pocos hosts de muchos listings
+    host = rng.permutation(np.concatenate([np.arange(min(hosts, n)), rng.zipf(1.6, max(n - hosts, 0)) % hosts]))
+    host_verificadas = rng.random(hosts) < 0.9
+    atributos_host = {
+        'host_id': host_ids,
+        'host_url': np.array([f"https://www.airbnb.com/users/show/{h}" for h in host_ids], dtype=object),
+        'host_name': _vaciar(rng, _elegir(rng, _NOMBRES, hosts), 0.02),
+        'host_since': _fechas(scrape - rng.integers(30, 15 * 365, hosts)),
+        'host_location': _vaciar(rng, _elegir(rng, ["Mexico City, Mexico", "Mexico", "Guadalajara, Mexico",
+            "Los Angeles, CA", "Madrid, Spain"], hosts, p=[0.7, 0.15, 0.05, 0.05, 0.05]), 0.15),
+        'host_about': _vaciar(rng, np.array([f"Hola, soy anfitrión desde hace {a} años." for a in
+            rng.integers(1, 15, hosts)], dtype=object), 0.4),
+        'host_response_time': _elegir(rng, _TIEMPOS_RESPUESTA, hosts, p=[0.6, 0.15, 0.08, 0.02, 0.15]),
+        'host_response_rate': _elegir(rng, ["100%", "98%", "90%", "75%", "N/A"], hosts, p=[0.6, 0.1, 0.08, 0.07, 0.15]),
+        'host_acceptance_rate': _elegir(rng, ["100%", "95%", "87%", "60%", "N/A"], hosts, p=[0.4, 0.2, 0.15, 0.1, 0.15]),
+        'host_is_superhost': _banderas(rng, hosts, 0.3, vacios=0.01),
+        'host_thumbnail_url': np.array([f"https://a0.muscache.com/im/users/{h}/profile_pic/small.jpg" for h in host_ids], dtype=object),
+        'host_picture_url': np.array([f"https://a0.muscache.com/im/users/{h}/profile_pic/x_medium.jpg" for h in host_ids], dtype=object),
+        'host_neighbourhood': _vaciar(rng, _elegir(rng, ["Roma Norte", "Condesa", "Polanco", "Juárez", "Del Valle",
+            "Coyoacán", "Narvarte"], hosts), 0.3),
+        'host_listings_count': rng.zipf(1.8, hosts).clip(1, 500),
+        'host_verifications': np.where(host_verificadas,
+            _elegir(rng, _VERIFICACIONES[:5], hosts, p=[0.6, 0.2, 0.12, 0.05, 0.03]),
+            _elegir(rng, _VERIFICACIONES[5:], hosts, p=[0.7, 0.3])),
+        'host_has_profile_pic': _banderas(rng, hosts, 0.97),
+        'host_identity_verified': _banderas(rng, hosts, 0.85),
+    }
+    atributos_host['host_total_listings_count'] = atributos_host['host_listings_count'] + rng.integers(0, 3, hosts)
+
+    # Reviews: ~18 % sin reviews; de los demás, ~20 % con la última de hace más de un año
+    numero_reviews = np.where(rng.random(n) < LISTINGS_SIN_REVIEWS, 0,
+        rng.negative_binomial(0.8, 0.8 / (0.8 + REVIEWS_POR_LISTING / (1 - LISTINGS_SIN_REVIEWS)), n) + 1)
+    con_reviews = numero_reviews > 0
+    ultima = scrape - np.where(rng.random(n) < 0.2, rng.integers(366, 6 * 365, n), rng.integers(0, 365, n))
+    primera = ultima - (rng.random(n) * np.minimum(numero_reviews, 200) * 30).astype(np.int64)
+    puntajes = lambda: _solo_si(con_reviews, rng.normal(4.75, 0.25, n).clip(1, 5).round(2))
+
+    tipo_cuarto = _elegir(rng, _TIPOS_CUARTO, n, p=[0.7, 0.27, 0.02, 0.01])
+    minimo_noches = rng.choice([1, 1, 1, 2, 2, 3, 5, 7, 30], n)
+    maximo_noches = rng.choice([30, 90, 365, 1125], n)
+    precio = np.exp(rng.normal(7.0, 0.7, n)).round()
+    disponibilidad = rng.integers(0, 366, n)
+    campos = {
+        'id': ids,
+        'listing_url': np.array([f"https://www.airbnb.com/rooms/{i}" for i in ids], dtype=object),
+        'scrape_id': np.full(n, 20250628013620, dtype=np.int64),
+        'last_scraped': _fechas(scrape - rng.integers(0, 2, n)),
+        'source': _elegir(rng, ["city scrape", "previous scrape"], n, p=[0.85, 0.15]),
+        'name': np.array([f"{t} en {a}" for t, a in zip(_elegir(rng, ["Departamento", "Loft", "Casa", "Cuarto",
+            "Estudio", "Suite"], n), _elegir(rng, _ALCALDIAS, n))], dtype=object),
+        'description': _vaciar(rng, _elegir(rng, ["Hermoso departamento cerca de todo.<br /><br />Ideal para parejas.",
+            "Cozy loft in the heart of the city.", "Casa amplia con jardín y estacionamiento.",
+            "Cuarto privado con baño propio."], n), 0.03),
+        'neighborhood_overview': _vaciar(rng, _elegir(rng, ["Colonia tranquila y segura.",
+            "Walking distance to parks, cafes and museums.", "Zona con mucha vida nocturna."], n), 0.45),
+        'picture_url': np.array([f"https://a0.muscache.com/pictures/{i}.jpg" for i in ids], dtype=object),
+        **{campo: valores[host] for campo, valores in atributos_host.items()},
+        'neighbourhood': _vaciar(rng, np.full(n, "Mexico City, Distrito Federal, Mexico", dtype=object), 0.45),
+        'neighbourhood_cleansed': _elegir(rng, _ALCALDIAS, n, p=np.linspace(16, 1, 16) / np.linspace(16, 1, 16).sum()),
+        'neighbourhood_group_cleansed': np.full(n, "", dtype=object),
+        'latitude': rng.normal(19.41, 0.05, n).round(6),
+        'longitude': rng.normal(-99.16, 0.05, n).round(6),
+        'property_type': _elegir(rng, _TIPOS_PROPIEDAD, n),
+        'room_type': tipo_cuarto,
+        'accommodates': rng.integers(1, 17, n),
+        'bathrooms': _vaciar(rng, rng.choice([0.5, 1.0, 1.5, 2.0, 3.0], n), 0.1),
+        'bathrooms_text': _elegir(rng, _BANOS, n, p=[0.45, 0.1, 0.12, 0.05, 0.03, 0.1, 0.07, 0.03, 0.02, 0.01, 0.02]),
+        'bedrooms': _vaciar(rng, rng.integers(0, 6, n), 0.05),
+        'beds': _vaciar(rng, rng.integers(0, 8, n), 0.05),
+        'amenities': _listas_amenities(rng, n),
+        'price': _vaciar(rng, _precios(precio), 0.1),
+        'minimum_nights': minimo_noches,
+        'maximum_nights': maximo_noches,
+        'minimum_minimum_nights': minimo_noches,
+        'maximum_minimum_nights': minimo_noches,
+        'minimum_maximum_nights': maximo_noches,
+        'maximum_maximum_nights': maximo_noches,
+        'minimum_nights_avg_ntm': minimo_noches.astype(float),
+        'maximum_nights_avg_ntm': maximo_noches.astype(float),
+        'calendar_updated': np.full(n, "", dtype=object),
+        'has_availability': _vaciar(rng, np.full(n, "t", dtype=object), 0.05),
+        'availability_30': np.minimum(disponibilidad, 30),
+        'availability_60': np.minimum(disponibilidad, 60),
+        'availability_90': np.minimum(disponibilidad, 90),
+        'availability_365': disponibilidad,
+        'calendar_last_scraped': np.full(n, FECHA_SCRAPE, dtype=object),
+        'number_of_reviews': numero_reviews,
+        'number_of_reviews_ltm': np.minimum(numero_reviews, rng.integers(0, 60, n)),
+        'number_of_reviews_l30d': np.minimum(numero_reviews, rng.integers(0, 6, n)),
+        'availability_eoy': np.minimum(disponibilidad, 186),
+        'number_of_reviews_ly': np.minimum(numero_reviews, rng.integers(0, 60, n)),
+        'estimated_occupancy_l365d': rng.integers(0, 256, n),
+        'estimated_revenue_l365d': _solo_si(con_reviews, precio * rng.integers(0, 256, n)),
+        'first_review': _solo_si(con_reviews, _fechas(primera)),
+        'last_review': _solo_si(con_reviews, _fechas(ultima)),
+        'review_scores_rating': puntajes(),
+        'review_scores_accuracy': puntajes(),
+        'review_scores_cleanliness': puntajes(),
+        'review_scores_checkin': puntajes(),
+        'review_scores_communication': puntajes(),
+        'review_scores_location': puntajes(),
+        'review_scores_value': puntajes(),
+        'license': np.full(n, "", dtype=object),
+        'instant_bookable': _banderas(rng, n, 0.45),
+        'calculated_host_listings_count': atributos_host['host_listings_count'][host],
+        'calculated_host_listings_count_entire_homes': np.where(tipo_cuarto == "Entire home/apt",
+            atributos_host['host_listings_count'][host], 0),
+        'calculated_host_listings_count_private_rooms': np.where(tipo_cuarto == "Private room",
+            atributos_host['host_listings_count'][host], 0),
+        'calculated_host_listings_count_shared_rooms': np.zeros(n, dtype=np.int64),
+        'reviews_per_month': _solo_si(con_reviews, (numero_reviews / np.maximum((scrape - primera) / 30, 1)).round(2)),
+    }
+    return pd.DataFrame(campos, columns=COLUMNAS_LISTINGS)
+
+
+def generar_reviews(df_listings: pd.DataFrame, semilla: int = 42) -> pd.DataFrame:
+    """
+    Genera la colección Reviews: number_of_reviews reviews por listing, con
+    fechas entre first_review y last_review.
+
+    La mayoría de los reviewers tiene un solo review; los que tienen varios
+    a veces aparecen con otro nombre, y unos pocos sin nombre.
+
+    Args:
+        df_listings: Listings generados con generar_listings
+        semilla: Semilla de los datos aleatorios
+
+    Returns:
+        pd.DataFrame: Reviews con los tipos que produce la extracción
+    """
+    rng = _rng(semilla, 2)
+    cantidades = df_listings['number_of_reviews'].to_numpy()
+    n = int(cantidades.sum())
+    listing = np.repeat(np.arange(len(df_listings)), cantidades)
+
+    primera = pd.to_datetime(df_listings['first_review'].replace("", None)).to_numpy().astype("datetime64[D]")
+    ultima = pd.to_datetime(df_listings['last_review'].replace("", None)).to_numpy().astype("datetime64[D]")
+    desde = primera.astype(np.int64)[listing]
+    hasta = ultima.astype(np.int64)[listing]
+    fechas = desde + (rng.random(n) * (hasta - desde + 1)).astype(np.int64)
+
+    reviewers = max(int(n * 1.4), 1)
+    reviewer_ids = rng.integers(1, 700_000_000, n, dtype=np.int64) % reviewers * 7 + 1_000
+    nombres = np.array(_NOMBRES, dtype=object)[(reviewer_ids + (rng.random(n) < 0.05) * rng.integers(1, 4, n)) % len(_NOMBRES)]
+    nombres[rng.random(n) < 0.002] = ""
+
+    # IDs de review crecientes: cortos hasta 2022 y de 18 dígitos después
+    orden = np.argsort(fechas, kind="stable")
+    ids = np.empty(n, dtype=np.int64)
+    ids[orden] = np.arange(n, dtype=np.int64)
+    recientes = fechas >= np.datetime64("2022-01-01", "D").astype(np.int64)
+    ids = np.where(recientes, 6 * 10**17 + ids * 1_000 + rng.integers(0, 1_000, n), 30_000 + ids * 13)
+
+    return pd.DataFrame({
+        'listing_id': df_listings['id'].to_numpy()[listing],
+        'id': ids,
+        'date': _fechas(fechas),
+        'reviewer_id': reviewer_ids,
+        'reviewer_name': nombres,
+        'comments': _elegir(rng, _COMENTARIOS, n),
+    }, columns=COLUMNAS_REVIEWS)
+
+
+def calendar_por_chunks(df_listings: pd.DataFrame, semilla: int = 42, dias: int = DIAS_CALENDAR):
+    """
+    Genera Calendar por chunks de LISTINGS_POR_CHUNK listings (dias filas
+    cada uno), sin tener la colección completa en memoria.
+
+    La disponibilidad va en rachas de días 't'/'f'; el precio del día es el
+    del listing y a veces uno ajustado.
+
+    Yields:
+        pd.DataFrame: Un chunk de Calendar con los tipos que produce la extracción
+    """
+    fechas = _fechas(np.datetime64(FECHA_SCRAPE, "D").astype(np.int64) + np.arange(dias))
+    for numero, desde in enumerate(range(0, len(df_listings), LISTINGS_POR_CHUNK)):
+        rng = _rng(semilla, 3, numero)
+        bloque = df_listings.iloc[desde:desde + LISTINGS_POR_CHUNK]
+        n = len(bloque) * dias
+        listing = np.repeat(np.arange(len(bloque)), dias)
+
+        # Rachas: cada día cambia la disponibilidad con probabilidad 0.1
+        cambios = rng.random(n) < 0.1
+        cambios[::dias] = rng.random(len(bloque)) < 0.5
+        acumulados = np.cumsum(cambios)
+        acumulados -= np.repeat(acumulados[::dias] - cambios[::dias], dias)
+        disponible = np.where(acumulados % 2 == 0, "t", "f").astype(object)
+
+        precio = bloque['price'].to_numpy(dtype=object)[listing]
+        ajustado = rng.random(n) < 0.05
+        precio[ajustado] = _precios(np.exp(rng.normal(7.0, 0.7, int(ajustado.sum()))).round())
+        precio[precio == ""] = "$1,000.00"
+
+        yield pd.DataFrame({
+            'listing_id': bloque['id'].to_numpy()[listing],
+            'date': np.tile(fechas, len(bloque)),
+            'available': disponible,
+            'price': precio,
+            'adjusted_price': np.full(n, "", dtype=object),
+            'minimum_nights': bloque['minimum_nights'].to_numpy()[listing],
+            'maximum_nights': bloque['maximum_nights'].to_numpy()[listing],
+        }, columns=COLUMNAS_CALENDAR)
+
+
+def generar_calendar(df_listings: pd.DataFrame, semilla: int = 42, dias: int = DIAS_CALENDAR) -> pd.DataFrame:
+    """Genera la colección Calendar completa (ver calendar_por_chunks)."""
+    return pd.concat(list(calendar_por_chunks(df_listings, semilla, dias)), ignore_index=True)
+
+
+def generar_colecciones(filas_calendar: int, semilla: int = 42, dias: int = DIAS_CALENDAR) -> dict:
+    """
+    Genera las tres colecciones para una escala.
+
+    Args:
+        filas_calendar: Filas de Calendar (se redondea a un múltiplo de `dias`)
+        semilla: Semilla de los datos aleatorios
+        dias: Días de calendar por listing
+
+    Returns:
+        dict: {'Listings': df, 'Reviews': df, 'Calendar': df}
+    """
+    df_listings = generar_listings(listings_para_escala(filas_calendar, dias), semilla)
+    return {
+        "Listings": df_listings,
+        "Reviews": generar_reviews(df_listings, semilla),
+        "Calendar": generar_calendar(df_listings, semilla, dias),
+    }
+
+
+def cargar_mongo(filas_calendar: int, log: Logs, semilla: int = 42, dias: int = DIAS_CALENDAR,
+    reemplazar: bool = False):
+    """
+    Genera las colecciones y las inserta en la base de MongoDB que lee la extracción.
+
+    Calendar se genera e inserta por chunks, así que se puede cargar a escalas
+    mayores que la memoria disponible.
+
+    Raises:
+        Exception: Si alguna colección ya tiene datos y no se pidió reemplazar
+    """
+    from extraccion import _conectar_mongo
+
+    conexion = _conectar_mongo(log)
+    try:
+        db = conexion["AirbnMexico"]
+        for coleccion in ["Listings", "Reviews", "Calendar"]:
+            if db[coleccion].estimated_document_count() > 0:
+                if not reemplazar:
+                    log.error(f"La colección {coleccion} ya tiene datos")
+                    raise Exception(f"❌ {coleccion} no está vacía; usar --reemplazar para borrarla")
+                log.warning(f"Se borra la colección {coleccion}")
+                db[coleccion].drop()
+
+        df_listings = generar_listings(listings_para_escala(filas_calendar, dias), semilla)
+        partes = {
+            "Listings": [df_listings],
+            "Reviews": [generar_reviews(df_listings, semilla)],
+            "Calendar": calendar_por_chunks(df_listings, semilla, dias),
+        }
+        for coleccion, chunks in partes.items():
+            inicio = time.perf_counter()
+            total = 0
+            for df in chunks:
+                for desde in range(0, len(df), DOCUMENTOS_POR_LOTE):
+                    db[coleccion].insert_many(df.iloc[desde:desde + DOCUMENTOS_POR_LOTE].to_dict("records"), ordered=False)
+                total += len(df)
+            log.info(f"✅ {coleccion}: {total:,} documentos en {time.perf_counter() - inicio:.2f} s")
+    finally:
+        conexion.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera datos sintéticos de Airbnb")
+    parser.add_argument("--escala", default="1m", help=f"filas de Calendar: {', '.join(ESCALAS)} o un número")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--dias", type=int, default=DIAS_CALENDAR, help="días de calendar por listing")
+    parser.add_argument("--mongo", action="store_true", help="insertar las colecciones en MongoDB (localhost:27017)")
+    parser.add_argument("--reemplazar", action="store_true", help="borrar las colecciones existentes antes de insertar")
+    args = parser.parse_args()
+
+    filas = leer_escala(args.escala)
+    if args.mongo:
+        log = Logs(script_name="generador")
+        try:
+            cargar_mongo(filas, log, args.semilla, args.dias, args.reemplazar)
+        finally:
+            log.close()
+    else:
+        inicio = time.perf_counter()
+        for nombre, df in generar_colecciones(filas, args.semilla, args.dias).items():
+            print(f"{nombre}: {len(df):,} filas, {df.shape[1]} columnas, "
+                f"{df.memory_usage(deep=True).sum() / 1024**2:,.1f} MB")
+        print(f"Generado en {time.perf_counter() - inicio:.2f} s")
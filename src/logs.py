@@ -1,4 +1,7 @@
+import atexit
 import os
+import queue
+import threading
 from datetime import datetime
 from enum import Enum
 
@@ -11,18 +14,32 @@ class Logs:
     """
     Clase para gestionar logs de ejecución del proceso ETL.
     Genera archivos de log con timestamp y registra mensajes con diferentes niveles.
+
+    En modo buffer el archivo se abre una sola vez y las líneas las escribe
+    un hilo en segundo plano que las recibe por una cola, así registrar no
+    paga un open/close ni un print por línea. El formato del archivo es el
+    mismo; los mensajes de ERROR y close() esperan a que todo lo anterior
+    quede escrito en disco.
     """
     
-    def __init__(self, log_dir: str = "logs", script_name: str = "etl"):
+    def __init__(self, log_dir: str = "logs", script_name: str = "etl",
+                 buffer: bool = False, consola: bool = True):
         """
         Inicializa el sistema de logs.
         
         Args:
             log_dir: Directorio donde se guardarán los logs (relativo al proyecto)
             script_name: Nombre del script para identificar el archivo de log
+            buffer: Escribir con un hilo en segundo plano y un único archivo abierto
+            consola: Imprimir también los mensajes en consola
         """
         self.log_dir = log_dir
         self.script_name = script_name
+        self.buffer = buffer
+        self.consola = consola
+        
+        # Permite registrar desde varios hilos sin mezclar líneas ni bloques
+        self._lock = threading.RLock()
         
         # Verificar que el directorio de logs existe
         if not os.path.exists(self.log_dir):
@@ -37,6 +54,14 @@ class Logs:
         
         # Inicializar archivo de log
         self._write_header()
+        
+        if buffer:
+            self._archivo = open(self.log_file, 'a', encoding='utf-8')
+            self._cola = queue.Queue()
+            self._escritor = threading.Thread(target=self._escribir_cola, name="logs", daemon=True)
+            self._escritor.start()
+            # Si el proceso termina sin close(), lo que quede en la cola no se pierde
+            atexit.register(self.flush)
     
     def _write_header(self):
         """Escribe el encabezado del archivo de log."""
@@ -46,6 +71,47 @@ class Logs:
             f.write(f"Fecha de inicio: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
             f.write("=" * 80 + "\n\n")
     
+    def _escribir_cola(self):
+        """
+        Hilo escritor del modo buffer: escribe las líneas de la cola en el
+        archivo abierto y lo vacía a disco cuando la cola queda vacía o
+        cuando se lo piden con un Event.
+        """
+        while True:
+            item = self._cola.get()
+            if item is None:
+                break
+            if isinstance(item, threading.Event):
+                self._archivo.flush()
+                item.set()
+                continue
+            linea, imprimir = item
+            self._archivo.write(linea)
+            if imprimir:
+                print(linea.strip())
+            if self._cola.empty():
+                self._archivo.flush()
+        self._archivo.flush()
+    
+    def _emitir(self, linea: str, imprimir: bool):
+        """Escribe una línea en el archivo (o la encola en modo buffer)."""
+        imprimir = imprimir and self.consola
+        if self.buffer:
+            self._cola.put((linea, imprimir))
+            return
+        with open(self.log_file, 'a', encoding='utf-8') as f:
+            f.write(linea)
+        if imprimir:
+            print(linea.strip())
+    
+    def flush(self):
+        """En modo buffer, espera a que todas las líneas encoladas estén en disco."""
+        if not self.buffer or not self._escritor.is_alive():
+            return
+        escrito = threading.Event()
+        self._cola.put(escrito)
+        escrito.wait()
+    
     def _write_log(self, level: LogLevel, message: str):
         """
         Escribe un mensaje en el archivo de log.
@@ -57,11 +123,12 @@ class Logs:
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         log_entry = f"[{timestamp}] [{level.value}] {message}\n"
         
-        with open(self.log_file, 'a', encoding='utf-8') as f:
-            f.write(log_entry)
+        with self._lock:
+            self._emitir(log_entry, imprimir=True)
         
-        # También imprimir en consola
-        print(log_entry.strip())
+        # Un error puede preceder a una caída: se asegura que quede en disco
+        if level is LogLevel.ERROR:
+            self.flush()
     
     def info(self, message: str):
         """Registra un mensaje informativo."""
@@ -77,13 +144,26 @@ class Logs:
     
     def separator(self):
         """Escribe una línea separadora en el log."""
-        with open(self.log_file, 'a', encoding='utf-8') as f:
-            f.write("-" * 80 + "\n")
+        with self._lock:
+            self._emitir("-" * 80 + "\n", imprimir=False)
+    
+    def bloque(self):
+        """
+        Retorna un context manager que mantiene juntas las líneas registradas
+        dentro de él cuando varios hilos escriben en el log.
+        """
+        return self._lock
     
     def close(self):
         """Cierra el archivo de log con un mensaje de finalización."""
+        if self.buffer and self._escritor.is_alive():
+            self._cola.put(None)
+            self._escritor.join()
+            self._archivo.close()
+            atexit.unregister(self.flush)
         with open(self.log_file, 'a', encoding='utf-8') as f:
             f.write("\n" + "=" * 80 + "\n")
             f.write(f"Fecha de finalización: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
             f.write("=" * 80 + "\n")
-        print(f"\nLog guardado en: {self.log_file}")
\ No newline at end of file
+        if self.consola:
+            print(f"\nLog guardado en: {self.log_file}")
\ No newline at end of file
@@ -1,26 +1,224 @@
+import argparse
+import os
+import time
 from extraccion import *
+from extraccion import DIRECTORIO_CACHE
 from transformacion import *
 from carga import *
+from carga import CARGA_DIFERIDA
+from checkpoints import Checkpoints, ETAPAS
+from pipeline import calendar_streaming
+from orquestador import CargaAnticipada
 from logs import Logs
+import metricas
 
-def main():
+# Transformar listings durante la extracción y filtrar Reviews/Calendar en MongoDB
+SEMI_JOIN = True
+
+# Extraer solo lo nuevo desde las marcas de agua y cargarlo con MERGE.
+# En False se hace la recarga completa de siempre.
+INCREMENTAL = False
+
+# Cargar calendar como rangos de días (tabla calendar_ranges + vista vw_calendar)
+# en lugar de una fila por día
+CALENDAR_RANGOS = False
+
+# Procesar Calendar por chunks de punta a punta (extracción -> transformación
+# -> carga) después de cargar las demás tablas, sin tenerlo completo en memoria.
+# Solo con recarga completa; no se combina con INCREMENTAL ni CALENDAR_RANGOS.
+CALENDAR_STREAMING = False
+
+# En modo semi-join, cargar las tablas de listings mientras se extraen Reviews y Calendar
+SOLAPAR_ETAPAS = True
+
+# Reutilizar la cache local de colecciones entre ejecuciones (--cache). Pensada
+# para iterar sobre la transformación; en producción se lee siempre MongoDB.
+CACHE_EXTRACCION = False
+
+# Escribir el log con un hilo en segundo plano (un solo archivo abierto)
+LOG_BUFFER = True
+
+# Nombres de las tablas que produce transformacion_df, en su orden de retorno
+TABLAS = ["df_listings", "df_reviews", "df_calendar", "df_host", "df_verification",
+    "df_amenities_listings", "df_amenities", "df_reviewer"]
+
+def _nombres_carga(rangos: bool) -> list:
+    """Nombres de las tablas de SQL Server que carga cargar_datos (con calendar en rangos o diario)."""
+    nombres = [nombre[3:] for nombre in TABLAS]
+    if rangos:
+        nombres[nombres.index("calendar")] = "calendar_ranges"
+    return nombres
+
+def _guardar_metricas(log: Logs, datos: dict):
+    """Escribe el reporte de métricas de la ejecución junto al archivo de log."""
+    try:
+        ruta_json, ruta_csv = metricas.guardar_reporte(os.path.splitext(log.log_file)[0] + "_metricas", datos)
+        log.info(f"Reporte de métricas: {ruta_json} y {ruta_csv}")
+    except OSError as e:
+        log.warning(f"No se pudo escribir el reporte de métricas: {e}")
+
+def main(refrescar: bool = False, reanudar: str = None, desde: str = None, consola: bool = True,
+    cache: bool = CACHE_EXTRACCION):
+    """
+    Ejecuta el ETL completo. Con `cache` las colecciones extraídas se guardan
+    en una cache local y se reutilizan mientras MongoDB no cambie; con
+    `refrescar` se ignora la entrada vigente.
+
+    Las salidas de la extracción y la transformación se guardan como
+    checkpoints. Con `reanudar` (ID de ejecución o 'ultimo') se retoma esa
+    ejecución desde su primera etapa pendiente, o desde `desde` si se indica;
+    si la carga había fallado en algunas tablas, solo se reintentan esas.
+    Con `consola` en False los mensajes solo se escriben en el archivo de log.
+    Las métricas de rendimiento de cada etapa y paso se guardan en un reporte
+    JSON/CSV junto al log (ver metricas.py).
+    """
+    reporte = None
+    anticipada = None
+    estado_diferido = None
     try:
 
-        log = Logs(script_name="ejecucion")
+        log = Logs(script_name="ejecucion", buffer=LOG_BUFFER, consola=consola)
         log.separator()
         log.separator()
-        df_listings, df_reviews, df_calendar = extraer_datos(log)
+        checkpoints = Checkpoints(log, reanudar)
+        metricas.reiniciar()
+        reporte = {"run_id": checkpoints.run_id, "modos": {"semi_join": SEMI_JOIN, "incremental": INCREMENTAL,
+            "calendar_rangos": CALENDAR_RANGOS, "calendar_streaming": CALENDAR_STREAMING, "solapar_etapas": SOLAPAR_ETAPAS}}
+        inicio = desde or checkpoints.etapa_pendiente()
+        if inicio is None:
+            log.info(f"La ejecución {checkpoints.run_id} ya está completa; no hay nada que reanudar")
+            return
+        etapa = ETAPAS.index(inicio)
+        cache = DIRECTORIO_CACHE if cache else None
+        inicio_ejecucion = time.perf_counter()
+        streaming = CALENDAR_STREAMING and not INCREMENTAL
+        if CALENDAR_STREAMING and INCREMENTAL:
+            log.warning("CALENDAR_STREAMING no se combina con INCREMENTAL: calendar se procesa completo")
+
+        if etapa == 0:
+            medicion = metricas.medir("extraccion")
+            listings_existentes = None
+            marcas = None
+            if INCREMENTAL:
+                tablas_listings = None
+                df_listings, df_reviews, df_calendar, marcas = extraer_datos(log, columnas=COLUMNAS_EXTRACCION, marcas=leer_marcas(), cache=cache, refrescar=refrescar)
+                listings_existentes = listings_cargados(log)
+            elif SEMI_JOIN:
+                if SOLAPAR_ETAPAS:
+                    if CARGA_DIFERIDA:
+                        # Fase 1 una sola vez para la carga anticipada y la del resto de las tablas;
+                        # la fase 3 se corre al cerrar la ejecución
+                        estado_diferido = iniciar_carga_diferida(_nombres_carga(CALENDAR_RANGOS and not streaming), log)
+                    anticipada = CargaAnticipada(log, tablock=CARGA_DIFERIDA)
+                tablas_listings, df_reviews, df_calendar = extraer_datos(log, columnas=COLUMNAS_EXTRACCION, transformar_listings=transformacion_listings, cache=cache, refrescar=refrescar, calendar=not streaming,
+                    al_transformar_listings=anticipada.iniciar if anticipada else None)
+                if anticipada is not None and not anticipada.iniciada:
+                    anticipada = None
+                df_listings = None
+            else:
+                tablas_listings = None
+                df_listings, df_reviews, df_calendar = extraer_datos(log, columnas=COLUMNAS_EXTRACCION, cache=cache, refrescar=refrescar,
+                    calendar=not streaming)
+            medicion.terminar()
+            checkpoints.guardar("extraccion", {"df_listings": df_listings, "tablas_listings": tablas_listings,
+                "df_reviews": df_reviews, "df_calendar": df_calendar, "listings_existentes": listings_existentes,
+                "marcas": marcas})
+        elif etapa == 1:
+            extraidos = checkpoints.cargar("extraccion")
+            df_listings, tablas_listings, df_reviews, df_calendar, listings_existentes = (extraidos[nombre] for nombre in
+                ["df_listings", "tablas_listings", "df_reviews", "df_calendar", "listings_existentes"])
         log.separator()
         log.separator()
-        df_listings, df_reviews, df_calendar, df_host, df_verification, df_amenities_listings, df_amenities, df_reviewer = transformacion_df(df_listings, df_reviews, df_calendar, log)
+        if etapa <= 1:
+            medicion = metricas.medir("transformacion")
+            tablas = dict(zip(TABLAS, transformacion_df(df_listings, df_reviews, df_calendar, log, tablas_listings, listings_existentes)))
+            if CALENDAR_RANGOS and not streaming:
+                tablas["df_calendar_ranges"] = calendar_rangos(tablas["df_calendar"], log)
+            medicion.terminar(sum(len(df) for df in tablas.values()))
+            checkpoints.guardar("transformacion", tablas)
+        else:
+            tablas = checkpoints.cargar("transformacion")
         log.separator()
         log.separator()
-        cargar_datos(df_listings, df_reviews, df_calendar, df_host, df_verification, df_amenities_listings, df_amenities, df_reviewer, log)
+        medicion = metricas.medir("carga")
+        # Al reanudar una carga incompleta sin indicar etapa, solo se reintentan las tablas que fallaron
+        solo_tablas = (checkpoints.tablas_fallidas() or None) if desde is None else None
+        if streaming or anticipada is not None:
+            solo_tablas = solo_tablas or _nombres_carga("df_calendar_ranges" in tablas)
+        if streaming:
+            # calendar no viene en las tablas transformadas: se carga aparte al final
+            solo_tablas = [n for n in solo_tablas if n != "calendar"]
+            if CARGA_DIFERIDA and estado_diferido is None:
+                # Fase 1 para las tablas y también para calendar, que se carga después de
+                # cargar_datos; la fase 3 se corre al cerrar la ejecución
+                estado_diferido = iniciar_carga_diferida(solo_tablas + ["calendar"], log)
+        resultados = {}
+        if anticipada is not None:
+            # Las tablas de listings ya se cargaron (o se están terminando de cargar) en segundo plano
+            resultados, solo_tablas = anticipada.esperar(solo_tablas)
+        if solo_tablas is None or solo_tablas:
+            # Con la fase 1 ya hecha (carga anticipada o streaming) solo falta cargar con TABLOCK
+            diferida = {"carga_diferida": False, "tablock": True} if estado_diferido is not None else {}
+            resultados.update(cargar_datos(*(tablas[nombre] for nombre in TABLAS), log, incremental=INCREMENTAL,
+                solo_tablas=solo_tablas, df_calendar_ranges=tablas.get("df_calendar_ranges"), **diferida))
+        if streaming:
+            log.separator()
+            log.separator()
+            # Si listings no se recargó ahora es porque ya se había cargado en un intento anterior
+            if resultados.get("listings", True):
+                try:
+                    calendar_streaming(tablas["df_listings"]["id"], log)
+                    resultados["calendar"] = True
+                except Exception as e:
+                    log.error(f"Error en el streaming de calendar: {e}")
+                    resultados["calendar"] = False
+            else:
+                log.warning("Tabla calendar omitida: falló la carga de listings")
+                resultados["calendar"] = False
+        medicion.terminar()
+        checkpoints.registrar_carga(resultados)
+        if INCREMENTAL:
+            # Las marcas solo avanzan si todo se cargó; si no, se reintenta desde las anteriores
+            if not checkpoints.tablas_fallidas():
+                guardar_marcas(checkpoints.cargar("extraccion", ["marcas"])["marcas"])
+                log.info("Marcas de agua actualizadas")
+            else:
+                log.warning("Carga incompleta: las marcas de agua no se actualizan")
+        if anticipada is not None:
+            total = time.perf_counter() - inicio_ejecucion
+            log.info(f"Tiempo total con etapas solapadas: {total:.2f} s "
+                f"(secuencial estimado: {total + anticipada.ahorro:.2f} s, {anticipada.ahorro:.2f} s menos)")
+        if checkpoints.tablas_fallidas():
+            log.warning(f"Para reintentar solo las tablas fallidas: python main.py --reanudar {checkpoints.run_id}")
         log.separator()
         log.separator()
 
     finally:
+        if anticipada is not None:
+            anticipada.finalizar()
+        if estado_diferido is not None:
+            try:
+                terminar_carga_diferida(estado_diferido, log)
+            except Exception as e:
+                log.error(f"Error al restaurar índices y FKs de la carga diferida: {e}")
+        if reporte is not None:
+            _guardar_metricas(log, reporte)
         log.close()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="ETL Airbnb México")
+    parser.add_argument("--cache", action="store_true",
+        help="reutilizar la cache local de colecciones (para iterar sobre la transformación)")
+    parser.add_argument("--refresh", action="store_true",
+        help="con --cache, volver a consultar MongoDB aunque la cache local esté vigente")
+    parser.add_argument("--reanudar", nargs="?", const="ultimo", metavar="RUN_ID",
+        help="reanudar una ejecución desde sus checkpoints (sin valor = la más reciente)")
+    parser.add_argument("--desde", choices=ETAPAS,
+        help="etapa desde la que reanudar (por defecto la primera pendiente)")
+    parser.add_argument("--sin-consola", action="store_true",
+        help="no imprimir los mensajes del log en consola (solo en el archivo)")
+    args = parser.parse_args()
+    if args.desde and not args.reanudar:
+        parser.error("--desde requiere --reanudar")
+    main(refrescar=args.refresh, reanudar=args.reanudar, desde=args.desde, consola=not args.sin_consola,
+        cache=args.cache or CACHE_EXTRACCION)
@@ -0,0 +1,213 @@
+"""
+Métricas de rendimiento del ETL por etapa y por paso.
+
+Cada medición registra tiempo real, tiempo de CPU, filas de entrada y de
+salida, filas por segundo y el pico de memoria (RSS) del proceso. Al final de
+la ejecución se escribe un reporte JSON y CSV junto al log.
+
+Comparar dos ejecuciones:
+    python metricas.py logs/log_ejecucion_A_metricas.json logs/log_ejecucion_B_metricas.json
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+from datetime import datetime
+import pandas as pd
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+__all__ = ['medir', 'reiniciar', 'mediciones', 'guardar_reporte', 'comparar_reportes']
+
+# Aumento relativo de tiempo o memoria a partir del cual un paso cuenta como regresión
+UMBRAL_REGRESION = 0.20
+
+# Diferencia mínima en segundos para marcar una regresión de tiempo (evita ruido en pasos cortos)
+SEGUNDOS_MINIMOS = 0.5
+
+_lock = threading.Lock()
+_mediciones = []
+_inicio_ejecucion = time.perf_counter()
+
+
+def _rss_pico_mb():
+    """
+    Pico de memoria residente del proceso hasta ahora, en MB (None si no se
+    puede medir). En Linux/macOS usa resource; en Windows, psutil si está instalado.
+    """
+    if resource is not None:
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reporta KB y macOS bytes
+        return pico / 1024**2 if sys.platform == "darwin" else pico / 1024
+    if psutil is not None:
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss) / 1024**2
+    return None
+
+
+class Medicion:
+    """
+    Una medición en curso. Se cierra con terminar() o al salir del bloque
+    `with`; solo las mediciones cerradas aparecen en el reporte.
+    """
+
+    def __init__(self, nombre: str, filas_entrada: int = None):
+        self.nombre = nombre
+        self.filas_entrada = filas_entrada
+        self.filas_salida = None
+        self._inicio = time.perf_counter()
+        self._cpu = time.process_time()
+        self._terminada = False
+
+    def terminar(self, filas_salida: int = None):
+        """Cierra la medición y la agrega a las de la ejecución."""
+        if self._terminada:
+            return
+        self._terminada = True
+        if filas_salida is not None:
+            self.filas_salida = filas_salida
+        segundos = time.perf_counter() - self._inicio
+        filas = self.filas_salida if self.filas_salida is not None else self.filas_entrada
+        registro = {
+            "nombre": self.nombre,
+            "inicio_s": round(self._inicio - _inicio_ejecucion, 3),
+            "segundos": round(segundos, 3),
+            # CPU de todo el proceso: incluye los hilos que corren en paralelo
+            "cpu_segundos": round(time.process_time() - self._cpu, 3),
+            "filas_entrada": self.filas_entrada,
+            "filas_salida": self.filas_salida,
+            "filas_por_segundo": round(filas / segundos) if filas is not None and segundos > 0 else None,
+            "rss_pico_mb": _rss_pico_mb(),
+            "hilo": threading.current_thread().name,
+        }
+        with _lock:
+            _mediciones.append(registro)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, valor, traza):
+        # Un paso que falló no se reporta como si hubiera terminado
+        if tipo is None:
+            self.terminar()
+        return False
+
+
+def medir(nombre: str, filas_entrada: int = None) -> Medicion:
+    """
+    Inicia una medición. Se usa como bloque `with` (asignando filas_salida
+    dentro) o llamando a terminar(filas_salida) al final del paso.
+
+    Args:
+        nombre: Etapa y paso separados por puntos, p. ej. 'carga.calendar.insercion'
+        filas_entrada: Filas que recibe el paso
+    """
+    return Medicion(nombre, filas_entrada)
+
+
+def reiniciar():
+    """Descarta las mediciones anteriores; el inicio de la ejecución pasa a ser ahora."""
+    global _inicio_ejecucion
+    with _lock:
+        _mediciones.clear()
+        _inicio_ejecucion = time.perf_counter()
+
+
+def mediciones() -> list:
+    """Copia de las mediciones registradas, en orden de cierre."""
+    with _lock:
+        return list(_mediciones)
+
+
+def guardar_reporte(ruta_base: str, datos: dict = None, registros: list = None) -> tuple:
+    """
+    Escribe el reporte de la ejecución en `ruta_base`.json y `ruta_base`.csv.
+
+    Args:
+        ruta_base: Ruta sin extensión (p. ej. la del log con sufijo _metricas)
+        datos: Información adicional de la ejecución para el JSON (run_id, modos, ...)
+        registros: Mediciones a escribir (por defecto las de la ejecución)
+
+    Returns:
+        tuple: (ruta del JSON, ruta del CSV)
+    """
+    if registros is None:
+        registros = mediciones()
+    reporte = {
+        "fecha": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        **(datos or {}),
+        "mediciones": registros,
+    }
+    ruta_json, ruta_csv = f"{ruta_base}.json", f"{ruta_base}.csv"
+    with open(ruta_json, "w", encoding="utf-8") as f:
+        json.dump(reporte, f, indent=2, ensure_ascii=False)
+    pd.DataFrame(registros, columns=["nombre", "inicio_s", "segundos", "cpu_segundos", "filas_entrada",
+        "filas_salida", "filas_por_segundo", "rss_pico_mb", "hilo"]).to_csv(ruta_csv, index=False)
+    return ruta_json, ruta_csv
+
+
+def _leer_reporte(ruta: str) -> pd.DataFrame:
+    """Mediciones de un reporte JSON, agregadas por nombre (suma de tiempos, máximo de memoria)."""
+    with open(ruta, encoding="utf-8") as f:
+        df = pd.DataFrame(json.load(f)["mediciones"])
+    return df.groupby("nombre", sort=False).agg(
+        segundos=("segundos", "sum"),
+        cpu_segundos=("cpu_segundos", "sum"),
+        filas_salida=("filas_salida", "sum"),
+        rss_pico_mb=("rss_pico_mb", "max"),
+    )
+
+
+def comparar_reportes(ruta_base: str, ruta_nueva: str, umbral: float = UMBRAL_REGRESION,
+    segundos_minimos: float = SEGUNDOS_MINIMOS, memoria: bool = True) -> pd.DataFrame:
+    """
+    Compara dos reportes JSON paso por paso.
+
+    Un paso es regresión si su tiempo creció más que `umbral` (relativo) y
+    más que `segundos_minimos`, o (con `memoria`) si el pico de memoria creció
+    más que `umbral`.
+
+    Returns:
+        pd.DataFrame: Una fila por paso con los valores de ambas ejecuciones,
+            la variación relativa y la columna booleana 'regresion'
+    """
+    base, nueva = _leer_reporte(ruta_base), _leer_reporte(ruta_nueva)
+    df = base.join(nueva, how="outer", lsuffix="_base", rsuffix="_nuevo")
+    # Orden de ejecución de la referencia; los pasos nuevos al final
+    df = df.reindex(list(base.index) + [nombre for nombre in nueva.index if nombre not in base.index])
+    df["variacion_tiempo"] = df["segundos_nuevo"] / df["segundos_base"] - 1
+    df["variacion_rss"] = df["rss_pico_mb_nuevo"] / df["rss_pico_mb_base"] - 1
+    lento = (df["variacion_tiempo"] > umbral) & (df["segundos_nuevo"] - df["segundos_base"] > segundos_minimos)
+    df["regresion"] = lento | (df["variacion_rss"] > umbral) if memoria else lento
+    return df
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compara los reportes de métricas de dos ejecuciones")
+    parser.add_argument("base", help="reporte JSON de la ejecución de referencia")
+    parser.add_argument("nuevo", help="reporte JSON de la ejecución a evaluar")
+    parser.add_argument("--umbral", type=float, default=UMBRAL_REGRESION,
+        help="aumento relativo que cuenta como regresión (0.2 = 20 %%)")
+    parser.add_argument("--segundos-minimos", type=float, default=SEGUNDOS_MINIMOS,
+        help="diferencia mínima de tiempo para marcar una regresión")
+    args = parser.parse_args()
+
+    comparacion = comparar_reportes(args.base, args.nuevo, args.umbral, args.segundos_minimos)
+    with pd.option_context("display.max_rows", None, "display.max_columns", None, "display.width", 200):
+        print(comparacion[["segundos_base", "segundos_nuevo", "variacion_tiempo",
+            "rss_pico_mb_base", "rss_pico_mb_nuevo", "regresion"]].round(3))
+
+    regresiones = comparacion.index[comparacion["regresion"]].tolist()
+    if regresiones:
+        print(f"\n❌ {len(regresiones)} pasos con regresión: {', '.join(regresiones)}")
+        sys.exit(1)
+    print("\n✅ Sin regresiones")
@@ -0,0 +1,122 @@
+import threading
+import time
+from carga import DEPENDENCIAS, cargar_datos
+from logs import Logs
+
+__all__ = ['CargaAnticipada', 'TABLAS_LISTINGS']
+
+# Tablas que salen solo de listings (transformacion_listings), en orden padre -> hija
+TABLAS_LISTINGS = ["host", "verification", "amenities", "listings", "amenities_listings"]
+
+
+class CargaAnticipada:
+    """
+    Carga las tablas de listings en un hilo mientras sigue el resto del ETL.
+
+    En modo semi-join listings se extrae y transforma en segundos, pero
+    Reviews y Calendar tardan minutos en extraerse. Con `iniciar` como
+    callback de extraer_datos (al_transformar_listings), host, verification,
+    amenities, listings y amenities_listings se cargan en SQL Server mientras
+    MongoDB todavía entrega Reviews y Calendar. Las tablas hijas (reviews,
+    calendar) se cargan después de `esperar`, así se mantiene el orden padre
+    -> hija de DEPENDENCIAS.
+
+    La carga anticipada no hace la carga diferida por su cuenta: las fases 1
+    y 3 (iniciar_carga_diferida / terminar_carga_diferida) las corre quien la
+    usa una sola vez, alrededor de esta carga y la del resto de las tablas.
+    """
+
+    def __init__(self, log: Logs, **opciones_carga):
+        """
+        Args:
+            log: Instancia de la clase Logs para registro
+            opciones_carga: Argumentos adicionales para cargar_datos
+        """
+        self.log = log
+        self.opciones_carga = dict(opciones_carga, carga_diferida=False)
+        self.resultados = {}
+        self.error = None
+        self.segundos = 0.0
+        self.espera = 0.0
+        self._hilo = None
+
+    def iniciar(self, tablas_listings: tuple):
+        """
+        Lanza la carga de las tablas de listings en segundo plano.
+
+        Args:
+            tablas_listings: Tupla retornada por transformacion_listings
+                (df_listings, df_host, df_verification, df_amenities_listings, df_amenities)
+        """
+        df_listings, df_host, df_verification, df_amenities_listings, df_amenities = tablas_listings
+        self.log.info(f"Carga anticipada: {', '.join(TABLAS_LISTINGS)} se cargan mientras sigue la extracción")
+
+        def _cargar():
+            inicio = time.perf_counter()
+            try:
+                self.resultados = cargar_datos(df_listings, None, None, df_host, df_verification,
+                    df_amenities_listings, df_amenities, None, self.log, solo_tablas=TABLAS_LISTINGS,
+                    **self.opciones_carga)
+            except Exception as e:
+                self.error = e
+            finally:
+                self.segundos = time.perf_counter() - inicio
+
+        self._hilo = threading.Thread(target=_cargar, name="carga-anticipada", daemon=True)
+        self._hilo.start()
+
+    def finalizar(self):
+        """
+        Espera a que el hilo de carga termine, si se lanzó. Se llama al cerrar
+        la ejecución para no dejar una carga en curso cuando una etapa
+        posterior falla antes de `esperar`.
+        """
+        if self._hilo is not None:
+            self._hilo.join()
+
+    @property
+    def iniciada(self) -> bool:
+        """Indica si la carga anticipada se lanzó."""
+        return self._hilo is not None
+
+    def esperar(self, nombres: list) -> tuple:
+        """
+        Espera a que termine la carga anticipada y separa lo que falta cargar.
+
+        Args:
+            nombres: Tablas que la ejecución debe cargar
+
+        Returns:
+            tuple: ({tabla: True/False} de las tablas ya resueltas, [tablas
+                pendientes]). Las hijas de una tabla anticipada que falló se
+                omiten y cuentan como fallidas, igual que en _cargar_tablas.
+        """
+        inicio = time.perf_counter()
+        self._hilo.join()
+        self.espera = time.perf_counter() - inicio
+
+        if self.error is not None:
+            self.log.error(f"Error en la carga anticipada de las tablas de listings: {self.error}")
+            self.resultados = {nombre: False for nombre in TABLAS_LISTINGS}
+        else:
+            self.log.info(f"Carga anticipada terminada en {self.segundos:.2f} s "
+                f"({self.ahorro:.2f} s solapados con la extracción y la transformación)")
+
+        resultados = dict(self.resultados)
+        fallidas = {nombre for nombre, exitoso in resultados.items() if not exitoso}
+        pendientes = []
+        for nombre in nombres:
+            if nombre in resultados:
+                continue
+            padres = [p for p in DEPENDENCIAS.get(nombre, []) if p in fallidas]
+            if padres:
+                self.log.warning(f"Tabla {nombre} omitida: falló la carga de {', '.join(padres)}")
+                resultados[nombre] = False
+            else:
+                pendientes.append(nombre)
+        return resultados, pendientes
+
+    @property
+    def ahorro(self) -> float:
+        """Segundos de carga que corrieron en paralelo con el resto del ETL."""
+        return max(self.segundos - self.espera, 0.0)
@@ -0,0 +1,183 @@
+import queue
+import threading
+import time
+import pandas as pd
+from extraccion import BATCH_SIZE_DEFECTO, OPTIMIZAR_TIPOS, _conectar_mongo, consultar_por_chunks
+from transformacion import COLUMNAS_EXTRACCION, transformacion_calendar_chunk
+from carga import cargar_por_chunks
+from tipos import optimizar_tipos
+from logs import Logs
+
+__all__ = ['calendar_streaming']
+
+# Chunks que pueden esperar en cada cola entre etapas. Con 2 colas y un chunk
+# en proceso por etapa, en memoria hay a lo sumo 2 * TAMANO_COLA + 3 chunks.
+TAMANO_COLA = 2
+
+# Segundos entre reintentos al poner en una cola llena (para notar si otra etapa falló)
+ESPERA_COLA = 0.5
+
+# Marca de fin de datos en las colas
+_FIN = object()
+
+
+def _poner(cola: queue.Queue, item, detener: threading.Event) -> bool:
+    """
+    Pone un item en una cola acotada esperando mientras esté llena.
+    Retorna False si otra etapa pidió detener el pipeline.
+    """
+    while not detener.is_set():
+        try:
+            cola.put(item, timeout=ESPERA_COLA)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _leer(cola: queue.Queue, detener: threading.Event):
+    """
+    Recorre los items de una cola hasta la marca de fin. Si la marca llega
+    porque otra etapa falló, lanza una excepción en lugar de terminar como
+    si los datos estuvieran completos.
+    """
+    while True:
+        item = cola.get()
+        if item is _FIN:
+            if detener.is_set():
+                raise Exception("❌ Una etapa anterior del pipeline se detuvo")
+            return
+        yield item
+
+
+class _Etapa(threading.Thread):
+    """
+    Hilo de una etapa del pipeline: recorre `fuente`, aplica `funcion` a cada
+    chunk y pone el resultado en `salida`. Al terminar (o fallar) pone la
+    marca de fin, para que la etapa siguiente no quede esperando; el error se
+    guarda en `self.error` y se relanza desde el hilo principal.
+    """
+
+    def __init__(self, nombre: str, fuente, funcion, salida: queue.Queue, detener: threading.Event):
+        super().__init__(name=nombre, daemon=True)
+        self.fuente = fuente
+        self.funcion = funcion
+        self.salida = salida
+        self.detener = detener
+        self.error = None
+        self.chunks = 0
+        self.filas = 0
+
+    def run(self):
+        try:
+            for chunk in self.fuente:
+                if self.detener.is_set():
+                    break
+                chunk = self.funcion(chunk)
+                self.chunks += 1
+                self.filas += len(chunk)
+                # Un chunk que quedó vacío tras el filtro no viaja a la carga
+                if not chunk.empty and not _poner(self.salida, chunk, self.detener):
+                    break
+        except Exception as e:
+            self.error = e
+            self.detener.set()
+        finally:
+            # Si la etapa siguiente ya no consume, la cola puede estar llena
+            while True:
+                try:
+                    self.salida.put(_FIN, timeout=ESPERA_COLA)
+                    break
+                except queue.Full:
+                    if self.detener.is_set():
+                        try:
+                            self.salida.get_nowait()
+                        except queue.Empty:
+                            pass
+
+
+def calendar_streaming(listings_ids: pd.Series, log: Logs, batch_size: int = BATCH_SIZE_DEFECTO,
+    tamano_cola: int = TAMANO_COLA) -> int:
+    """
+    Extrae, transforma y carga Calendar por chunks, sin tenerlo completo en memoria.
+
+    Tres etapas conectadas por colas acotadas:
+
+    1. Extracción: recorre el cursor de MongoDB en chunks de `batch_size`
+       documentos (consultar_por_chunks).
+    2. Transformación: compacta los tipos y aplica transformacion_calendar_chunk
+       (filtro de listings válidos, campos y fechas).
+    3. Carga: inserta cada chunk en la tabla calendar (cargar_por_chunks).
+
+    Las etapas corren en paralelo y una cola llena frena a la etapa anterior,
+    así que la memoria máxima la fija el tamaño del chunk y no el de la tabla.
+    El resultado en SQL Server es el mismo que el de la ruta completa.
+
+    Args:
+        listings_ids: IDs de los listings válidos (df_listings['id'] transformado)
+        log: Instancia de la clase Logs para registro
+        batch_size: Documentos por chunk
+        tamano_cola: Chunks que pueden esperar entre dos etapas
+
+    Returns:
+        int: Filas cargadas en calendar
+
+    Raises:
+        Exception: Si falla cualquiera de las etapas
+    """
+    log.info("=" * 50)
+    log.info("CALENDAR EN MODO STREAMING")
+    log.info("=" * 50)
+    log.info(f"Chunks de {batch_size:,} documentos, colas de {tamano_cola} chunks "
+        f"(máximo {2 * tamano_cola + 3} chunks en memoria)")
+
+    inicio = time.perf_counter()
+    conexion = _conectar_mongo(log)
+    detener = threading.Event()
+    extraidos = queue.Queue(maxsize=tamano_cola)
+    transformados = queue.Queue(maxsize=tamano_cola)
+    ids = pd.Index(listings_ids.unique())
+
+    def _transformar(chunk):
+        if OPTIMIZAR_TIPOS:
+            chunk = optimizar_tipos(chunk, "Calendar", log, detalle=False)
+        return transformacion_calendar_chunk(chunk, ids)
+
+    chunks = consultar_por_chunks(conexion, "Calendar", log, batch_size, COLUMNAS_EXTRACCION.get("Calendar"))
+    extraccion = _Etapa("streaming-extraccion", chunks, lambda chunk: chunk, extraidos, detener)
+    transformacion = _Etapa("streaming-transformacion", _leer(extraidos, detener), _transformar, transformados, detener)
+
+    try:
+        extraccion.start()
+        transformacion.start()
+        error_carga = None
+        try:
+            filas = cargar_por_chunks(_leer(transformados, detener), "calendar", log)
+        except Exception as e:
+            detener.set()
+            error_carga = e
+
+        extraccion.join()
+        transformacion.join()
+        # Se informa el error de la primera etapa que falló; los siguientes son consecuencia
+        for etapa in (extraccion, transformacion):
+            if etapa.error is not None:
+                log.error(f"Error en la etapa {etapa.name}: {etapa.error}")
+                raise Exception(f"❌ Falló el streaming de calendar en {etapa.name}: {etapa.error}")
+        if error_carga is not None:
+            raise error_carga
+
+        log.separator()
+        log.info("RESUMEN DE CALENDAR EN STREAMING:")
+        log.info(f"  - Extraídos: {extraccion.filas:,} registros en {extraccion.chunks:,} chunks")
+        log.info(f"  - Eliminados sin listing válido: {extraccion.filas - transformacion.filas:,}")
+        log.info(f"  - Cargados: {filas:,} registros")
+        log.info(f"  - Tiempo total: {time.perf_counter() - inicio:.2f} s")
+        return filas
+
+    finally:
+        detener.set()
+        extraccion.join()
+        transformacion.join()
+        conexion.close()
+        log.info("Conexión a MongoDB cerrada")
@@ -0,0 +1,143 @@
+import numpy as np
+import pandas as pd
+from logs import Logs
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+__all__ = ['optimizar_tipos', 'normalizar_fechas']
+
+# Columnas de baja cardinalidad que se guardan como category. Las fechas en
+# texto se repiten muchísimo (calendar tiene ~365 fechas distintas en millones de filas).
+COLUMNAS_CATEGORICAS = {
+    'Listings': ['room_type', 'property_type', 'neighbourhood_cleansed'],
+    'Reviews': ['date'],
+    'Calendar': ['date'],
+}
+
+# Columnas con valores 't'/'f' que se guardan como booleanos
+COLUMNAS_BOOLEANAS = {
+    'Listings': ['has_availability', 'host_is_superhost', 'host_identity_verified'],
+    'Calendar': ['available'],
+}
+
+# Texto libre que solo se copia hasta SQL Server: se guarda como string de Arrow
+COLUMNAS_TEXTO = {
+    'Listings': ['listing_url', 'name', 'description', 'neighborhood_overview', 'host_url', 'host_about'],
+    'Reviews': ['comments'],
+}
+
+# Los campos vacíos del CSV original llegan como '' y se tratan como nulos
+VALORES_BOOLEANOS = {'t': True, 'f': False, '': None}
+
+
+def _es_texto(serie: pd.Series) -> bool:
+    """Indica si la columna guarda textos (object o el dtype string de pandas)."""
+    return pd.api.types.is_object_dtype(serie.dtype) or isinstance(serie.dtype, pd.StringDtype)
+
+
+def _a_booleano(serie: pd.Series):
+    """
+    Convierte una columna 't'/'f' a bool (o a 'boolean' si tiene nulos).
+    Retorna None si la columna tiene otros valores y debe quedar como está.
+    """
+    if not serie.dropna().isin(VALORES_BOOLEANOS).all():
+        return None
+    valores = serie.map(VALORES_BOOLEANOS)
+    return valores.astype('boolean' if valores.isna().any() else bool)
+
+
+def normalizar_fechas(serie: pd.Series) -> pd.Series:
+    """
+    Convierte una columna de fechas en texto a datetime64 analizando cada
+    valor distinto una sola vez.
+
+    Las columnas de fechas tienen pocos valores distintos (calendar: ~365 en
+    millones de filas), así que se factoriza la columna (o se usan sus
+    códigos si ya es category), se aplica pd.to_datetime a los valores
+    únicos y el resultado se reparte por código. Equivale a
+    pd.to_datetime(serie); los nulos y '' quedan como NaT.
+    """
+    if pd.api.types.is_datetime64_any_dtype(serie.dtype):
+        return serie
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        codigos, unicos = serie.cat.codes.to_numpy(), serie.cat.categories
+    else:
+        codigos, unicos = pd.factorize(serie)
+    # El código -1 (nulo) toma el NaT agregado al final
+    fechas = pd.to_datetime(pd.Series(unicos)).to_numpy()
+    fechas = np.append(fechas, np.array('NaT', dtype=fechas.dtype))
+    return pd.Series(fechas[codigos], index=serie.index, name=serie.name)
+
+
+def optimizar_tipos(df: pd.DataFrame, coleccion: str, log: Logs, detalle: bool = True) -> pd.DataFrame:
+    """
+    Reduce la memoria de una colección extraída cambiando los dtypes.
+
+    - Columnas de COLUMNAS_CATEGORICAS -> category
+    - Columnas 't'/'f' de COLUMNAS_BOOLEANAS -> bool / boolean ('' = nulo)
+    - Columnas enteras -> el entero más pequeño que contiene sus valores
+    - Texto libre de COLUMNAS_TEXTO -> string[pyarrow] (si pyarrow está instalado)
+
+    Los valores de las columnas category, enteras y de texto no cambian, solo
+    su representación. Las columnas 't'/'f' sí cambian de tipo: pasan a
+    True/False (el '' queda nulo), así que la transformación las ve como
+    booleanos y la carga las crea como BIT (1/0/NULL) en lugar de texto.
+
+    Args:
+        df: DataFrame recién extraído
+        coleccion: Nombre de la colección de origen
+        log: Instancia de la clase Logs para registro
+        detalle: Registrar el ahorro de memoria y los cambios (False para
+            chunks, donde se repetiría en cada uno)
+
+    Returns:
+        pd.DataFrame: El mismo DataFrame con los dtypes optimizados
+    """
+    if df.empty:
+        return df
+
+    antes = df.memory_usage(deep=True).sum() if detalle else 0
+    cambios = []
+
+    for col in COLUMNAS_CATEGORICAS.get(coleccion, []):
+        if col in df.columns and _es_texto(df[col]):
+            df[col] = df[col].astype('category')
+            cambios.append(f"{col}: category")
+
+    for col in COLUMNAS_BOOLEANAS.get(coleccion, []):
+        if col in df.columns and _es_texto(df[col]):
+            booleano = _a_booleano(df[col])
+            if booleano is None:
+                if detalle:
+                    log.warning(f"  - {coleccion}.{col} tiene valores distintos de 't'/'f'/''; se deja como texto")
+                continue
+            df[col] = booleano
+            cambios.append(f"{col}: {booleano.dtype}")
+
+    for col in df.columns:
+        dtype = df[col].dtype
+        if pd.api.types.is_integer_dtype(dtype) and not isinstance(dtype, pd.CategoricalDtype):
+            df[col] = pd.to_numeric(df[col], downcast='integer')
+            if df[col].dtype != dtype:
+                cambios.append(f"{col}: {dtype} -> {df[col].dtype}")
+
+    if pyarrow is not None:
+        for col in COLUMNAS_TEXTO.get(coleccion, []):
+            if col in df.columns and pd.api.types.is_object_dtype(df[col].dtype):
+                df[col] = df[col].astype('string[pyarrow]')
+                cambios.append(f"{col}: string[pyarrow]")
+
+    if not detalle:
+        return df
+
+    despues = df.memory_usage(deep=True).sum()
+    with log.bloque():
+        log.info(f"Optimización de tipos de {coleccion}: {antes / 1024**2:.2f} MB -> "
+            f"{despues / 1024**2:.2f} MB ({1 - despues / antes:.0%} menos)")
+        for cambio in cambios:
+            log.info(f"  - {cambio}")
+
+    return df
@@ -1,23 +1,97 @@
 import pandas as pd
 import numpy as np
 import ast
+import json
+import sys
 import unicodedata
+from functools import lru_cache
 from logs import Logs
+from tipos import normalizar_fechas
+from metricas import medir
 
-__all__ = ['transformacion_df']
+__all__ = ['transformacion_df', 'transformacion_listings', 'transformacion_calendar_chunk',
+    'calendar_rangos', 'COLUMNAS_EXTRACCION']
+
+# Campos de listings que forman df_host (4.1) y los que se descartan de él (4.2)
+CAMPOS_HOST = ['host_id', 'host_url', 'host_name', 'host_since', 
+    'host_location', 'host_about', 'host_response_time', 'host_response_rate',
+    'host_acceptance_rate', 'host_is_superhost', 'host_thumbnail_url', 'host_picture_url',
+    'host_neighbourhood', 'host_listings_count', 'host_total_listings_count', 'host_verifications',
+    'host_has_profile_pic', 'host_identity_verified']
+
+CAMPOS_HOST_ELIMINAR = ['host_response_time', 'host_response_rate', 'host_acceptance_rate', 
+    'host_thumbnail_url', 'host_picture_url', 'host_neighbourhood', 'host_has_profile_pic']
+
+# Campos propios de listings que sobreviven a las limpiezas 4.5 y 4.6
+CAMPOS_LISTINGS = ['id', 'listing_url', 'last_scraped', 'name', 'description', 
+    'neighborhood_overview', 'host_id', 'neighbourhood_cleansed', 'latitude', 'longitude', 
+    'property_type', 'room_type', 'accommodates', 'bathrooms_text', 'bedrooms', 'beds', 
+    'amenities', 'price', 'minimum_nights', 'maximum_nights', 'has_availability', 
+    'number_of_reviews', 'estimated_occupancy_l365d', 'estimated_revenue_l365d', 
+    'first_review', 'last_review', 'review_scores_rating', 'review_scores_accuracy', 
+    'review_scores_cleanliness', 'review_scores_checkin', 'review_scores_communication', 
+    'review_scores_location', 'review_scores_value']
+
+CAMPOS_LISTINGS_REDUNDANTES = ['scrape_id', 'source', 'picture_url', 'neighbourhood_group_cleansed', 
+    'minimum_minimum_nights', 'maximum_minimum_nights', 'minimum_maximum_nights', 
+    'maximum_maximum_nights', 'minimum_nights_avg_ntm', 'maximum_nights_avg_ntm',
+    'calendar_updated', 'calendar_last_scraped', 'license', 'instant_bookable', 
+    'calculated_host_listings_count', 'calculated_host_listings_count_entire_homes', 
+    'calculated_host_listings_count_private_rooms', 'calculated_host_listings_count_shared_rooms', 
+    'bathrooms', 'availability_30','availability_60', 'availability_90','availability_365', 
+    'availability_eoy', 'number_of_reviews_ltm', 'number_of_reviews_l30d',
+    'number_of_reviews_ly', 'reviews_per_month', 'neighbourhood']
+
+CAMPOS_REVIEWS = ['listing_id', 'id', 'date', 'reviewer_id', 'reviewer_name', 'comments']
+
+CAMPOS_CALENDAR = ['listing_id', 'date', 'available']
+
+CAMPOS_CALENDAR_ELIMINAR = ['minimum_nights', 'maximum_nights', 'price', 'adjusted_price']
+
+# Manifiesto de columnas por colección: lo único que la transformación necesita
+# de MongoDB. La extracción lo convierte en una proyección del lado del servidor.
+COLUMNAS_EXTRACCION = {
+    'Listings': CAMPOS_LISTINGS + [c for c in CAMPOS_HOST 
+        if c not in CAMPOS_HOST_ELIMINAR and c not in CAMPOS_LISTINGS],
+    'Reviews': CAMPOS_REVIEWS,
+    'Calendar': CAMPOS_CALENDAR,
+}
 
 def transformacion_df(df_listings: pd.DataFrame, 
     df_reviews: pd.DataFrame, 
     df_calendar: pd.DataFrame, 
-    log: Logs):
+    log: Logs,
+    tablas_listings: tuple = None,
+    listings_existentes: pd.Series = None):
+    """
+    Transforma los datos extraídos en las tablas del modelo relacional.
+    
+    Si `tablas_listings` ya viene calculado (modo semi-join de la extracción),
+    no se vuelve a transformar df_listings.
+    
+    En modo incremental `listings_existentes` trae los IDs ya cargados en
+    SQL Server: los reviews y calendar nuevos de listings que no cambiaron
+    también son válidos.
+    """
     try:
         log.info("=" * 50)
         log.info("INICIO DEL PROCESO DE TRANSFORMACIÓN")
         log.info("=" * 50)
         
-        df_listings, df_host, df_verification, df_amenities_listings, df_amenities = _transformacion_listings(df_listings, log)
-        df_reviews, df_reviewer = _transformacion_reviews(df_reviews, df_listings['id'], log)
-        df_calendar = _transformacion_calendar(df_calendar, df_listings['id'], log)
+        if tablas_listings is None:
+            tablas_listings = _transformacion_listings(df_listings, log)
+        else:
+            log.info("Tablas de listings ya transformadas durante la extracción (semi-join)")
+        
+        df_listings, df_host, df_verification, df_amenities_listings, df_amenities = tablas_listings
+        
+        listings_validos = df_listings['id']
+        if listings_existentes is not None:
+            listings_validos = pd.concat([listings_validos, listings_existentes], ignore_index=True)
+            log.info(f"Listings válidos (extraídos + ya cargados en SQL Server): {listings_validos.nunique():,}")
+        
+        df_reviews, df_reviewer = _transformacion_reviews(df_reviews, listings_validos, log)
+        df_calendar = _transformacion_calendar(df_calendar, listings_validos, log)
 
         return df_listings, df_reviews, df_calendar, df_host, df_verification, df_amenities_listings, df_amenities, df_reviewer
         
@@ -31,35 +105,149 @@ def transformacion_df(df_listings: pd.DataFrame,
         log.info("=" * 50)
 
 
+def transformacion_listings(df_listings: pd.DataFrame, log: Logs):
+    """
+    Transforma solo listings (pasos 4.1 a 4.12).
+    Se usa desde la extracción en modo semi-join.
+    """
+    return _transformacion_listings(df_listings, log)
+
+
+def transformacion_calendar_chunk(df_calendar: pd.DataFrame, listings_ids: pd.Series) -> pd.DataFrame:
+    """
+    Paso 4.15 sobre un chunk de calendar y sin registro: filtra los listings
+    válidos, elimina los campos no necesarios y normaliza las fechas.
+    
+    Es el mismo trabajo por fila de _transformacion_calendar (_limpiar_filas);
+    lo usa el modo streaming (pipeline.py), donde calendar nunca está completo
+    en memoria.
+    """
+    return _limpiar_filas('calendar', df_calendar, listings_ids)
+
+
+def _limpiar_filas(tabla: str, df: pd.DataFrame, listings_ids: pd.Series) -> pd.DataFrame:
+    """
+    Trabajo por fila de reviews (4.13) y calendar (4.15): descarta las filas
+    sin listing válido, elimina los campos no necesarios de calendar y
+    normaliza las fechas.
+    
+    Lo comparten la transformación completa y el modo streaming, así que
+    ambos entregan las mismas filas. En reviews
+    se conserva reviewer_name: la dimensión reviewer necesita todos los
+    reviews y se arma después.
+    """
+    df = df[df['listing_id'].isin(listings_ids)]
+    if tabla == 'calendar':
+        df = df.drop(CAMPOS_CALENDAR_ELIMINAR, axis=1, errors='ignore')
+    df['date'] = normalizar_fechas(df['date'])
+    return df
+
+
+def calendar_rangos(df_calendar: pd.DataFrame, log: Logs) -> pd.DataFrame:
+    """
+    Comprime df_calendar en rangos de días consecutivos con la misma disponibilidad.
+    
+    Salida opcional para la tabla calendar_ranges: cada fila
+    (listing_id, start_date, end_date, available) representa todos los días
+    de start_date a end_date. Un cambio de listing, de disponibilidad o un
+    hueco en las fechas abre un rango nuevo, así que expandir los rangos
+    reproduce exactamente las filas diarias.
+    
+    Args:
+        df_calendar: Calendar transformado (listing_id, date, available)
+        log: Instancia de la clase Logs para registro
+        
+    Returns:
+        pd.DataFrame: Columnas listing_id, start_date, end_date, available
+    """
+    try:
+        log.separator()
+        log.info("4.16. Compresión de df_calendar en rangos (calendar_ranges)")
+        paso = medir("transformacion.4.16", len(df_calendar))
+        
+        if df_calendar.empty:
+            log.warning("df_calendar está vacío; calendar_ranges queda sin filas")
+            vacio = df_calendar.reindex(columns=['listing_id', 'date', 'available'])
+            paso.terminar(0)
+            return pd.DataFrame({
+                'listing_id': vacio['listing_id'],
+                'start_date': vacio['date'],
+                'end_date': vacio['date'],
+                'available': vacio['available'],
+            })
+        
+        ids = df_calendar['listing_id'].to_numpy()
+        fechas = df_calendar['date'].to_numpy()
+        
+        # Mongo suele entregar calendar ya ordenado por listing y fecha; solo se ordena si hace falta
+        ordenado = bool((
+            (ids[1:] > ids[:-1]) | ((ids[1:] == ids[:-1]) & (fechas[1:] >= fechas[:-1]))
+        ).all())
+        if not ordenado:
+            log.info("Ordenando df_calendar por listing_id y date")
+            df_calendar = df_calendar.sort_values(['listing_id', 'date'], kind='stable')
+            ids = df_calendar['listing_id'].to_numpy()
+            fechas = df_calendar['date'].to_numpy()
+        
+        disponible = df_calendar['available']
+        codigos, _ = pd.factorize(disponible, use_na_sentinel=False)
+        
+        nuevo = np.ones(len(ids), dtype=bool)
+        nuevo[1:] = (
+            (ids[1:] != ids[:-1])
+            | (codigos[1:] != codigos[:-1])
+            | ((fechas[1:] - fechas[:-1]) != np.timedelta64(1, 'D'))
+        )
+        inicios = np.flatnonzero(nuevo)
+        fines = np.append(inicios[1:], len(ids)) - 1
+        
+        df_rangos = pd.DataFrame({
+            'listing_id': ids[inicios],
+            'start_date': fechas[inicios],
+            'end_date': fechas[fines],
+            'available': disponible.iloc[inicios].reset_index(drop=True),
+        })
+        
+        factor = len(df_calendar) / max(len(df_rangos), 1)
+        log.info(f"✅ df_calendar_ranges - Filas: {df_rangos.shape[0]:,} (de {len(df_calendar):,} filas diarias, {factor:.1f}x menos)")
+        paso.terminar(df_rangos.shape[0])
+        
+        return df_rangos
+        
+    except Exception as e:
+        log.error(f"Error en calendar_rangos: {str(e)}")
+        raise
+
+
 def _transformacion_listings(df_listings: pd.DataFrame, log: Logs):
     """Transforma listings y extrae tablas relacionadas."""
     try:
         # 4.1 Abstracción de df_host
         log.separator()
         log.info("4.1. Abstracción de df_host")
+        paso = medir("transformacion.4.1", len(df_listings))
         log.info("Se abstrae el df_host del df_listings")
         
-        df_host = df_listings[['host_id', 'host_url', 'host_name', 'host_since', 
-            'host_location', 'host_about', 'host_response_time', 'host_response_rate',
-            'host_acceptance_rate', 'host_is_superhost', 'host_thumbnail_url', 'host_picture_url',
-            'host_neighbourhood', 'host_listings_count', 'host_total_listings_count', 'host_verifications',
-            'host_has_profile_pic', 'host_identity_verified']].drop_duplicates()
+        # Con proyección en la extracción los campos de 4.2 ya no llegan de MongoDB
+        campos_host = [c for c in CAMPOS_HOST if c in df_listings.columns]
+        df_host = df_listings[campos_host].drop_duplicates()
         
         log.info(f"✅ df_host - Filas: {df_host.shape[0]:,}, Columnas: {df_host.shape[1]}")
+        paso.terminar(df_host.shape[0])
         
         # 4.2 Eliminación de campos no necesarios
         log.separator()
         log.info("4.2. Eliminación de campos no necesarios en df_host")
+        paso = medir("transformacion.4.2", df_host.shape[0])
         
-        campos_eliminar = ['host_response_time', 'host_response_rate', 'host_acceptance_rate', 
-            'host_thumbnail_url', 'host_picture_url', 'host_neighbourhood', 'host_has_profile_pic']
-        
-        df_host = df_host.drop(campos_eliminar, axis=1)
+        df_host = df_host.drop(CAMPOS_HOST_ELIMINAR, axis=1, errors='ignore')
         log.info(f"✅ df_host - Filas: {df_host.shape[0]:,}, Columnas: {df_host.shape[1]}")
+        paso.terminar(df_host.shape[0])
         
         # 4.3 Limpieza del df_host
         log.separator()
         log.info("4.3. Limpieza del df_host")
+        paso = medir("transformacion.4.3", df_host.shape[0])
         log.info("Eliminación de host con nombre, verificación y locación null")
         
         filas_antes = df_host.shape[0]
@@ -68,19 +256,19 @@ def _transformacion_listings(df_listings: pd.DataFrame, log: Logs):
         df_host = df_host[~(df_host['host_location'] == '')]
         
         log.info(f"Eliminados {filas_antes - df_host.shape[0]:,} hosts sin información válida")
-        log.info("Transformando campos de fecha a formato estándar")
-        df_host['host_since'] = pd.to_datetime(df_host['host_since'])
+        log.info("Transformando campos de fecha a tipo fecha")
+        df_host['host_since'] = normalizar_fechas(df_host['host_since'])
         
         log.info(f"✅ df_host - Filas: {df_host.shape[0]:,}, Columnas: {df_host.shape[1]}")
+        paso.terminar(df_host.shape[0])
         
         # 4.4 Abstracción de verificaciones
         log.separator()
         log.info("4.4. Abstracción de df_verification")
+        paso = medir("transformacion.4.4", df_host.shape[0])
         log.info("Se abstrae las formas de verificaciones que tiene cada host")
         
-        df_host['host_verifications'] = df_host['host_verifications'].apply(
-            lambda x: ast.literal_eval(x) if isinstance(x, str) else x
-        )
+        df_host['host_verifications'] = df_host['host_verifications'].map(_a_lista)
         
         df_verification = (
             df_host[['host_id', 'host_verifications']]
@@ -93,53 +281,45 @@ def _transformacion_listings(df_listings: pd.DataFrame, log: Logs):
         
         log.info(f"✅ df_host - Filas: {df_host.shape[0]:,}, Columnas: {df_host.shape[1]}")
         log.info(f"✅ df_verification - Filas: {df_verification.shape[0]:,}, Columnas: {df_verification.shape[1]}")
+        paso.terminar(df_verification.shape[0])
         
         # 4.5 Limpieza de df_listings
         log.separator()
         log.info("4.5. Limpieza de df_listings validando con df_host")
+        paso = medir("transformacion.4.5", df_listings.shape[0])
         
-        campos_host = ['host_url', 'host_name', 'host_since', 'host_location', 'host_about', 
-            'host_response_time', 'host_response_rate', 'host_acceptance_rate', 'host_is_superhost', 
-            'host_thumbnail_url', 'host_picture_url', 'host_neighbourhood', 'host_listings_count', 
-            'host_total_listings_count', 'host_verifications', 'host_has_profile_pic', 'host_identity_verified']
-        
-        df_listings = df_listings.drop(campos_host, axis=1)
+        campos_host = [c for c in CAMPOS_HOST if c != 'host_id']
+        df_listings = df_listings.drop(campos_host, axis=1, errors='ignore')
         
         filas_antes = df_listings.shape[0]
         df_listings = df_listings[df_listings['host_id'].isin(df_host['host_id'])]
         
         log.info(f"Eliminados {filas_antes - df_listings.shape[0]:,} listings sin host válido")
         log.info(f"✅ df_listings - Filas: {df_listings.shape[0]:,}, Columnas: {df_listings.shape[1]}")
+        paso.terminar(df_listings.shape[0])
         
         # 4.6 Eliminación de campos redundantes
         log.separator()
         log.info("4.6. Eliminación de campos redundantes de df_listings")
+        paso = medir("transformacion.4.6", df_listings.shape[0])
         
-        campos_redundantes = ['scrape_id', 'source', 'picture_url', 'neighbourhood_group_cleansed', 
-            'minimum_minimum_nights', 'maximum_minimum_nights', 'minimum_maximum_nights', 
-            'maximum_maximum_nights', 'minimum_nights_avg_ntm', 'maximum_nights_avg_ntm',
-            'calendar_updated', 'calendar_last_scraped', 'license', 'instant_bookable', 
-            'calculated_host_listings_count', 'calculated_host_listings_count_entire_homes', 
-            'calculated_host_listings_count_private_rooms', 'calculated_host_listings_count_shared_rooms', 
-            'bathrooms', 'availability_30','availability_60', 'availability_90','availability_365', 
-            'availability_eoy', 'number_of_reviews_ltm', 'number_of_reviews_l30d',
-            'number_of_reviews_ly', 'reviews_per_month', 'neighbourhood']
-        
-        df_listings = df_listings.drop(campos_redundantes, axis=1)
+        df_listings = df_listings.drop(CAMPOS_LISTINGS_REDUNDANTES, axis=1, errors='ignore')
         log.info(f"✅ df_listings - Columnas: {df_listings.shape[1]}")
+        paso.terminar(df_listings.shape[0])
         
         # 4.7 Limpieza de campos
         log.separator()
         log.info("4.7. Limpieza de campos df_listings")
+        paso = medir("transformacion.4.7", df_listings.shape[0])
         
         filas_antes = df_listings.shape[0]
         df_listings = df_listings[~(df_listings['number_of_reviews'] <= 0)]
         log.info(f"Eliminados {filas_antes - df_listings.shape[0]:,} listings sin reviews")
         
-        log.info("Transformando campos de fecha a formato estándar")
-        df_listings['last_scraped'] = pd.to_datetime(df_listings['last_scraped'])
-        df_listings['first_review'] = pd.to_datetime(df_listings['first_review'])
-        df_listings['last_review'] = pd.to_datetime(df_listings['last_review'])
+        log.info("Transformando campos de fecha a tipo fecha")
+        df_listings['last_scraped'] = normalizar_fechas(df_listings['last_scraped'])
+        df_listings['first_review'] = normalizar_fechas(df_listings['first_review'])
+        df_listings['last_review'] = normalizar_fechas(df_listings['last_review'])
         
         filas_antes = df_listings.shape[0]
         df_listings = df_listings[~(df_listings['last_review'] < (df_listings['last_scraped'] - pd.DateOffset(years=1)))]
@@ -159,85 +339,67 @@ def _transformacion_listings(df_listings: pd.DataFrame, log: Logs):
         df_listings['bathrooms_text'] = df_listings['bathrooms_text'].fillna(1)
         df_listings['bathrooms_text'] = np.ceil(df_listings['bathrooms_text']).astype(int)
         
-        df_listings['last_scraped'] = df_listings['last_scraped'].dt.strftime('%Y-%m-%d')
-        df_listings['first_review'] = df_listings['first_review'].dt.strftime('%Y-%m-%d')
-        df_listings['last_review'] = df_listings['last_review'].dt.strftime('%Y-%m-%d')
-        df_host['host_since'] = df_host['host_since'].dt.strftime('%Y-%m-%d')
-        
         log.info(f"✅ df_listings - Filas: {df_listings.shape[0]:,}, Columnas: {df_listings.shape[1]}")
+        paso.terminar(df_listings.shape[0])
         
         # 4.8 Abstracción de amenities
         log.separator()
         log.info("4.8. Abstracción de df_amenities_listings")
+        paso = medir("transformacion.4.8", df_listings.shape[0])
         log.info("Se abstrae el df_amenities_listings del df_listings")
         
-        df_amenities_listings = df_listings[['id', 'amenities']].copy()
-        df_amenities_listings['amenities_str'] = df_amenities_listings['amenities'].astype(str)
-        df_amenities_listings = df_amenities_listings.drop_duplicates(subset=['id', 'amenities_str']).drop(columns='amenities_str')
+        df_amenities_listings = df_listings[['id', 'amenities']].drop_duplicates()
         df_listings = df_listings.drop(['amenities'], axis=1)
         
-        log.info("Transformando amenities en lista de Python")
-        df_amenities_listings['amenities'] = df_amenities_listings['amenities'].apply(
-            lambda x: ast.literal_eval(x) if isinstance(x, str) else x
-        )
+        log.info("Transformando amenities en listas de códigos (una lectura por texto distinto)")
+        filas, tokens, vocabulario = _codificar_listas(df_amenities_listings['amenities'])
         
-        log.info("'Explotando' cada amenity para ser asignado uno a uno a su listing")
-        df_amenities_listings = (
-            df_amenities_listings[['id', 'amenities']]
-            .explode('amenities')
-            .reset_index(drop=True)
-        )
-        
-        log.info(f"✅ df_amenities_listings - Filas: {df_amenities_listings.shape[0]:,}, Columnas: {df_amenities_listings.shape[1]}")
+        log.info(f"✅ Asignaciones amenity-listing: {len(filas):,}, amenities distintos: {len(vocabulario):,}")
+        paso.terminar(len(filas))
         
         # 4.9 Abstracción de catálogo de amenities
         log.separator()
         log.info("4.9. Abstracción de df_amenities")
-        
-        df_amenities_p = df_amenities_listings[['amenities']].drop_duplicates().reset_index(drop=True)
-        log.info(f"✅ df_amenities preliminar - Filas: {df_amenities_p.shape[0]:,}")
-        
+        paso = medir("transformacion.4.9", len(vocabulario))
         log.info("Limpieza de amenities repetidos y calidad de datos")
-        df_amenities_p['amenities_clean'] = df_amenities_p['amenities'].apply(_clean_text)
         
-        log.info(f"✅ df_amenities_p - Filas: {df_amenities_p.shape[0]:,}, Columnas: {df_amenities_p.shape[1]}")
+        # Cada amenity distinto se limpia una sola vez; los que quedan iguales comparten código
+        codigos_limpios, limpios = pd.factorize(pd.Series([_clean_text(a) for a in vocabulario], dtype=object))
+        tokens = codigos_limpios[tokens]
+        
+        log.info(f"✅ Amenities limpios distintos: {len(limpios):,}")
+        paso.terminar(len(limpios))
         
         # 4.10 Transformación de amenities limpios
         log.separator()
         log.info("4.10. Transformación de amenities limpios a df_amenities_listings")
-        log.info("Reemplazar amenities con versión limpia y renombrar 'id' a 'listing_id'")
+        paso = medir("transformacion.4.10", len(tokens))
         
-        df_amenities_listings = (
-            df_amenities_listings
-            .merge(df_amenities_p, on='amenities', how='left')
-            [['id', 'amenities_clean']]
-            .rename(columns={'amenities_clean': 'amenities', 'id': 'listing_id'})
-        )
-        
-        filas_antes = df_amenities_listings.shape[0]
-        df_amenities_listings = df_amenities_listings[df_amenities_listings['amenities'] != ''].reset_index(drop=True)
-        log.info(f"Eliminados {filas_antes - df_amenities_listings.shape[0]:,} amenities no válidos")
-        
-        log.info(f"✅ df_amenities_listings - Filas: {df_amenities_listings.shape[0]:,}, Columnas: {df_amenities_listings.shape[1]}")
+        filas_antes = len(tokens)
+        validos = limpios[tokens] != ''
+        filas, tokens = filas[validos], tokens[validos]
+        log.info(f"Eliminados {filas_antes - len(tokens):,} amenities no válidos")
+        paso.terminar(len(tokens))
         
         # 4.11 Creación de df_amenities final
         log.separator()
         log.info("4.11. Creación de df_amenities limpio y ajuste con IDs")
-        log.info("Crear df_amenities limpio con amenities_id")
-        
-        df_amenities = df_amenities_listings[['amenities']].drop_duplicates().reset_index(drop=True)
-        df_amenities.insert(0, 'amenities_id', df_amenities.index + 1)
+        paso = medir("transformacion.4.11", len(tokens))
+        log.info("IDs de amenities en orden de primera aparición")
+        
+        codigos, orden = pd.factorize(tokens)
+        df_amenities = pd.DataFrame({
+            'amenities_id': np.arange(1, len(orden) + 1),
+            'amenities': limpios[orden].tolist(),
+        })
+        df_amenities_listings = pd.DataFrame({
+            'listing_id': df_amenities_listings['id'].to_numpy()[filas],
+            'amenities_id': codigos + 1,
+        })
         
         log.info(f"✅ df_amenities - Filas: {df_amenities.shape[0]:,}, Columnas: {df_amenities.shape[1]}")
-        
-        log.info("Reasignar amenities por amenities_id en df_amenities_listings")
-        df_amenities_listings = (
-            df_amenities_listings
-            .merge(df_amenities, on='amenities', how='left')
-            [['listing_id', 'amenities_id']]
-        )
-        
         log.info(f"✅ df_amenities_listings - Filas: {df_amenities_listings.shape[0]:,}, Columnas: {df_amenities_listings.shape[1]}")
+        paso.terminar(df_amenities_listings.shape[0])
         
         # 4.12 Resumen final
         log.separator()
@@ -260,46 +422,32 @@ def _transformacion_reviews(df_reviews: pd.DataFrame, listings_ids: pd.Series, l
     try:
         log.separator()
         log.info("4.13. Limpieza de df_reviews validando con df_listings")
+        paso = medir("transformacion.4.13", df_reviews.shape[0])
         log.info("Se limpiará todos los reviews que no tengan un listing válido")
         
         filas_antes = df_reviews.shape[0]
-        df_reviews = df_reviews[df_reviews['listing_id'].isin(listings_ids)]
+        log.info("Transformando campos de fecha a tipo fecha")
+        df_reviews = _limpiar_filas('reviews', df_reviews, listings_ids)
         
         log.info(f"Eliminados {filas_antes - df_reviews.shape[0]:,} reviews sin listing válido")
         log.info(f"✅ df_reviews - Filas: {df_reviews.shape[0]:,}, Columnas: {df_reviews.shape[1]}")
+        paso.terminar(df_reviews.shape[0])
         
         # 4.14 Abstracción de reviewers
         log.separator()
         log.info("4.14. Abstracción de df_reviewer")
+        paso = medir("transformacion.4.14", df_reviews.shape[0])
         log.info("Se abstrae el df_reviewer del df_reviews")
         
-        df_reviewer = df_reviews[['reviewer_id', 'reviewer_name']].drop_duplicates()
-        
         log.info("Limpiando nombres de reviewers (seleccionando el más común por ID)")
-        name_counts = (
-            df_reviewer.groupby(['reviewer_id', 'reviewer_name'])
-            .size()
-            .reset_index(name='count')
-        )
-        most_common_names = (
-            name_counts.sort_values(['reviewer_id', 'count'], ascending=[True, False])
-            .drop_duplicates(subset=['reviewer_id'], keep='first')
-        )
-        df_reviewer = df_reviewer.drop(columns=['reviewer_name']).merge(
-            most_common_names[['reviewer_id', 'reviewer_name']],
-            on='reviewer_id',
-            how='left'
-        )
+        df_reviewer = _dimension_reviewer(df_reviews['reviewer_id'], df_reviews['reviewer_name'])
         
         log.info("Eliminando campo 'reviewer_name' de df_reviews")
         df_reviews = df_reviews.drop(['reviewer_name'], axis=1)
         
-        log.info("Transformando campos de fecha a formato estándar")
-        df_reviews['date'] = pd.to_datetime(df_reviews['date'])
-        df_reviews['date'] = df_reviews['date'].dt.strftime('%Y-%m-%d')
-        
         log.info(f"✅ df_reviews - Filas: {df_reviews.shape[0]:,}, Columnas: {df_reviews.shape[1]}")
         log.info(f"✅ df_reviewer - Filas: {df_reviewer.shape[0]:,}, Columnas: {df_reviewer.shape[1]}")
+        paso.terminar(df_reviewer.shape[0])
         
         return df_reviews, df_reviewer
         
@@ -313,21 +461,17 @@ def _transformacion_calendar(df_calendar: pd.DataFrame, listings_ids: pd.Series,
     try:
         log.separator()
         log.info("4.15. Limpieza de df_calendar validando con df_listings")
+        paso = medir("transformacion.4.15", df_calendar.shape[0])
         log.info("Se limpiará todos los registros de calendar que no tengan un listing válido")
         
         filas_antes = df_calendar.shape[0]
-        df_calendar = df_calendar[df_calendar['listing_id'].isin(listings_ids)]
+        log.info("Eliminando campos no necesarios y transformando campos de fecha a tipo fecha")
+        df_calendar = _limpiar_filas('calendar', df_calendar, listings_ids)
         
         log.info(f"Eliminados {filas_antes - df_calendar.shape[0]:,} registros sin listing válido")
-        log.info("Eliminando campos no necesarios")
-        
-        df_calendar = df_calendar.drop(['minimum_nights', 'maximum_nights', 'price', 'adjusted_price'], axis=1)
-        
-        log.info("Transformando campos de fecha a formato estándar")
-        df_calendar['date'] = pd.to_datetime(df_calendar['date'])
-        df_calendar['date'] = df_calendar['date'].dt.strftime('%Y-%m-%d')
         
         log.info(f"✅ df_calendar - Filas: {df_calendar.shape[0]:,}, Columnas: {df_calendar.shape[1]}")
+        paso.terminar(df_calendar.shape[0])
         
         return df_calendar
         
@@ -336,6 +480,108 @@ def _transformacion_calendar(df_calendar: pd.DataFrame, listings_ids: pd.Series,
         raise
 
 
+@lru_cache(maxsize=2**16)
+def _parsear_lista(texto: str):
+    """
+    Convierte el texto de una lista ('["Wifi", "TV"]' o "['email', 'phone']")
+    en una tupla de textos internados.
+    
+    Prueba primero json.loads, mucho más rápido, y si el texto no es JSON
+    válido (comillas simples) usa ast.literal_eval. El resultado se memoriza
+    por texto, así que las listas repetidas se analizan una sola vez.
+    """
+    try:
+        valor = json.loads(texto)
+    except ValueError:
+        valor = ast.literal_eval(texto)
+    if isinstance(valor, list):
+        return tuple(sys.intern(x) if isinstance(x, str) else x for x in valor)
+    return valor
+
+
+def _a_lista(x):
+    """Aplica _parsear_lista a los textos y deja los demás valores como están."""
+    return _parsear_lista(x) if isinstance(x, str) else x
+
+
+def _codificar_listas(serie: pd.Series):
+    """
+    Convierte una columna de listas en texto a arreglos planos de códigos,
+    sin armar listas de Python por fila ni hacer explode.
+    
+    Equivale a serie.map(_a_lista).explode(), salvo que las listas vacías y
+    los valores que no son lista no generan filas.
+    
+    Returns:
+        tuple: (filas, tokens, vocabulario): para cada elemento, la posición
+            de su fila en `serie` y el código del elemento en `vocabulario`
+            (lista de valores distintos en orden de aparición)
+    """
+    codigos, textos = pd.factorize(serie)
+    
+    vocabulario = {}
+    por_texto = []
+    for lista in map(_a_lista, textos):
+        if not isinstance(lista, (list, tuple)):
+            lista = ()
+        por_texto.append(np.fromiter((vocabulario.setdefault(t, len(vocabulario)) for t in lista),
+            dtype=np.int64, count=len(lista)))
+    
+    # El código -1 (nulo) apunta a una lista vacía agregada al final
+    por_texto.append(np.empty(0, dtype=np.int64))
+    largos = np.array([len(t) for t in por_texto])
+    planos = np.concatenate(por_texto)
+    inicios = np.cumsum(largos) - largos
+    
+    largo_fila = largos[codigos]
+    total = int(largo_fila.sum())
+    filas = np.repeat(np.arange(len(codigos)), largo_fila)
+    desplazamiento = np.arange(total) - np.repeat(np.cumsum(largo_fila) - largo_fila, largo_fila)
+    tokens = planos[np.repeat(inicios[codigos], largo_fila) + desplazamiento]
+    
+    return filas, tokens, list(vocabulario)
+
+
+def _dimension_reviewer(reviewer_ids: pd.Series, nombres: pd.Series) -> pd.DataFrame:
+    """
+    Arma df_reviewer con una fila por reviewer_id y su nombre más frecuente.
+    
+    Cuenta las apariciones de cada par (reviewer_id, nombre) en todos los
+    reviews en una sola agregación por hash. Los empates se resuelven por el
+    nombre menor en orden alfabético y los nombres nulos no cuentan (el
+    reviewer queda con nombre nulo solo si no tiene ninguno), como tampoco los
+    reviews sin reviewer_id. No se ordenan
+    los reviews ni se hace merge: los IDs quedan en orden de primera aparición.
+    
+    Args:
+        reviewer_ids: Columna reviewer_id de los reviews
+        nombres: Columna reviewer_name de los reviews
+        
+    Returns:
+        pd.DataFrame: Columnas reviewer_id y reviewer_name
+    """
+    codigos_id, ids = pd.factorize(reviewer_ids)
+    # sort=True: el código de cada nombre sigue el orden alfabético (solo se ordenan los distintos)
+    codigos_nombre, distintos = pd.factorize(nombres, sort=True)
+    n = max(len(distintos), 1)
+    
+    validos = (codigos_nombre >= 0) & (codigos_id >= 0)
+    pares = codigos_id[validos].astype(np.int64) * n + codigos_nombre[validos]
+    conteos = pd.Series(pares).value_counts(sort=False)
+    
+    pares = conteos.index.to_numpy()
+    # Mayor conteo gana; a igual conteo, el código de nombre menor
+    puntaje = conteos.to_numpy().astype(np.int64) * n + (n - 1 - pares % n)
+    mejor = np.full(len(ids), -1, dtype=np.int64)
+    np.maximum.at(mejor, pares // n, puntaje)
+    
+    codigo_elegido = np.where(mejor >= 0, n - 1 - mejor % n, -1)
+    return pd.DataFrame({
+        'reviewer_id': ids,
+        'reviewer_name': distintos.array.take(codigo_elegido, allow_fill=True),
+    })
+
+
 def _clean_text(a):
     
     if not isinstance(a, str):